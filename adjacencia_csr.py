@@ -0,0 +1,67 @@
+from array import array
+
+
+class AdjacenciaCSR:
+    """Adjacência congelada no formato CSR (compressed sparse row).
+
+    Os vizinhos do vértice de índice i ficam em destinos[offsets[i]:offsets[i+1]],
+    com os custos correspondentes em pesos[...]. Os vértices são referidos por
+    índices 0..n-1 (na ordem de `nos`), o que dispensa dicionários nos laços dos
+    algoritmos de caminhos mínimos. Como tudo é `array` da biblioteca padrão, o
+    objeto é compacto e barato de enviar para outros processos.
+    """
+
+    def __init__(self, nos, offsets, destinos, pesos, inteiros):
+        self.nos = nos
+        self.n = len(nos)
+        self.offsets = offsets   # array('q') com n+1 posições
+        self.destinos = destinos # array('i') com o índice de cada vizinho
+        self.pesos = pesos       # array('q') se todos os custos forem inteiros, senão array('d')
+        self.inteiros = inteiros
+        self._listas = None
+
+    @classmethod
+    def de_adjacencia(cls, vertices, adj):
+        """Constrói a representação CSR a partir de {u: [(v, custo), ...]}."""
+        nos = list(vertices)
+        indice = {no: i for i, no in enumerate(nos)}
+        inteiros = all(isinstance(custo, int) for vizinhos in adj.values() for _, custo in vizinhos)
+
+        offsets = array("q", [0])
+        destinos = array("i")
+        pesos = array("q" if inteiros else "d")
+        for no in nos:
+            for v, custo in adj.get(no, ()):
+                destinos.append(indice[v])
+                pesos.append(custo)
+            offsets.append(len(destinos))
+        return cls(nos, offsets, destinos, pesos, inteiros)
+
+    def vizinhos(self, i):
+        """Itera sobre (índice do vizinho, custo) do vértice de índice i."""
+        inicio, fim = self.offsets[i], self.offsets[i + 1]
+        return zip(self.destinos[inicio:fim], self.pesos[inicio:fim])
+
+    def listas(self):
+        """Retorna, por índice de vértice, a tupla de (vizinho, custo) de suas saídas.
+
+        É a forma mais rápida de percorrer os vizinhos em Python puro (usada pelo
+        Dijkstra). A conversão é feita uma vez e reaproveitada; ela não é incluída
+        ao serializar o objeto, então cada processo do pool refaz a sua.
+        """
+        if self._listas is None:
+            destinos, pesos, offsets = self.destinos, self.pesos, self.offsets
+            self._listas = tuple(
+                tuple(zip(destinos[offsets[i]:offsets[i + 1]], pesos[offsets[i]:offsets[i + 1]]))
+                for i in range(self.n)
+            )
+        return self._listas
+
+    def num_conexoes(self):
+        """Número total de conexões direcionadas."""
+        return len(self.destinos)
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado["_listas"] = None
+        return estado
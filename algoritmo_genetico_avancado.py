@@ -2,26 +2,34 @@ import copy
 import time
 import random
 from rota import Rota
+from prefixos_rota import PrefixosRota
+from heuristica_split import split, tour_gigante_de_rotas, tour_gigante_vizinho_mais_proximo
+
+# Fração dos filhos gerados pelo crossover OX sobre tours gigantes (os demais usam crossover_avancado)
+PROBABILIDADE_CROSSOVER_TOUR = 0.5
 
 def calcular_custo_rota_completa(grafo, rota_sequencia, deposito_id):
     """Calcula o custo total de uma rota dada sua sequência de serviços."""
+    if deposito_id == grafo.deposito:
+        # Custos entre serviços pré-calculados: a rota é avaliada só com indexação
+        return grafo.get_matriz_servicos().custo_rota(rota_sequencia)
     if not rota_sequencia:
         return 0, 0
     
     custo_total = 0
     demanda_total = 0
     current_node = deposito_id
+    tabela = grafo.servicos
 
     for service_id in rota_sequencia:
-        detalhes = grafo.get_service_details(service_id)
-        if not detalhes:
+        if not tabela.contem(service_id):
             return float("inf"), float("inf")
 
-        u_servico, v_servico = detalhes["endpoints"]
-        demanda_servico = detalhes["demanda"]
-        custo_servico = detalhes["custo_servico"]
+        u_servico, v_servico = tabela.origem[service_id], tabela.destino[service_id]
+        demanda_servico = tabela.demanda[service_id]
+        custo_servico = tabela.custo_servico[service_id]
 
-        custo_travessia, _ = grafo.get_shortest_path(current_node, u_servico)
+        custo_travessia = grafo.get_custo_caminho(current_node, u_servico)
         if custo_travessia == float("inf"):
             return float("inf"), float("inf")
 
@@ -29,7 +37,7 @@ def calcular_custo_rota_completa(grafo, rota_sequencia, deposito_id):
         demanda_total += demanda_servico
         current_node = v_servico
 
-    custo_retorno, _ = grafo.get_shortest_path(current_node, deposito_id)
+    custo_retorno = grafo.get_custo_caminho(current_node, deposito_id)
     if custo_retorno == float("inf"):
         return float("inf"), float("inf")
 
@@ -52,6 +60,27 @@ def aplicar_2opt_local(grafo, rota_servicos, deposito_id, capacidade):
     if len(rota_servicos) < 2:
         return rota_servicos, False
     
+    if deposito_id != grafo.deposito:
+        return _aplicar_2opt_recalculando(grafo, rota_servicos, deposito_id, capacidade)
+
+    # A inversão não muda a demanda; o delta de cada inversão sai dos vetores de prefixo em O(1)
+    prefixos = PrefixosRota(grafo, rota_servicos)
+    melhor_delta = 0
+    melhor_trecho = None
+    for i in range(len(rota_servicos) - 1):
+        for j in range(i + 1, len(rota_servicos)):
+            delta = prefixos.delta_inversao(i, j)
+            if delta < melhor_delta:
+                melhor_delta = delta
+                melhor_trecho = (i, j)
+
+    if melhor_trecho is None:
+        return rota_servicos[:], False
+    i, j = melhor_trecho
+    return rota_servicos[:i] + rota_servicos[i:j+1][::-1] + rota_servicos[j+1:], True
+
+def _aplicar_2opt_recalculando(grafo, rota_servicos, deposito_id, capacidade):
+    """2-opt com o recálculo completo de cada rota (depósito diferente do da instância)."""
     melhor_rota = rota_servicos[:]
     custo_original, _ = calcular_custo_rota_completa(grafo, rota_servicos, deposito_id)
     melhor_custo = custo_original
@@ -83,17 +112,19 @@ def busca_local_hibrida(grafo, rotas_servicos):
                 rotas_melhoradas[i] = nova_rota
                 melhoria_global = True
     
-    # 2. Tenta relocar serviços entre rotas
+    # 2. Tenta relocar serviços entre rotas (economias de remoção e inserção em O(1) pelos prefixos)
+    tabela = grafo.servicos
+    prefixos = [PrefixosRota(grafo, rota) for rota in rotas_melhoradas]
     for i in range(len(rotas_melhoradas)):
         if not rotas_melhoradas[i]:
             continue
         for pos in range(len(rotas_melhoradas[i])):
             servico = rotas_melhoradas[i][pos]
+            u, v = tabela.origem[servico], tabela.destino[servico]
+            custo_servico, demanda_servico = tabela.custo_servico[servico], tabela.demanda[servico]
             
-            # Remove o serviço da rota atual
-            rota_sem_servico = rotas_melhoradas[i][:pos] + rotas_melhoradas[i][pos+1:]
-            custo_original_i, _ = calcular_custo_rota_completa(grafo, rotas_melhoradas[i], grafo.deposito)
-            custo_sem_servico, _ = calcular_custo_rota_completa(grafo, rota_sem_servico, grafo.deposito)
+            # Economia de remover o serviço da rota atual
+            economia_remocao = -prefixos[i].delta_remocao(pos)
             
             melhor_economia = 0
             melhor_j = -1
@@ -101,28 +132,22 @@ def busca_local_hibrida(grafo, rotas_servicos):
             
             # Testa inserir em outras rotas
             for j in range(len(rotas_melhoradas)):
-                if i == j:
+                if i == j or prefixos[j].demanda_total + demanda_servico > grafo.capacidade:
                     continue
                 
                 for pos_j in range(len(rotas_melhoradas[j]) + 1):
-                    nova_rota_j = (rotas_melhoradas[j][:pos_j] + 
-                                 [servico] + 
-                                 rotas_melhoradas[j][pos_j:])
-                    
-                    custo_original_j, _ = calcular_custo_rota_completa(grafo, rotas_melhoradas[j], grafo.deposito)
-                    novo_custo_j, nova_demanda_j = calcular_custo_rota_completa(grafo, nova_rota_j, grafo.deposito)
-                    
-                    if nova_demanda_j <= grafo.capacidade:
-                        economia = (custo_original_i + custo_original_j) - (custo_sem_servico + novo_custo_j)
-                        if economia > melhor_economia:
-                            melhor_economia = economia
-                            melhor_j = j
-                            melhor_pos_j = pos_j
+                    economia = economia_remocao - prefixos[j].delta_insercao(pos_j, u, v, custo_servico)
+                    if economia > melhor_economia:
+                        melhor_economia = economia
+                        melhor_j = j
+                        melhor_pos_j = pos_j
             
             # Aplica a melhor relocação encontrada
             if melhor_economia > 0.1:
-                rotas_melhoradas[i] = rota_sem_servico
+                rotas_melhoradas[i] = rotas_melhoradas[i][:pos] + rotas_melhoradas[i][pos+1:]
                 rotas_melhoradas[melhor_j].insert(melhor_pos_j, servico)
+                prefixos[i] = PrefixosRota(grafo, rotas_melhoradas[i])
+                prefixos[melhor_j] = PrefixosRota(grafo, rotas_melhoradas[melhor_j])
                 melhoria_global = True
                 break
     
@@ -132,6 +157,7 @@ def gerar_solucao_inteligente(grafo, todos_servicos):
     """Gera uma solução usando heurística do vizinho mais próximo."""
     servicos_restantes = set(todos_servicos)
     rotas = []
+    tabela = grafo.servicos
     
     while servicos_restantes:
         rota_atual = []
@@ -143,19 +169,18 @@ def gerar_solucao_inteligente(grafo, todos_servicos):
             menor_custo = float("inf")
             
             for servico_id in servicos_restantes:
-                detalhes = grafo.get_service_details(servico_id)
-                if not detalhes:
+                if not tabela.contem(servico_id):
                     continue
                 
-                u, v = detalhes["endpoints"]
-                demanda = detalhes["demanda"]
-                custo_servico = detalhes["custo_servico"]
+                u = tabela.origem[servico_id]
+                demanda = tabela.demanda[servico_id]
+                custo_servico = tabela.custo_servico[servico_id]
                 
                 if demanda_atual + demanda > grafo.capacidade:
                     continue
                 
                 # Custo de ir até o serviço
-                custo_travessia, _ = grafo.get_shortest_path(posicao_atual, u)
+                custo_travessia = grafo.get_custo_caminho(posicao_atual, u)
                 custo_total = custo_travessia + custo_servico
                 
                 if custo_total < menor_custo:
@@ -166,10 +191,9 @@ def gerar_solucao_inteligente(grafo, todos_servicos):
                 break
             
             # Adiciona o melhor serviço à rota
-            detalhes = grafo.get_service_details(melhor_servico)
             rota_atual.append(melhor_servico)
-            demanda_atual += detalhes["demanda"]
-            posicao_atual = detalhes["endpoints"][1]
+            demanda_atual += tabela.demanda[melhor_servico]
+            posicao_atual = tabela.destino[melhor_servico]
             servicos_restantes.remove(melhor_servico)
         
         if rota_atual:
@@ -230,6 +254,22 @@ def crossover_avancado(grafo, pai1, pai2):
     
     return rotas_filho
 
+def crossover_tour_gigante(grafo, pai1, pai2):
+    """Crossover OX sobre os tours gigantes dos pais; o filho é recortado pelo Split."""
+    tour1 = tour_gigante_de_rotas(pai1)
+    tour2 = tour_gigante_de_rotas(pai2)
+    n = len(tour1)
+    if n < 2 or sorted(tour1) != sorted(tour2):
+        return pai1
+
+    # O trecho i..j vem do pai 1; as demais posições, a partir de j+1, seguem a ordem do pai 2
+    i, j = sorted(random.sample(range(n), 2))
+    meio = tour1[i:j + 1]
+    usados = set(meio)
+    resto = [servico for servico in tour2[j + 1:] + tour2[:j + 1] if servico not in usados]
+    filho = resto[n - 1 - j:] + meio + resto[:n - 1 - j]
+    return split(grafo, filho)[0]
+
 def mutar_avancado(grafo, solucao, taxa_mutacao=0.3):
     """Mutação mais agressiva com múltiplas estratégias."""
     if random.random() > taxa_mutacao:
@@ -253,7 +293,8 @@ def mutar_avancado(grafo, solucao, taxa_mutacao=0.3):
                 if solucao_mutada[rota_idx] and len(solucao_mutada[rota_idx]) > 2:
                     nova_rota = gerar_solucao_inteligente(grafo, solucao_mutada[rota_idx])
                     if nova_rota:
-                        solucao_mutada[rota_idx] = nova_rota[0]
+                        # A rota pode ter excedido a capacidade (swap_servicos) e voltar em mais de uma
+                        solucao_mutada[rota_idx:rota_idx + 1] = nova_rota
         
         elif tipo_mutacao == 'dividir_rota':
             # Divide uma rota grande em duas
@@ -309,9 +350,14 @@ def mutar_avancado(grafo, solucao, taxa_mutacao=0.3):
     
     return solucao_mutada
 
-def algoritmo_genetico_avancado(grafo, solucao_inicial, populacao_size=40, geracoes=300):
-    """Algoritmo genético avançado com busca local híbrida."""
+def algoritmo_genetico_avancado(grafo, solucao_inicial, populacao_size=40, geracoes=300, limite_tempo=None):
+    """Algoritmo genético avançado com busca local híbrida.
+
+    Se limite_tempo (segundos) for informado, nenhuma nova geração é iniciada
+    depois que ele se esgota; a melhor solução encontrada até então é retornada.
+    """
     start_time = time.time()
+    tabela = grafo.servicos
     
     todos_servicos = []
     for rota in solucao_inicial:
@@ -325,35 +371,16 @@ def algoritmo_genetico_avancado(grafo, solucao_inicial, populacao_size=40, gerac
         solucao_inteligente = gerar_solucao_inteligente(grafo, todos_servicos)
         populacao.append(solucao_inteligente)
     
-    # Adiciona soluções aleatórias
+    # Tour gigante do vizinho mais próximo e o da solução inicial, recortados pelo Split
+    if sorted(todos_servicos) == sorted(tabela):
+        populacao.append(split(grafo, tour_gigante_vizinho_mais_proximo(grafo))[0])
+    populacao.append(split(grafo, tour_gigante_de_rotas(solucao_inicial))[0])
+
+    # Adiciona soluções aleatórias: tours gigantes embaralhados, recortados pelo Split
     for _ in range(populacao_size - len(populacao)):
-        servicos_embaralhados = todos_servicos[:]
+        servicos_embaralhados = [servico_id for servico_id in todos_servicos if tabela.contem(servico_id)]
         random.shuffle(servicos_embaralhados)
-        
-        rotas = []
-        rota_atual = []
-        demanda_atual = 0
-        
-        for servico_id in servicos_embaralhados:
-            detalhes = grafo.get_service_details(servico_id)
-            if not detalhes:
-                continue
-                
-            demanda_servico = detalhes["demanda"]
-            
-            if demanda_atual + demanda_servico <= grafo.capacidade:
-                rota_atual.append(servico_id)
-                demanda_atual += demanda_servico
-            else:
-                if rota_atual:
-                    rotas.append(rota_atual)
-                rota_atual = [servico_id]
-                demanda_atual = demanda_servico
-        
-        if rota_atual:
-            rotas.append(rota_atual)
-        
-        populacao.append(rotas)
+        populacao.append(split(grafo, servicos_embaralhados)[0])
     
     melhor_solucao = solucao_inicial
     melhor_custo = avaliar_solucao(grafo, solucao_inicial)
@@ -362,6 +389,10 @@ def algoritmo_genetico_avancado(grafo, solucao_inicial, populacao_size=40, gerac
     print(f"Custo inicial: {melhor_custo}")
     
     for geracao in range(geracoes):
+        if limite_tempo is not None and time.time() - start_time >= limite_tempo:
+            print(f"Limite de tempo atingido na geração {geracao}.")
+            break
+
         # Aplica busca local híbrida nas melhores soluções
         if geracao % 10 == 0:
             custos = [avaliar_solucao(grafo, sol) for sol in populacao]
@@ -406,8 +437,11 @@ def algoritmo_genetico_avancado(grafo, solucao_inicial, populacao_size=40, gerac
             pai2_idx = min(random.sample(range(len(populacao)), torneio_size), 
                           key=lambda i: custos[i])
             
-            # Crossover avançado
-            filho = crossover_avancado(grafo, populacao[pai1_idx], populacao[pai2_idx])
+            # Crossover avançado (por rotas) ou OX nos tours gigantes
+            if random.random() < PROBABILIDADE_CROSSOVER_TOUR:
+                filho = crossover_tour_gigante(grafo, populacao[pai1_idx], populacao[pai2_idx])
+            else:
+                filho = crossover_avancado(grafo, populacao[pai1_idx], populacao[pai2_idx])
             
             # Mutação mais agressiva
             filho = mutar_avancado(grafo, filho, taxa_mutacao=0.4)
@@ -421,20 +455,67 @@ def algoritmo_genetico_avancado(grafo, solucao_inicial, populacao_size=40, gerac
     
     return melhor_solucao, melhor_custo, tempo_execucao
 
-def converter_para_objetos_rota(grafo, rotas_servicos):
-    """Converte lista de rotas de serviços para objetos Rota."""
+def orientar_servicos(grafo, rota_servicos):
+    """Escolhe o sentido de atendimento das arestas de uma rota, de forma ótima para a sequência.
+
+    Os cromossomos (listas de service_ids) atendem cada serviço de origem para destino,
+    mas uma aresta (tipo 'E') pode ser percorrida nos dois sentidos, como faz o 2-opt da
+    busca local (Rota.inverter_trecho). Programação dinâmica com dois estados por
+    serviço (sentido da tabela ou invertido), O(k) consultas à matriz de distâncias.
+
+    Returns:
+        tuple: (origens, destinos) de cada serviço, na ordem da rota.
+    """
+    tabela = grafo.servicos
+    distancia = grafo.get_custo_caminho
+    aresta = ord("E")
+    # estados[p]: [(deslocamentos até o p-ésimo serviço, nó de entrada, nó de saída, estado anterior)]
+    estados = [[(0, None, grafo.deposito, None)]]
+    for service_id in rota_servicos:
+        u, v = tabela.origem[service_id], tabela.destino[service_id]
+        sentidos = [(u, v), (v, u)] if tabela.tipo[service_id] == aresta and u != v else [(u, v)]
+        anteriores = estados[-1]
+        atuais = []
+        for entrada, saida in sentidos:
+            custo, anterior = min((custo + distancia(no, entrada), k) for k, (custo, _, no, _) in enumerate(anteriores))
+            atuais.append((custo, entrada, saida, anterior))
+        estados.append(atuais)
+
+    _, k = min((custo + distancia(no, grafo.deposito), k) for k, (custo, _, no, _) in enumerate(estados[-1]))
+    origens, destinos = [], []
+    for posicao in range(len(rota_servicos), 0, -1):
+        _, entrada, saida, k = estados[posicao][k]
+        origens.append(entrada)
+        destinos.append(saida)
+    origens.reverse()
+    destinos.reverse()
+    return origens, destinos
+
+def converter_para_objetos_rota(grafo, rotas_servicos, orientar=False):
+    """Converte lista de rotas de serviços para objetos Rota.
+
+    Com orientar=True, o sentido de cada aresta é escolhido por orientar_servicos;
+    senão, cada serviço é atendido de origem para destino, como no cromossomo.
+    """
     rotas_objetos = []
+    tabela = grafo.servicos
     
     for idx, rota_servicos in enumerate(rotas_servicos):
         if not rota_servicos:
             continue
             
         rota_obj = Rota(idx + 1, grafo.deposito)
+        if orientar:
+            origens, destinos = orientar_servicos(grafo, rota_servicos)
+        else:
+            origens, destinos = tabela.origem, tabela.destino
         
         current_node = grafo.deposito
-        for service_id in rota_servicos:
-            detalhes = grafo.get_service_details(service_id)
-            u_servico, v_servico = detalhes["endpoints"]
+        for posicao, service_id in enumerate(rota_servicos):
+            if orientar:
+                u_servico, v_servico = origens[posicao], destinos[posicao]
+            else:
+                u_servico, v_servico = origens[service_id], destinos[service_id]
             
             if current_node != u_servico:
                 custo_travessia_ate_servico, caminho_ate_servico = grafo.get_shortest_path(current_node, u_servico)
@@ -442,8 +523,8 @@ def converter_para_objetos_rota(grafo, rotas_servicos):
                 custo_travessia_ate_servico = 0
                 caminho_ate_servico = [current_node]
             
-            demanda_servico = detalhes["demanda"]
-            custo_servico = detalhes["custo_servico"]
+            demanda_servico = tabela.demanda[service_id]
+            custo_servico = tabela.custo_servico[service_id]
             rota_obj.adicionar_visita_servico(
                 service_id, u_servico, v_servico, demanda_servico, 
                 custo_servico, custo_travessia_ate_servico, caminho_ate_servico
@@ -458,25 +539,31 @@ def converter_para_objetos_rota(grafo, rotas_servicos):
     
     return rotas_objetos
 
-def otimizar_com_algoritmo_genetico_avancado(grafo, rotas_iniciais):
-    """Função principal que aplica algoritmo genético avançado."""
+def otimizar_com_algoritmo_genetico_avancado(grafo, rotas_iniciais, limite_tempo=None):
+    """Função principal que aplica algoritmo genético avançado (limite_tempo em segundos, opcional)."""
     # Converte rotas iniciais para formato de lista de serviços
     rotas_servicos = []
     for r in rotas_iniciais:
-        servicos_na_rota = []
-        for item in r.sequencia_visitas_detalhada:
-            if item[0] == 'S':
-                servicos_na_rota.append(item[1])
+        servicos_na_rota = list(r.servicos)
         if servicos_na_rota:
             rotas_servicos.append(servicos_na_rota)
     
     # Aplica algoritmo genético avançado
     melhor_solucao, melhor_custo, tempo_execucao = algoritmo_genetico_avancado(
-        grafo, rotas_servicos, populacao_size=50, geracoes=500
+        grafo, rotas_servicos, populacao_size=50, geracoes=500, limite_tempo=limite_tempo
     )
     
-    # Converte de volta para objetos Rota
-    rotas_melhoradas = converter_para_objetos_rota(grafo, melhor_solucao)
+    # Converte de volta para objetos Rota, devolvendo às arestas o melhor sentido de
+    # atendimento (o AG avalia cada serviço só de origem para destino)
+    rotas_melhoradas = converter_para_objetos_rota(grafo, melhor_solucao, orientar=True)
+    melhor_custo = sum(rota.custo_acumulado for rota in rotas_melhoradas)
+
+    # As rotas recebidas podem já ter arestas invertidas pela busca local: se o AG não
+    # as superar, elas são devolvidas (cópias) em vez de uma solução pior
+    custo_inicial = sum(rota.custo_acumulado for rota in rotas_iniciais)
+    if melhor_custo >= custo_inicial:
+        print(f"Algoritmo genético não melhorou a solução recebida ({melhor_custo} >= {custo_inicial}); mantendo-a.")
+        return [rota.copiar() for rota in rotas_iniciais], custo_inicial, tempo_execucao
     
     return rotas_melhoradas, melhor_custo, tempo_execucao
 
@@ -0,0 +1,148 @@
+import os
+import struct
+
+from gerar_arquivo_solucao import TAMANHO_BUFFER, formatar_solucao
+
+# Arquivo com várias soluções (registros) e um índice para acesso aleatório:
+#   <caminho>      registros concatenados; cada um é o texto UTF-8 de um sol-*.dat
+#   <caminho>.idx  MAGICO seguido de uma entrada por registro: deslocamento e tamanho
+#                  em bytes (uint64) e custo total (float64), na ordem de gravação
+# Novos registros são sempre acrescentados ao final dos dois arquivos. As entradas do
+# índice ficam em memória e só são gravadas depois dos dados para os quais apontam,
+# de modo que, após uma interrupção, o índice nunca aponta além do fim dos dados.
+MAGICO = b"GLMS0001"
+ENTRADA_INDICE = struct.Struct("=QQd")
+SUFIXO_INDICE = ".idx"
+
+
+class EscritorArquivoSolucoes:
+    """Acrescenta soluções a um arquivo de múltiplos registros, mantendo o índice.
+
+    Uso:
+        with EscritorArquivoSolucoes("candidatas.sols") as arquivo:
+            arquivo.adicionar(rotas_compactas, custo, total_servicos)
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        caminho_indice = caminho + SUFIXO_INDICE
+        novo = not os.path.exists(caminho_indice)
+        self._dados = open(caminho, "ab", buffering=TAMANHO_BUFFER)
+        self._indice = open(caminho_indice, "ab", buffering=0)
+        self._indice_pendente = bytearray() # Entradas cujos dados ainda podem estar só no buffer
+        if novo:
+            self._indice.write(MAGICO)
+        elif self._indice.tell() < len(MAGICO):
+            self.fechar()
+            raise ValueError(f"Índice corrompido: {caminho_indice}")
+        self._registros = (self._indice.tell() - len(MAGICO)) // ENTRADA_INDICE.size
+        self._posicao = self._dados.tell()
+
+    def adicionar(self, rotas_compactas, custo_total, total_servicos):
+        """Acrescenta uma solução (lista de RotaCompacta) e retorna o número do registro."""
+        return self.adicionar_texto(formatar_solucao(rotas_compactas, custo_total, total_servicos), custo_total)
+
+    def adicionar_texto(self, texto, custo_total):
+        """Acrescenta uma solução já formatada (conteúdo de um sol-*.dat)."""
+        dados = texto.encode("utf-8")
+        self._dados.write(dados)
+        self._indice_pendente += ENTRADA_INDICE.pack(self._posicao, len(dados), float(custo_total))
+        self._posicao += len(dados)
+        self._registros += 1
+        if len(self._indice_pendente) >= TAMANHO_BUFFER:
+            self._gravar_indice()
+        return self._registros - 1
+
+    def _gravar_indice(self):
+        # Os dados vão para o disco antes das entradas do índice que apontam para eles
+        self._dados.flush()
+        self._indice.write(self._indice_pendente)
+        self._indice_pendente.clear()
+
+    def fechar(self):
+        if not self._indice.closed:
+            self._gravar_indice()
+        self._dados.close()
+        self._indice.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+class LeitorArquivoSolucoes:
+    """Acesso aleatório aos registros de um arquivo gravado por EscritorArquivoSolucoes."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho + SUFIXO_INDICE, "rb") as f:
+            indice = f.read()
+        if indice[:len(MAGICO)] != MAGICO:
+            raise ValueError(f"Arquivo não é um índice de soluções: {caminho + SUFIXO_INDICE}")
+        # Uma entrada incompleta no final (gravação interrompida) é descartada, assim
+        # como entradas que apontem além do fim do arquivo de dados
+        corpo = indice[len(MAGICO):]
+        corpo = corpo[:len(corpo) - len(corpo) % ENTRADA_INDICE.size]
+        self._dados = open(caminho, "rb")
+        tamanho_dados = os.fstat(self._dados.fileno()).st_size
+        self.entradas = [entrada for entrada in ENTRADA_INDICE.iter_unpack(corpo)
+                         if entrada[0] + entrada[1] <= tamanho_dados]
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def custos(self):
+        """Custos de todos os registros, lidos apenas do índice."""
+        return [custo for _, _, custo in self.entradas]
+
+    def __getitem__(self, i):
+        """Retorna o texto do registro i (o mesmo conteúdo de um arquivo sol-*.dat)."""
+        posicao, tamanho, _ = self.entradas[i]
+        self._dados.seek(posicao)
+        dados = self._dados.read(tamanho)
+        if len(dados) != tamanho:
+            raise ValueError(f"Registro {i} truncado em {self.caminho}")
+        return dados.decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self.entradas)):
+            yield self[i]
+
+    def fechar(self):
+        self._dados.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+# Exemplo de uso: grava as rotas da Etapa 2 de uma instância várias vezes e relê um registro
+if __name__ == '__main__':
+    import sys
+    import time
+    from parser import ler_arquivo_dat
+    from heuristica_path_scanning import construir_solucao_path_scanning
+    from gerar_arquivo_solucao import compactar_rotas
+
+    caminho_instancia = sys.argv[1] if len(sys.argv) > 1 else "selected_instances/BHW1.dat"
+    grafo = ler_arquivo_dat(caminho_instancia, verbose=False)
+    grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
+    rotas, custo, _ = construir_solucao_path_scanning(grafo)
+    compactas = compactar_rotas(rotas)
+    total_servicos = len(grafo.service_map)
+
+    caminho_arquivo = "exemplo_solucoes.sols"
+    inicio = time.perf_counter()
+    with EscritorArquivoSolucoes(caminho_arquivo) as arquivo:
+        for _ in range(10000):
+            arquivo.adicionar(compactas, custo, total_servicos)
+    print(f"10000 soluções gravadas em {time.perf_counter() - inicio:.2f} s")
+    with LeitorArquivoSolucoes(caminho_arquivo) as leitor:
+        print(f"{len(leitor)} registros; último:\n{leitor[len(leitor) - 1]}")
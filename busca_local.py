@@ -1,147 +1,105 @@
+# Busca local sobre objetos Rota. Cada movimento é avaliado em O(1) com os vetores de
+# prefixo da rota (Rota.prefixos, ver prefixos_rota.py) e aplicado pelos métodos da
+# própria Rota, que atualizam demanda e custo pelo delta, sem recalcular a rota.
 
-def calcula_custo_rota(sequencia, grafo):
-    custo = 0
-    deposito_id = grafo.deposito  # Pega o depósito real
-    for i in range(len(sequencia) - 1):
-        atual = sequencia[i]
-        prox = sequencia[i + 1]
+def pode_inserir(rota, service_id, capacidade_maxima, grafo):
+    """Verifica se o serviço cabe na capacidade restante da rota."""
+    return rota.verificar_capacidade(grafo.servicos.demanda[service_id], capacidade_maxima)
 
-        def tradutor(no):
-            # Converte 0 para deposito_id real!
-            if no == 0:
-                return deposito_id
-            return no
 
-        # Se ambos são visitas de serviço ou depósito, pega custo do grafo
-        if atual[0] in ['D', 'S'] and prox[0] in ['D', 'S']:
-            if atual[0] == 'D':
-                no1 = tradutor(atual[1])
-            else:
-                no1 = atual[2]
-            if prox[0] == 'D':
-                no2 = tradutor(prox[1])
-            else:
-                no2 = prox[2]
-            custo += grafo.dist_matrix[no1][no2]
-        elif atual[0] == 'S' and prox[0] == 'T':
-            no1 = atual[3]
-            no2 = tradutor(prox[1])
-            custo += grafo.dist_matrix[no1][no2]
-        elif atual[0] == 'T' and prox[0] == 'T':
-            custo += grafo.dist_matrix[atual[1]][tradutor(prox[1])]
-        elif atual[0] == 'T' and prox[0] == 'S':
-            custo += grafo.dist_matrix[atual[1]][prox[2]]
-        elif atual[0] == 'T' and prox[0] == 'D':
-            custo += grafo.dist_matrix[atual[1]][tradutor(prox[1])]
-    return custo
+def two_opt(rota, grafo):
+    """Inverte trechos da rota enquanto alguma inversão reduzir seu custo.
 
-
-def two_opt(sequencia, grafo):
+    Uma aresta requerida dentro do trecho invertido passa a ser atendida no sentido
+    contrário; com i == j, só a orientação do serviço muda.
+    """
     print("[LOG] Entrou no two_opt")
-    melhor = sequencia[:]
-    melhor_custo = calcula_custo_rota(melhor, grafo)
     melhorou = True
     while melhorou:
         melhorou = False
-        for i in range(1, len(melhor) - 2):
-            for j in range(i + 1, len(melhor)):
-                if j - i == 1: continue
-                nova = melhor[:]
-                nova[i:j] = melhor[j-1:i-1:-1]
-                novo_custo = calcula_custo_rota(nova, grafo)
-                if novo_custo < melhor_custo:
-                    print(f"[LOG] 2-opt melhorou: custo {melhor_custo} -> {novo_custo}")
-                    melhor = nova
-                    melhor_custo = novo_custo
+        k = len(rota.servicos)
+        for i in range(k):
+            prefixos = rota.prefixos(grafo)
+            for j in range(i, k):
+                if prefixos.delta_inversao(i, j) < 0:
+                    custo_antigo = rota.custo_acumulado
+                    rota.inverter_trecho(i, j, grafo)
+                    print(f"[LOG] 2-opt melhorou: custo {custo_antigo} -> {rota.custo_acumulado}")
+                    prefixos = rota.prefixos(grafo)
                     melhorou = True
     print("[LOG] Saiu do two_opt")
-    return melhor
+    return rota
 
-def pode_inserir(rota, tarefa, capacidade_maxima, grafo):
-    # tarefa deve ser uma tupla ('S', id_serviço, u, v)
-    service_id = tarefa[1]
-    demanda_tarefa = grafo.service_map[service_id]["demanda"]
-    return rota.demanda_acumulada + demanda_tarefa <= capacidade_maxima
 
 def relocate(rotas, grafo, capacidade_maxima):
+    """Move cada serviço para a melhor posição de outra rota enquanto isso reduzir o custo total.
+
+    Returns:
+        list: As rotas, sem as que ficaram vazias (renumeradas a partir de 1).
+    """
     print("[LOG] Entrou no relocate")
+    tabela = grafo.servicos
     melhorou = True
     while melhorou:
         melhorou = False
         for i, rota_a in enumerate(rotas):
-            for j, rota_b in enumerate(rotas):
-                if i == j:
-                    continue
-                for idx, tarefa in enumerate(rota_a.sequencia_visitas_detalhada[1:-1]):  # ignora início e fim
-                    if tarefa[0] != 'S':
+            pos = 0
+            while pos < len(rota_a.servicos):
+                service_id = rota_a.servicos[pos]
+                u, v, custo_servico = tabela.origem[service_id], tabela.destino[service_id], tabela.custo_servico[service_id]
+                delta_remocao = rota_a.prefixos(grafo).delta_remocao(pos)
+                melhor_delta, melhor_j, melhor_pos = 0, None, None
+                for j, rota_b in enumerate(rotas):
+                    if i == j or not pode_inserir(rota_b, service_id, capacidade_maxima, grafo):
                         continue
-                    if pode_inserir(rota_b, tarefa, capacidade_maxima, grafo):
-                        nova_a = rota_a.sequencia_visitas_detalhada[:idx] + rota_a.sequencia_visitas_detalhada[idx+1:]
-                        nova_b = rota_b.sequencia_visitas_detalhada[:-1] + [tarefa] + [rota_b.sequencia_visitas_detalhada[-1]]
-                        custo_antigo = calcula_custo_rota(rota_a.sequencia_visitas_detalhada, grafo) + calcula_custo_rota(rota_b.sequencia_visitas_detalhada, grafo)
-                        custo_novo = calcula_custo_rota(nova_a, grafo) + calcula_custo_rota(nova_b, grafo)
-                        if custo_novo < custo_antigo:
-                            print(f"[LOG] Relocate: moveu serviço {tarefa[1]} da rota {i} para {j}")
-                            rota_a.sequencia_visitas_detalhada = nova_a
-                            rota_b.sequencia_visitas_detalhada = nova_b
-                            melhorou = True
-                            # Após cada alteração, atualizar custo e demanda acumulada
-                            if hasattr(rota_a, "atualizar_demanda_custo"):
-                                rota_a.atualizar_demanda_custo(grafo)
-                            if hasattr(rota_b, "atualizar_demanda_custo"):
-                                rota_b.atualizar_demanda_custo(grafo)
-                            break
-                if melhorou:
-                    break
-            if melhorou:
-                break
+                    prefixos_b = rota_b.prefixos(grafo)
+                    for pos_b in range(len(rota_b.servicos) + 1):
+                        delta = delta_remocao + prefixos_b.delta_insercao(pos_b, u, v, custo_servico)
+                        if delta < melhor_delta:
+                            melhor_delta, melhor_j, melhor_pos = delta, j, pos_b
+                if melhor_j is None:
+                    pos += 1
+                    continue
+                print(f"[LOG] Relocate: moveu serviço {service_id} da rota {i} para {melhor_j}")
+                rota_a.remover_servico(pos, grafo)
+                rotas[melhor_j].inserir_servico(melhor_pos, service_id, grafo)
+                melhorou = True
     print("[LOG] Saiu do relocate")
+    rotas = [rota for rota in rotas if rota.servicos]
+    for id_rota, rota in enumerate(rotas, 1):
+        rota.id_rota = id_rota
     return rotas
 
 
 def swap(rotas, grafo, capacidade_maxima):
+    """Troca serviços entre pares de rotas enquanto alguma troca reduzir o custo total."""
     print("[LOG] Entrou no swap")
+    tabela = grafo.servicos
+    demandas, origens, destinos, custos_servico = tabela.demanda, tabela.origem, tabela.destino, tabela.custo_servico
     melhorou = True
     while melhorou:
         melhorou = False
         for i, rota_a in enumerate(rotas):
-            for j, rota_b in enumerate(rotas):
-                if i == j:
-                    continue
-                for idx_a, tarefa_a in enumerate(rota_a.sequencia_visitas_detalhada[1:-1]):
-                    if tarefa_a[0] != 'S':
-                        continue
-                    for idx_b, tarefa_b in enumerate(rota_b.sequencia_visitas_detalhada[1:-1]):
-                        if tarefa_b[0] != 'S':
+            for j in range(i + 1, len(rotas)):
+                rota_b = rotas[j]
+                for pos_a in range(len(rota_a.servicos)):
+                    prefixos_a, prefixos_b = rota_a.prefixos(grafo), rota_b.prefixos(grafo)
+                    id_a = rota_a.servicos[pos_a]
+                    demanda_a = demandas[id_a]
+                    folga_a = capacidade_maxima - rota_a.demanda_acumulada + demanda_a
+                    folga_b = capacidade_maxima - rota_b.demanda_acumulada
+                    ua, va, custo_a = origens[id_a], destinos[id_a], custos_servico[id_a]
+                    for pos_b, id_b in enumerate(rota_b.servicos):
+                        demanda_b = demandas[id_b]
+                        if demanda_b > folga_a or demanda_a > folga_b + demanda_b:
                             continue
-                        # Calcule demandas envolvidas
-                        demanda_a = grafo.service_map[tarefa_a[1]]["demanda"]
-                        demanda_b = grafo.service_map[tarefa_b[1]]["demanda"]
-                        nova_demanda_a = rota_a.demanda_acumulada - demanda_a + demanda_b
-                        nova_demanda_b = rota_b.demanda_acumulada - demanda_b + demanda_a
-                        if nova_demanda_a <= capacidade_maxima and nova_demanda_b <= capacidade_maxima:
-                            # Testa troca
-                            nova_a = rota_a.sequencia_visitas_detalhada[:]
-                            nova_b = rota_b.sequencia_visitas_detalhada[:]
-                            nova_a[idx_a] = tarefa_b
-                            nova_b[idx_b] = tarefa_a
-                            custo_antigo = calcula_custo_rota(rota_a.sequencia_visitas_detalhada, grafo) + calcula_custo_rota(rota_b.sequencia_visitas_detalhada, grafo)
-                            custo_novo = calcula_custo_rota(nova_a, grafo) + calcula_custo_rota(nova_b, grafo)
-                            if custo_novo < custo_antigo:
-                                print(f"[LOG] SWAP: trocou {tarefa_a[1]} da rota {i} com {tarefa_b[1]} da rota {j}")
-                                rota_a.sequencia_visitas_detalhada = nova_a
-                                rota_b.sequencia_visitas_detalhada = nova_b
-                                if hasattr(rota_a, "atualizar_demanda_custo"):
-                                    rota_a.atualizar_demanda_custo(grafo)
-                                if hasattr(rota_b, "atualizar_demanda_custo"):
-                                    rota_b.atualizar_demanda_custo(grafo)
-                                melhorou = True
-                                break
-                    if melhorou:
-                        break
-                if melhorou:
-                    break
-            if melhorou:
-                break
+                        delta = (prefixos_a.delta_substituicao(pos_a, origens[id_b], destinos[id_b], custos_servico[id_b])
+                                 + prefixos_b.delta_substituicao(pos_b, ua, va, custo_a))
+                        if delta < 0:
+                            print(f"[LOG] SWAP: trocou {id_a} da rota {i} com {id_b} da rota {j}")
+                            rota_a.trocar_servico(pos_a, id_b, grafo)
+                            rota_b.trocar_servico(pos_b, id_a, grafo)
+                            melhorou = True
+                            break
     print("[LOG] Saiu do swap")
     return rotas
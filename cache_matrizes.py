@@ -0,0 +1,132 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+
+from matriz_densa import MatrizDensa, matrizes_de_dicionarios
+
+# Formato do arquivo (little/big-endian nativo, pois o cache é local à máquina):
+#   cabeçalho: MAGICO (4 bytes), versão (uint32), n (uint64), tipo das distâncias ('q' ou 'd') + 7 bytes de preenchimento
+#   IDs dos vértices: n * int64
+#   distâncias:       n * n * (int64 ou float64)
+#   predecessores:    n * n * int32 (índices; -1 = sem predecessor)
+MAGICO = b"GLMC"
+VERSAO = 1
+CABECALHO = struct.Struct("=4sIQc7x")
+EXTENSAO = ".mat"
+
+TAMANHO_MAXIMO_PADRAO = 2 * 1024 ** 3 # 2 GiB
+
+
+def hash_grafo(grafo):
+    """Calcula uma assinatura SHA-256 das conexões do grafo e da ordem dos seus vértices.
+
+    As matrizes de caminhos mínimos dependem apenas disso: as conexões definem as
+    distâncias e a ordem dos vértices (a da adjacência CSR) define o índice de cada
+    linha e coluna, que a atualização incremental das matrizes usa diretamente.
+    Qualquer mudança em um dos dois altera o hash (invalidando o cache).
+    """
+    h = hashlib.sha256()
+    h.update(repr(list(grafo.congelar_adjacencia().nos)).encode())
+    conexoes = sorted((u, v, custo) for u, vizinhos in grafo.adj.items() for v, custo in vizinhos)
+    h.update(repr(conexoes).encode())
+    return h.hexdigest()
+
+
+def caminho_no_cache(pasta_cache, chave):
+    """Retorna o caminho do arquivo de cache correspondente à chave."""
+    return os.path.join(pasta_cache, chave + EXTENSAO)
+
+
+def carregar_matrizes(caminho):
+    """Carrega (via mmap) as matrizes de um arquivo de cache.
+
+    Returns:
+        tuple: (dist_matrix, pred_matrix) como MatrizDensa apoiadas no mmap,
+               ou None se o arquivo não existir ou estiver em formato inválido.
+    """
+    try:
+        with open(caminho, "rb") as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+
+    if len(mapa) < CABECALHO.size:
+        mapa.close()
+        return None
+    magico, versao, n, tipo = CABECALHO.unpack_from(mapa, 0)
+    tipo = tipo.decode()
+    tamanho_esperado = CABECALHO.size + 8 * n + 8 * n * n + 4 * n * n
+    if magico != MAGICO or versao != VERSAO or tipo not in ("q", "d") or len(mapa) != tamanho_esperado:
+        mapa.close()
+        return None
+
+    visao = memoryview(mapa)
+    inicio = CABECALHO.size
+    nos = visao[inicio:inicio + 8 * n].cast("q").tolist()
+    inicio += 8 * n
+    dados_dist = visao[inicio:inicio + 8 * n * n].cast(tipo)
+    inicio += 8 * n * n
+    dados_pred = visao[inicio:inicio + 4 * n * n].cast("i")
+
+    # Atualiza a data de modificação para a política de remoção (menos usados recentemente)
+    os.utime(caminho)
+    return MatrizDensa(nos, dados_dist), MatrizDensa(nos, dados_pred, predecessores=True)
+
+
+def salvar_matrizes(caminho, dist_matrix, pred_matrix):
+    """Grava as matrizes no formato binário do cache.
+
+    Aceita tanto MatrizDensa quanto dicionários de dicionários. A escrita é feita em
+    um arquivo temporário e renomeada ao final, para nunca deixar um cache parcial.
+    """
+    if not isinstance(dist_matrix, MatrizDensa) or not isinstance(pred_matrix, MatrizDensa):
+        dist_matrix, pred_matrix = matrizes_de_dicionarios(dist_matrix, pred_matrix)
+
+    dados_dist = dist_matrix.dados
+    tipo = dados_dist.format if isinstance(dados_dist, memoryview) else dados_dist.typecode
+
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    caminho_tmp = f"{caminho}.{os.getpid()}.tmp"
+    with open(caminho_tmp, "wb") as f:
+        f.write(CABECALHO.pack(MAGICO, VERSAO, dist_matrix.n, tipo.encode()))
+        f.write(array("q", dist_matrix.nos).tobytes())
+        f.write(bytes(dados_dist))
+        f.write(bytes(pred_matrix.dados))
+    os.replace(caminho_tmp, caminho)
+
+
+def limitar_tamanho_cache(pasta_cache, tamanho_maximo=TAMANHO_MAXIMO_PADRAO, preservar=None):
+    """Remove os arquivos usados há mais tempo até que a pasta caiba em tamanho_maximo bytes.
+
+    Args:
+        pasta_cache (str): Pasta do cache.
+        tamanho_maximo (int): Limite total em bytes.
+        preservar (str): Caminho que nunca deve ser removido (ex.: o arquivo recém-gravado).
+    """
+    try:
+        nomes = [nome for nome in os.listdir(pasta_cache) if nome.endswith(EXTENSAO)]
+    except FileNotFoundError:
+        return
+
+    arquivos = []
+    for nome in nomes:
+        caminho = os.path.join(pasta_cache, nome)
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        arquivos.append((info.st_mtime, info.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= tamanho_maximo:
+            break
+        if preservar and os.path.abspath(caminho) == os.path.abspath(preservar):
+            continue
+        try:
+            os.remove(caminho)
+            total -= tamanho
+        except FileNotFoundError:
+            pass
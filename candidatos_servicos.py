@@ -0,0 +1,80 @@
+from matriz_densa import INF, MatrizDensa
+
+
+class IndiceCandidatos:
+    """Serviços ordenados pela distância de cada vértice até o início do serviço.
+
+    candidatos(no) retorna os service_ids alcançáveis a partir de `no`, do mais
+    próximo ao mais distante (empates pelo menor service_id), e distancias(no) os
+    custos correspondentes. Cada lista é montada na primeira consulta ao vértice e
+    reaproveitada depois, inclusive entre construções repetidas sobre o mesmo grafo.
+    As listas contêm todos os serviços: quem consome mantém o próprio controle dos
+    já atendidos e simplesmente os pula.
+    """
+
+    def __init__(self, grafo):
+        self.grafo = grafo
+        self._listas = {} # {no: (service_ids, distancias)}
+        self._servicos = list(grafo.servicos) # Em ordem crescente de service_id
+        self._indices_origem = None
+        self._ate_deposito = None
+
+    def _linha(self, no):
+        """Distâncias de no até o início de cada serviço de self._servicos (INF se não houver caminho)."""
+        dist = self.grafo.dist_matrix
+        if isinstance(dist, MatrizDensa) and no in dist.indice:
+            # Leitura direta da linha do vetor plano, sem passar por get_custo_caminho
+            if self._indices_origem is None:
+                origem = self.grafo.servicos.origem
+                self._indices_origem = [dist.indice[origem[sid]] for sid in self._servicos]
+            inicio = dist.indice[no] * dist.n
+            linha = dist.dados[inicio:inicio + dist.n]
+            custos = list(map(linha.__getitem__, self._indices_origem))
+            if custos and min(custos) < 0: # SEM_CAMINHO
+                custos = [custo if custo >= 0 else INF for custo in custos]
+            return custos
+        distancia = self.grafo.get_custo_caminho
+        origem = self.grafo.servicos.origem
+        return [distancia(no, origem[sid]) for sid in self._servicos]
+
+    def _lista(self, no):
+        lista = self._listas.get(no)
+        if lista is None:
+            custos = self._linha(no)
+            # Ordenação estável das posições: empates ficam na ordem crescente de service_id
+            ordem = sorted(range(len(custos)), key=custos.__getitem__)
+            alcancaveis = len(ordem)
+            while alcancaveis and custos[ordem[alcancaveis - 1]] == INF: # Os inalcançáveis ficam no fim
+                alcancaveis -= 1
+            del ordem[alcancaveis:]
+            servicos = self._servicos
+            lista = self._listas[no] = ([servicos[p] for p in ordem], [custos[p] for p in ordem])
+        return lista
+
+    def candidatos(self, no):
+        """service_ids alcançáveis a partir de no, em ordem crescente de distância."""
+        return self._lista(no)[0]
+
+    def distancias(self, no):
+        """Distâncias de no até o início de cada serviço de candidatos(no), na mesma ordem."""
+        return self._lista(no)[1]
+
+    def distancias_deposito(self):
+        """Lista indexada por service_id com a distância do fim do serviço até o depósito."""
+        if self._ate_deposito is None:
+            deposito = self.grafo.deposito
+            destino = self.grafo.servicos.destino
+            ate_deposito = [INF] * len(self.grafo.servicos.tipo)
+            acesso = self.grafo.distancias_por_indice()
+            if acesso is not None:
+                # Grafo normalizado: todo serviço volta ao depósito, a coluna é lida direto
+                dados, n, indice = acesso
+                coluna = indice[deposito]
+                for service_id in self._servicos:
+                    ate_deposito[service_id] = dados[indice[destino[service_id]] * n + coluna]
+            else:
+                distancia = self.grafo.get_custo_caminho
+                for service_id in self._servicos:
+                    ate_deposito[service_id] = distancia(destino[service_id], deposito)
+            self._ate_deposito = ate_deposito
+        return self._ate_deposito
@@ -0,0 +1,95 @@
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from parser import ler_instancia
+
+# Resultado da carga de um arquivo. grafo é None quando houve erro (ver erro);
+# avisos reúne as mensagens de linhas mal formatadas/seções ausentes do parser.
+ResultadoCarga = namedtuple("ResultadoCarga", ["nome", "grafo", "caminho", "tempo", "erro", "avisos"])
+
+
+def listar_arquivos_instancias(pastas):
+    """Lista os caminhos dos arquivos .dat das pastas existentes, em ordem alfabética por pasta."""
+    caminhos = []
+    for pasta in pastas:
+        if not os.path.isdir(pasta):
+            continue
+        caminhos.extend(os.path.join(pasta, nome) for nome in sorted(os.listdir(pasta)) if nome.endswith(".dat"))
+    return caminhos
+
+
+def carregar_instancias(pastas, num_workers=None, max_pendentes=None):
+    """Carrega todas as instâncias .dat das pastas, entregando-as à medida que ficam prontas.
+
+    Os arquivos são lidos em um pool de processos. No máximo max_pendentes leituras
+    ficam em andamento (ou com o resultado aguardando consumo) ao mesmo tempo, de modo
+    que a memória não cresce com o número de arquivos: o próximo arquivo só é enviado
+    quando um resultado é entregue. Erros de leitura não interrompem o lote.
+
+    Args:
+        pastas (list): Pastas a percorrer (as inexistentes são ignoradas).
+        num_workers (int): Processos do pool (None = todos os núcleos). Com 1, a
+            leitura é feita no próprio processo, sem o custo de serializar os grafos.
+        max_pendentes (int): Limite de leituras simultâneas (padrão: 2 * num_workers).
+
+    Yields:
+        ResultadoCarga: (nome, grafo, caminho, tempo, erro, avisos), na ordem de conclusão.
+    """
+    caminhos = listar_arquivos_instancias(pastas)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+
+    if num_workers <= 1:
+        for caminho in caminhos:
+            yield _carregar_arquivo(caminho)
+        return
+
+    max_pendentes = max(1, max_pendentes or 2 * num_workers)
+    pendentes_por_enviar = iter(caminhos)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        em_andamento = set()
+        for caminho in pendentes_por_enviar:
+            em_andamento.add(executor.submit(_carregar_arquivo, caminho))
+            if len(em_andamento) >= max_pendentes:
+                break
+        while em_andamento:
+            concluidos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                yield futuro.result()
+                proximo = next(pendentes_por_enviar, None)
+                if proximo is not None:
+                    em_andamento.add(executor.submit(_carregar_arquivo, proximo))
+
+
+def _carregar_arquivo(caminho):
+    """Lê um arquivo (roda em um processo do pool), medindo o tempo e capturando erros."""
+    avisos = []
+    inicio = time.perf_counter()
+    try:
+        grafo = ler_instancia(caminho, info=_sem_mensagem, aviso=avisos.append)
+        erro = None
+    except Exception as e:
+        grafo = None
+        erro = f"{type(e).__name__}: {e}"
+    tempo = time.perf_counter() - inicio
+    return ResultadoCarga(os.path.basename(caminho), grafo, caminho, tempo, erro, avisos)
+
+
+def _sem_mensagem(mensagem):
+    pass
+
+
+# Exemplo de uso: carrega todas as instâncias e resume tempos e falhas
+if __name__ == '__main__':
+    from main import PASTAS_INSTANCIAS
+
+    inicio = time.perf_counter()
+    total = falhas = 0
+    for resultado in carregar_instancias(PASTAS_INSTANCIAS):
+        total += 1
+        if resultado.erro:
+            falhas += 1
+            print(f"Falha em {resultado.caminho}: {resultado.erro}")
+    print(f"{total} instâncias carregadas em {time.perf_counter() - inicio:.2f} s ({falhas} falhas).")
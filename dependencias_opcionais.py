@@ -0,0 +1,40 @@
+import importlib
+import importlib.util
+import sys
+
+# Dependências opcionais importadas só quando um backend que as usa é de fato executado.
+# O NumPy sozinho custa mais que todo o restante da inicialização do programa, então
+# módulos como grafo.py não o importam no topo: chamam importar_numpy() no ponto de uso.
+_modulos = {}
+
+
+def importar_opcional(nome):
+    """Importa (uma única vez) o módulo `nome`, retornando None se não estiver instalado."""
+    if nome not in _modulos:
+        try:
+            _modulos[nome] = importlib.import_module(nome)
+        except ImportError:
+            _modulos[nome] = None
+    return _modulos[nome]
+
+
+def disponivel(nome):
+    """True se o módulo `nome` pode ser importado, sem importá-lo (útil para escolher backends)."""
+    if nome in _modulos:
+        return _modulos[nome] is not None
+    if nome in sys.modules:
+        return sys.modules[nome] is not None
+    try:
+        return importlib.util.find_spec(nome) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def numpy_disponivel():
+    """True se o NumPy está instalado (sem importá-lo)."""
+    return disponivel("numpy")
+
+
+def importar_numpy():
+    """Retorna o módulo numpy, ou None se o NumPy não estiver instalado."""
+    return importar_opcional("numpy")
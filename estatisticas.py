@@ -24,9 +24,9 @@ def calcular_estatisticas(grafo):
 
     # Verifica se as matrizes já foram calculadas 
     if grafo.dist_matrix is None or grafo.pred_matrix is None:
-        print("Calculando matrizes de caminhos mínimos (Floyd-Warshall) para estatísticas...")
-        # Usa o método da própria classe Grafo que já está implementado
-        grafo.calcular_distancias_predecessores_floyd_warshall()
+        print("Calculando matrizes de caminhos mínimos para estatísticas...")
+        # Usa o método da própria classe Grafo, escolhendo o algoritmo pela densidade
+        grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
         if grafo.dist_matrix is None: # Verifica se o cálculo falhou
              print("Erro: Falha ao calcular matrizes de caminhos mínimos.")
              stats["Caminho medio"] = "Erro"
@@ -1,4 +1,14 @@
 import os
+from array import array
+from collections import namedtuple
+
+# Tamanho do buffer de escrita dos arquivos de solução (bytes)
+TAMANHO_BUFFER = 1 << 20
+
+# Rota em forma compacta: os serviços e suas extremidades em arrays paralelos.
+# Basta para escrever a linha da rota sem montar objetos Rota nem a sequência detalhada.
+RotaCompacta = namedtuple("RotaCompacta", ["id_rota", "servicos", "origens", "destinos", "demanda", "custo"])
+
 
 def escrever_arquivo_solucao(rotas, custo_total, grafo, arquivo_saida):
     """Escreve o arquivo de solução no formato padrão.
@@ -18,19 +28,14 @@ def escrever_arquivo_solucao(rotas, custo_total, grafo, arquivo_saida):
         # Calcula o número total de serviços requeridos a partir do grafo
         total_servicos_requeridos = len(grafo.get_all_required_services())
 
-        with open(arquivo_saida, 'w', encoding='utf-8') as f:
-            # 1. Cabeçalho
-            f.write(f"{int(round(custo_total))}\n") # Custo total (arredondado para inteiro, se necessário)
-            f.write(f"{len(rotas)}\n")     # Total de rotas
-            # Linhas 3 e 4: Número total de serviços requeridos
-            f.write(f"{total_servicos_requeridos}\n") 
-            f.write(f"{total_servicos_requeridos}\n") 
+        # 1. Cabeçalho e 2. detalhes de cada rota, gravados de uma vez
+        linhas = [_formatar_cabecalho(custo_total, len(rotas), total_servicos_requeridos)]
+        for rota in rotas:
+            resumo_rota, sequencia_visitas = rota.get_output_format()
+            linhas.append(f"{resumo_rota} {sequencia_visitas}\n")
 
-            # 2. Detalhes de cada rota
-            for rota in rotas:
-                # Passa o ID correto da rota para formatação
-                resumo_rota, sequencia_visitas = rota.get_output_format()
-                f.write(f"{resumo_rota} {sequencia_visitas}\n")
+        with open(arquivo_saida, 'w', encoding='utf-8', buffering=TAMANHO_BUFFER) as f:
+            f.write("".join(linhas))
 
 
     except IOError as e:
@@ -42,6 +47,69 @@ def escrever_arquivo_solucao(rotas, custo_total, grafo, arquivo_saida):
         traceback.print_exc()
         raise # Re-levanta a exceção
 
+
+def _formatar_cabecalho(custo_total, num_rotas, total_servicos):
+    # Custo total (arredondado para inteiro), total de rotas e, nas linhas 3 e 4,
+    # o número total de serviços requeridos
+    return f"{int(round(custo_total))}\n{num_rotas}\n{total_servicos}\n{total_servicos}\n"
+
+
+def formatar_rota_compacta(rota):
+    """Formata uma RotaCompacta como a linha produzida por Rota.get_output_format.
+
+    A rota sai do depósito e volta a ele, então o total de visitas é o número de
+    serviços mais as duas visitas ao depósito. A linha é montada com um único join.
+    """
+    deposito = f"(D 0,1,{rota.id_rota})"
+    partes = [f"0 1 {rota.id_rota} {rota.demanda} {rota.custo} {len(rota.servicos) + 2} {deposito}"]
+    partes.extend(f"(S {sid},{u},{v})" for sid, u, v in zip(rota.servicos, rota.origens, rota.destinos))
+    partes.append(deposito)
+    return " ".join(partes)
+
+
+def formatar_solucao(rotas_compactas, custo_total, total_servicos):
+    """Retorna o texto completo de um arquivo de solução a partir de rotas compactas."""
+    linhas = [_formatar_cabecalho(custo_total, len(rotas_compactas), total_servicos)]
+    linhas.extend(formatar_rota_compacta(rota) + "\n" for rota in rotas_compactas)
+    return "".join(linhas)
+
+
+def compactar_rotas(rotas):
+    """Converte objetos Rota em RotaCompacta (apenas as visitas de serviço são mantidas)."""
+    compactas = []
+    for rota in rotas:
+        compactas.append(RotaCompacta(rota.id_rota, array("i", rota.servicos), array("i", rota.origens),
+                                      array("i", rota.destinos), rota.demanda_acumulada, rota.custo_acumulado))
+    return compactas
+
+
+def compactar_rotas_servicos(grafo, rotas_servicos):
+    """Converte rotas dadas como listas de service_ids (formato do AG) em RotaCompacta.
+
+    Custo e demanda vêm de Grafo.get_matriz_servicos(), sem reconstruir caminhos.
+    """
+    matriz = grafo.get_matriz_servicos()
+    origem, destino = grafo.servicos.origem, grafo.servicos.destino
+    compactas = []
+    for indice, servicos in enumerate(rotas_servicos):
+        custo, demanda = matriz.custo_rota(servicos)
+        compactas.append(RotaCompacta(indice + 1, array("i", servicos), array("i", (origem[sid] for sid in servicos)),
+                                      array("i", (destino[sid] for sid in servicos)), demanda, custo))
+    return compactas
+
+
+def escrever_solucao_compacta(rotas_compactas, custo_total, total_servicos, arquivo_saida):
+    """Escreve um arquivo de solução a partir de rotas compactas, com buffer grande.
+
+    O formato é o mesmo de escrever_arquivo_solucao.
+    """
+    diretorio_saida = os.path.dirname(arquivo_saida)
+    if diretorio_saida:
+        os.makedirs(diretorio_saida, exist_ok=True)
+    with open(arquivo_saida, 'w', encoding='utf-8', buffering=TAMANHO_BUFFER) as f:
+        f.write(formatar_solucao(rotas_compactas, custo_total, total_servicos))
+
+
 # Exemplo de uso (requer Rota from solucao_inicial e Grafo)
 if __name__ == '__main__':
     # Simular dados de entrada
@@ -53,13 +121,11 @@ if __name__ == '__main__':
     rota1.sequencia_visitas_detalhada = [('D', 0), ('S', 14, 7, 8), ('S', 2, 3, 3), ('D', 0)]
     rota1.demanda_acumulada = 15
     rota1.custo_acumulado = 150
-    rota1.servicos_atendidos = {14, 2}
 
     rota2 = Rota(id_rota=2, deposito_id=1)
     rota2.sequencia_visitas_detalhada = [('D', 0), ('S', 26, 7, 6), ('D', 0)]
     rota2.demanda_acumulada = 5
     rota2.custo_acumulado = 80
-    rota2.servicos_atendidos = {26}
 
     rotas_exemplo = [rota1, rota2]
     custo_total_exemplo = 230
@@ -1,5 +1,26 @@
 import heapq
 import math
+import os
+from array import array
+from collections import OrderedDict
+from functools import partial
+
+from adjacencia_csr import AdjacenciaCSR
+from cache_matrizes import TAMANHO_MAXIMO_PADRAO, caminho_no_cache, carregar_matrizes, hash_grafo, limitar_tamanho_cache, salvar_matrizes
+from matriz_densa import INF, SEM_CAMINHO, SEM_PREDECESSOR, LinhasSobDemanda, MatrizDensa, MatrizSobDemanda, alocar_dados, copiar_para_mmap, matriz_vazia, matrizes_de_dicionarios, matrizes_de_numpy
+from matriz_servicos import MatrizServicos
+from candidatos_servicos import IndiceCandidatos
+from tabela_servicos import TabelaServicos
+from dependencias_opcionais import importar_numpy, numpy_disponivel # NumPy é opcional: sem ele o Floyd-Warshall roda em Python puro
+
+# Limiares de (densidade * log2 V) abaixo dos quais o Dijkstra repetido, O(V·E log V),
+# supera o Floyd-Warshall, O(V^3). O Floyd-Warshall vetorizado com NumPy tem custo
+# por operação bem menor, por isso o limiar é mais baixo quando ele está disponível.
+LIMIAR_DIJKSTRA_NUMPY = 0.08
+LIMIAR_DIJKSTRA_PYTHON = 1.0
+
+# Abaixo deste número de vértices o custo de subir o pool de processos supera o ganho
+MIN_VERTICES_PARALELO = 200
 
 class Grafo:
     """Representa o multigrafo do problema de logística."""
@@ -15,29 +36,225 @@ class Grafo:
         self.requeridos_e = {} # {(u, v): {"custo_travessia": ct, "demanda": d, "custo_servico": cs, "service_id": sid}}
         self.requeridos_a = {} # {(u, v): {"custo_travessia": ct, "demanda": d, "custo_servico": cs, "service_id": sid}}
 
-        self.adj = {} # Lista de adjacência: {u: [(v1, custo1), (v2, custo2), ...]}
+        self.adj = {} # Lista de adjacência: {u: [(v1, custo1), (v2, custo2), ...]}, uma entrada por vizinho
+        self._posicao_adj = {} # Índice de deduplicação: {u: {v: posição de v em adj[u]}}
+        self._adj_csr = None # Adjacência congelada (AdjacenciaCSR), refeita quando o grafo muda
+
+        # Índice denso dos vértices, definido por normalizacao.normalizar_grafo:
+        # ids_vertices[i] é o ID do vértice de índice i e indice_vertices o inverso.
+        # É a ordem usada pela adjacência CSR e pelas matrizes de caminhos mínimos.
+        self.ids_vertices = None
+        self.indice_vertices = None
+        # True após normalizar_grafo, enquanto as garantias dela valem (todo serviço com
+        # caminho de ida e volta ao depósito); ver distancias_por_indice
+        self.normalizado = False
+        self._matriz_na_ordem = None # dist_matrix já conferida contra ids_vertices
 
         # Atributos populados pelo parser a partir do cabeçalho da instância
         self.deposito = None
         self.capacidade = float("inf") # Default para infinito se não especificado
 
-        # Mapa de serviços (populado pelo parser)
-        # Chave: service_id (inteiro sequencial); Valor: dicionário com detalhes
-        self.service_map = {}
+        # Tabela de serviços (populada pelo parser): arrays paralelos indexados por
+        # service_id; service_map é a mesma tabela vista como dicionário somente leitura
+        self.servicos = TabelaServicos()
 
         # Matrizes de caminhos mínimos (a serem calculadas ou definidas externamente)
-        self.dist_matrix = None # Dicionário de dicionários: {origem: {destino: custo}}
-        self.pred_matrix = None # Dicionário de dicionários: {origem: {destino: predecessor}}
+        # MatrizDensa: vetor plano contíguo acessado como {origem: {destino: valor}};
+        # em laços críticos prefira dist_matrix.valor(origem, destino) ou, em grafos
+        # normalizados, o vetor plano de distancias_por_indice.
+        self.dist_matrix = None # Custos: dist_matrix[origem][destino]
+        self.pred_matrix = None # Predecessores: pred_matrix[origem][destino]
+        self.matrizes_em_mmap = False # Se True, as matrizes calculadas ficam em mmap anônimo
+
+        # Cache LRU dos caminhos reconstruídos por get_shortest_path: {(u, v): (u, ..., v)}
+        self.tamanho_cache_caminhos = 50000 # Número máximo de pares guardados (0 desativa)
+        self._cache_caminhos = OrderedDict()
+        self.cache_caminhos_hits = 0
+        self.cache_caminhos_misses = 0
+
+        # Custos entre serviços (S+1 x S+1), construída sob demanda por get_matriz_servicos
+        self.matriz_servicos = None
+        # Serviços ordenados por distância a partir de cada vértice, ver get_indice_candidatos
+        self.indice_candidatos = None
+
+        # Origens (IDs) cujas distâncias mudaram por atualizações incrementais do grafo;
+        # ver atualizar_custo_conexao e limpar_alteracoes
+        self.origens_alteradas = set()
+
+        # Cache em disco das matrizes (desativado quando None); ver cache_matrizes.py
+        self.pasta_cache_matrizes = None
+        self.tamanho_maximo_cache = TAMANHO_MAXIMO_PADRAO # Em bytes, para toda a pasta
 
     def _add_adj(self, u, v, custo):
-        """Adiciona uma conexão direcionada à lista de adjacência."""
+        """Adiciona uma conexão direcionada à lista de adjacência em O(1).
+
+        Conexões paralelas (mesmo u -> v) ocupam uma única entrada, com o menor custo,
+        que é a única relevante para os caminhos mínimos. Se as matrizes de caminhos
+        mínimos já existirem, elas são atualizadas incrementalmente.
+        """
+        if self.indice_vertices is not None and (u not in self.indice_vertices or v not in self.indice_vertices):
+            self.definir_ordem_vertices(None) # Vértice novo: o índice denso deixa de valer
         self.vertices.add(u)
         self.vertices.add(v)
-        if u not in self.adj:
+        posicoes = self._posicao_adj.get(u)
+        if posicoes is None:
+            posicoes = self._posicao_adj[u] = {}
             self.adj[u] = []
-        # Evita adicionar a mesma adjacência múltiplas vezes se a aresta/arco for lido novamente
-        if not any(neighbor == v and c == custo for neighbor, c in self.adj[u]):
-             self.adj[u].append((v, custo))
+        vizinhos = self.adj[u]
+        pos = posicoes.get(v)
+        if pos is None:
+            posicoes[v] = len(vizinhos)
+            vizinhos.append((v, custo))
+            custo_antigo = INF
+        else:
+            custo_antigo = vizinhos[pos][1]
+            if custo >= custo_antigo:
+                return
+            vizinhos[pos] = (v, custo)
+        self._adj_csr = None
+        if self.dist_matrix is not None:
+            self._atualizar_matrizes_incremental(u, v, custo_antigo, custo)
+
+    def congelar_adjacencia(self):
+        """Retorna a adjacência no formato CSR (offsets + destinos + pesos), indexada por inteiros.
+
+        É o formato consumido pelos algoritmos de caminhos mínimos. O resultado fica
+        guardado até a próxima alteração do grafo.
+        """
+        if self._adj_csr is None:
+            nos = self.ids_vertices if self.ids_vertices is not None else self.vertices
+            self._adj_csr = AdjacenciaCSR.de_adjacencia(nos, self.adj)
+        return self._adj_csr
+
+    def definir_ordem_vertices(self, ids_vertices):
+        """Fixa a ordem (índice denso 0..V-1) dos vértices na adjacência CSR e nas matrizes.
+
+        Com None, volta à ordem arbitrária do conjunto de vértices. Em ambos os casos o
+        grafo deixa de ser considerado normalizado (normalizar_grafo volta a marcá-lo).
+        """
+        self.normalizado = False
+        self._matriz_na_ordem = None
+        if ids_vertices is None:
+            self.ids_vertices = self.indice_vertices = None
+            return
+        self.ids_vertices = list(ids_vertices)
+        self.indice_vertices = {no: i for i, no in enumerate(self.ids_vertices)}
+        if self._adj_csr is not None and self._adj_csr.nos != self.ids_vertices:
+            self._adj_csr = None
+
+    def definir_adjacencia(self, csr):
+        """Substitui vértices e adjacência pelo conteúdo de uma AdjacenciaCSR.
+
+        Usado ao carregar instâncias compiladas: evita inserir conexão por conexão.
+        """
+        nos, offsets, destinos, pesos = csr.nos, csr.offsets, csr.destinos, csr.pesos
+        self.normalizado = False
+        self.vertices = set(nos)
+        self.adj = {}
+        self._posicao_adj = {}
+        for i, u in enumerate(nos):
+            inicio, fim = offsets[i], offsets[i + 1]
+            if inicio == fim:
+                continue
+            vizinhos = [(nos[j], custo) for j, custo in zip(destinos[inicio:fim], pesos[inicio:fim])]
+            self.adj[u] = vizinhos
+            self._posicao_adj[u] = {v: pos for pos, (v, _) in enumerate(vizinhos)}
+        self._adj_csr = csr
+
+    def atualizar_custo_conexao(self, u, v, novo_custo):
+        """Altera o custo da conexão direcionada u -> v, criando-a se não existir.
+
+        Para arestas (mão dupla), chame nos dois sentidos. Custo float("inf") remove a
+        conexão (ex.: rua interditada). Se as matrizes de caminhos mínimos já tiverem
+        sido calculadas, são atualizadas sem refazer o cálculo completo:
+        - inserção ou redução de custo: relaxamento de todos os pares via u -> v, O(V^2);
+        - aumento de custo ou remoção: novo Dijkstra apenas para as origens cujos
+          caminhos mínimos passavam por u -> v.
+        As origens cujas distâncias mudaram são acumuladas em self.origens_alteradas.
+        """
+        posicoes = self._posicao_adj.get(u, {})
+        pos = posicoes.get(v)
+        custo_antigo = INF if pos is None else self.adj[u][pos][1]
+        if novo_custo <= custo_antigo:
+            if novo_custo < custo_antigo:
+                self._add_adj(u, v, novo_custo)
+            return
+
+        vizinhos = self.adj[u]
+        if novo_custo == INF:
+            # Remoção em O(1): o último vizinho ocupa a posição liberada. Sem a conexão,
+            # algum serviço pode perder o caminho até o depósito
+            self.normalizado = False
+            ultimo = vizinhos.pop()
+            del posicoes[v]
+            if ultimo[0] != v:
+                vizinhos[pos] = ultimo
+                posicoes[ultimo[0]] = pos
+        else:
+            vizinhos[pos] = (v, novo_custo)
+        self._adj_csr = None
+        if self.dist_matrix is not None:
+            self._atualizar_matrizes_incremental(u, v, custo_antigo, novo_custo)
+
+    def remover_conexao(self, u, v):
+        """Remove a conexão direcionada u -> v (equivale a custo infinito)."""
+        self.atualizar_custo_conexao(u, v, INF)
+
+    def distancias_alteradas(self):
+        """Indica se alguma distância mudou desde a última chamada a limpar_alteracoes."""
+        return bool(self.origens_alteradas)
+
+    def limpar_alteracoes(self):
+        """Retorna o conjunto de origens alteradas e o reinicia."""
+        alteradas = self.origens_alteradas
+        self.origens_alteradas = set()
+        return alteradas
+
+    def _atualizar_matrizes_incremental(self, u, v, custo_antigo, custo_novo):
+        """Propaga às matrizes a mudança de custo de u -> v (já aplicada em self.adj)."""
+        if u == v:
+            return # Laços nunca fazem parte de caminhos mínimos
+        if isinstance(self.dist_matrix, MatrizSobDemanda):
+            self._reiniciar_caminhos_sob_demanda()
+            return
+
+        dist, pred = self.dist_matrix, self.pred_matrix
+        csr = self.congelar_adjacencia()
+        tipo = dist.dados.format if isinstance(dist.dados, memoryview) else dist.dados.typecode
+        if (u not in dist.indice or v not in dist.indice or csr.inteiros != (tipo == "q")
+                or list(csr.nos) != dist.nos):
+            # Vértice novo, mudança no tipo dos custos ou matriz em outra ordem de vértices
+            # (as linhas são refeitas com os índices da CSR): a matriz precisa ser refeita
+            print("Aviso: Atualização exige novo cálculo completo das matrizes de caminhos mínimos.")
+            self._calcular_caminhos_minimos("auto", "auto", 1)
+            self.origens_alteradas.update(self.vertices)
+            return
+
+        dist.tornar_gravavel(self.matrizes_em_mmap)
+        pred.tornar_gravavel(self.matrizes_em_mmap)
+        i_u, i_v = dist.indice[u], dist.indice[v]
+        if custo_novo < custo_antigo:
+            alteradas = _relaxar_conexao(dist, pred, i_u, i_v, custo_novo)
+        else:
+            alteradas = _recalcular_linhas_afetadas(dist, pred, i_u, i_v, csr)
+        if alteradas:
+            self.limpar_cache_caminhos()
+            self.origens_alteradas.update(dist.nos[i] for i in alteradas)
+
+    def _reiniciar_caminhos_sob_demanda(self):
+        """Descarta as linhas sob demanda, que passam a ser calculadas sobre o grafo atual."""
+        linhas = self.dist_matrix.linhas
+        csr = self.congelar_adjacencia()
+        if csr.nos == linhas.nos:
+            linhas.reiniciar(partial(_dijkstra_lote, csr))
+        else:
+            # Mudou o conjunto de vértices: mantém o mesmo número de linhas em memória
+            bytes_por_linha = csr.n * (8 + 4)
+            linhas = LinhasSobDemanda(csr.nos, partial(_dijkstra_lote, csr), linhas.max_linhas * bytes_por_linha, bytes_por_linha)
+            self.dist_matrix = MatrizSobDemanda(linhas)
+            self.pred_matrix = MatrizSobDemanda(linhas, predecessores=True)
+        self.limpar_cache_caminhos()
+        self.origens_alteradas.update(self.vertices)
 
     def adicionar_aresta_nao_requerida(self, u, v, custo):
         """Adiciona uma aresta não requerida ao grafo."""
@@ -52,39 +269,123 @@ class Grafo:
 
     def adicionar_vertice_requerido(self, v, demanda, custo_servico, service_id):
         """Adiciona um vértice requerido."""
-        self.vertices.add(v)
+        if v not in self.vertices:
+            self.vertices.add(v)
+            self._adj_csr = None
+            self.definir_ordem_vertices(None)
         if v not in self.requeridos_v:
             self.requeridos_v[v] = {"demanda": demanda, "custo_servico": custo_servico, "service_id": service_id}
-        # O service_map é populado no parser
+        # A tabela de serviços é populada no parser
 
     def adicionar_aresta_requerida(self, u, v, custo_travessia, demanda, custo_servico, service_id):
         """Adiciona uma aresta requerida. A travessia é adicionada à adjacência."""
         aresta_key = tuple(sorted((u, v)))
         if aresta_key not in self.requeridos_e:
             self.requeridos_e[aresta_key] = {"custo_travessia": custo_travessia, "demanda": demanda, "custo_servico": custo_servico, "service_id": service_id}
-        # Adiciona a travessia à lista de adjacência (se já não existir com o mesmo custo)
+        # Adiciona a travessia à lista de adjacência (mantendo o menor custo entre conexões paralelas)
         self._add_adj(u, v, custo_travessia)
         self._add_adj(v, u, custo_travessia)
-        # O service_map é populado no parser
+        # A tabela de serviços é populada no parser
 
     def adicionar_arco_requerido(self, u, v, custo_travessia, demanda, custo_servico, service_id):
         """Adiciona um arco requerido. A travessia é adicionada à adjacência."""
         arco_key = (u, v)
         if arco_key not in self.requeridos_a:
             self.requeridos_a[arco_key] = {"custo_travessia": custo_travessia, "demanda": demanda, "custo_servico": custo_servico, "service_id": service_id}
-        # Adiciona a travessia à lista de adjacência (se já não existir com o mesmo custo)
+        # Adiciona a travessia à lista de adjacência (mantendo o menor custo entre conexões paralelas)
         self._add_adj(u, v, custo_travessia)
-        # O service_map é populado no parser
+        # A tabela de serviços é populada no parser
 
     def set_shortest_paths(self, dist_matrix, pred_matrix):
-        """Define as matrizes de distância e predecessores calculadas."""
+        """Define as matrizes de distância e predecessores calculadas.
+
+        Aceita MatrizDensa ou dicionários de dicionários ({origem: {destino: valor}});
+        estes são convertidos para a representação compacta.
+        """
+        if not isinstance(dist_matrix, MatrizDensa) or not isinstance(pred_matrix, MatrizDensa):
+            dist_matrix, pred_matrix = matrizes_de_dicionarios(dist_matrix, pred_matrix)
         self.dist_matrix = dist_matrix
         self.pred_matrix = pred_matrix
+        self.limpar_cache_caminhos()
+
+    def limpar_cache_caminhos(self):
+        """Descarta os caminhos em cache e as estruturas entre serviços (necessário sempre que as matrizes mudam)."""
+        self.matriz_servicos = None
+        self.indice_candidatos = None
+        self._cache_caminhos.clear()
+        self.cache_caminhos_hits = 0
+        self.cache_caminhos_misses = 0
+
+    def estatisticas_cache_caminhos(self):
+        """Retorna um dicionário com a efetividade do cache de caminhos."""
+        consultas = self.cache_caminhos_hits + self.cache_caminhos_misses
+        return {
+            "hits": self.cache_caminhos_hits,
+            "misses": self.cache_caminhos_misses,
+            "taxa_acerto": self.cache_caminhos_hits / consultas if consultas else 0,
+            "caminhos_em_cache": len(self._cache_caminhos),
+        }
+
+    def ativar_caminhos_sob_demanda(self, orcamento_mb=512):
+        """Ativa o modo sob demanda (lazy) das matrizes de caminhos mínimos.
+
+        Em vez de calcular a matriz V x V completa, cada linha é obtida por um
+        Dijkstra de origem única na primeira vez que aquela origem é consultada
+        (por get_shortest_path, get_custo_caminho ou dist_matrix[u][v]). As linhas
+        ficam em cache até o orçamento de memória; acima dele, as usadas há mais
+        tempo são descartadas e recalculadas se voltarem a ser pedidas.
+
+        Args:
+            orcamento_mb (float): Memória máxima (em MB) para as linhas guardadas.
+        """
+        csr = self.congelar_adjacencia()
+        bytes_por_linha = csr.n * (8 + 4) # distância (int64/float64) + predecessor (int32)
+        linhas = LinhasSobDemanda(csr.nos, partial(_dijkstra_lote, csr), int(orcamento_mb * 1024 ** 2), bytes_por_linha)
+        self.dist_matrix = MatrizSobDemanda(linhas)
+        self.pred_matrix = MatrizSobDemanda(linhas, predecessores=True)
+        self.limpar_cache_caminhos()
+        print(f"Modo de caminhos sob demanda ativado: até {linhas.max_linhas} linhas em memória.")
+
+    def get_custo_caminho(self, u, v):
+        """Retorna apenas o custo do caminho mais curto entre u e v, sem reconstruir o caminho.
+
+        Returns:
+            Custo do caminho, ou float("inf") se não houver caminho.
+        """
+        if self.dist_matrix is None:
+            raise ValueError("Matrizes de caminhos mínimos não estão disponíveis. Execute o cálculo primeiro.")
+        try:
+            return self.dist_matrix.valor(u, v)
+        except KeyError:
+            return float("inf") # Origem ou destino fora da matriz
+
+    def distancias_por_indice(self):
+        """Acesso direto ao vetor plano das distâncias, para os laços críticos.
+
+        Disponível quando o grafo está normalizado (ver normalizacao.py) e dist_matrix é
+        uma MatrizDensa na ordem de ids_vertices. Nesse caso, entre o depósito e as
+        extremidades dos serviços toda distância é finita, e quem consome pode ler
+        dados[indice[u] * n + indice[v]] sem passar por MatrizDensa.valor nem testar
+        SEM_CAMINHO.
+
+        Returns:
+            tuple: (dados, n, indice_vertices), ou None se o acesso direto não valer.
+        """
+        dist = self.dist_matrix
+        if not self.normalizado or not isinstance(dist, MatrizDensa):
+            return None
+        if self._matriz_na_ordem is not dist:
+            if dist.nos != self.ids_vertices:
+                return None
+            self._matriz_na_ordem = dist
+        return dist.dados, dist.n, self.indice_vertices
 
     def get_shortest_path(self, u, v):
         """Retorna o custo e a sequência de nós do caminho mais curto entre u e v.
 
-        Utiliza as matrizes pré-calculadas (dist_matrix, pred_matrix).
+        Utiliza as matrizes pré-calculadas (dist_matrix, pred_matrix). Os caminhos
+        reconstruídos ficam em um cache LRU (até self.tamanho_cache_caminhos pares);
+        quando só o custo interessa, use get_custo_caminho.
 
         Args:
             u: Nó de origem.
@@ -92,8 +393,8 @@ class Grafo:
 
         Returns:
             tuple: (custo, caminho) onde custo é o custo total do caminho
-                   e caminho é uma lista de nós [u, ..., v].
-                   Retorna (float("inf"), []) se não houver caminho.
+                   e caminho é uma tupla de nós (u, ..., v).
+                   Retorna (float("inf"), ()) se não houver caminho.
         """
         if self.dist_matrix is None or self.pred_matrix is None:
             # print("Aviso: Matrizes de caminhos mínimos não calculadas/definidas.")
@@ -101,92 +402,360 @@ class Grafo:
             # return self.dijkstra(u, v)
             raise ValueError("Matrizes de caminhos mínimos não estão disponíveis. Execute o cálculo primeiro.")
 
-        if u not in self.dist_matrix or v not in self.dist_matrix[u]:
-            return float("inf"), [] # Origem ou destino não alcançável
-
-        custo = self.dist_matrix[u].get(v, float("inf"))
+        custo = self.get_custo_caminho(u, v)
         if custo == float("inf"):
-            return float("inf"), []
+            return float("inf"), () # Origem ou destino não alcançável
+
+        chave = (u, v)
+        caminho = self._cache_caminhos.get(chave)
+        if caminho is not None:
+            self.cache_caminhos_hits += 1
+            self._cache_caminhos.move_to_end(chave)
+            return custo, caminho
+        self.cache_caminhos_misses += 1
 
         # Reconstruir caminho usando a matriz de predecessores
+        predecessor = self.pred_matrix.valor
         caminho = []
         curr = v
         while curr is not None:
             caminho.append(curr)
             if curr == u:
                 break
-            # Verifica se u e curr existem nas matrizes antes de acessar
-            if u not in self.pred_matrix or curr not in self.pred_matrix[u]:
+            try:
+                curr = predecessor(u, curr)
+            except KeyError:
                  print(f"Erro na reconstrução do caminho: Predecessor não encontrado para {curr} vindo de {u}")
-                 return float("inf"), [] # Erro na matriz de predecessores
-            curr = self.pred_matrix[u].get(curr)
+                 return float("inf"), () # Erro na matriz de predecessores
             if curr is not None and curr not in self.vertices:
                  print(f"Erro na reconstrução do caminho: Predecessor inválido {curr}")
-                 return float("inf"), []
+                 return float("inf"), ()
 
         if not caminho or caminho[-1] != u:
              # Isso pode acontecer se u == v ou se houver um problema na pred_matrix
              if u == v:
-                 return 0, [u]
+                 return 0, (u,)
              else:
                  print(f"Erro na reconstrução do caminho entre {u} e {v}. Caminho parcial: {caminho}")
                  # Tenta retornar o custo se disponível, mas caminho vazio indica problema
-                 return custo, []
+                 return custo, ()
+
+        caminho = tuple(reversed(caminho)) # Inverte para ter u -> v
+        if self.tamanho_cache_caminhos > 0:
+            self._cache_caminhos[chave] = caminho
+            if len(self._cache_caminhos) > self.tamanho_cache_caminhos:
+                self._cache_caminhos.popitem(last=False)
+        return custo, caminho
+
+    def get_matriz_servicos(self):
+        """Retorna a MatrizServicos (custos entre fim e início de serviços, 0 = depósito).
+
+        É construída na primeira chamada a partir do service_map e das matrizes de
+        caminhos mínimos, e descartada sempre que estas mudam.
+        """
+        if self.matriz_servicos is None:
+            if self.dist_matrix is None:
+                raise ValueError("Matrizes de caminhos mínimos não estão disponíveis. Execute o cálculo primeiro.")
+            self.matriz_servicos = MatrizServicos(self)
+        return self.matriz_servicos
+
+    def get_indice_candidatos(self):
+        """Retorna o IndiceCandidatos (serviços ordenados por distância a partir de cada vértice).
 
-        return custo, caminho[::-1] # Inverte para ter u -> v
+        Como a MatrizServicos, é descartado sempre que as matrizes de caminhos mínimos
+        ou os serviços mudam.
+        """
+        if self.indice_candidatos is None:
+            if self.dist_matrix is None:
+                raise ValueError("Matrizes de caminhos mínimos não estão disponíveis. Execute o cálculo primeiro.")
+            self.indice_candidatos = IndiceCandidatos(self)
+        return self.indice_candidatos
+
+    @property
+    def service_map(self):
+        """Serviços como {service_id: {'tipo', 'id', 'demanda', 'custo_servico', 'endpoints'}} (somente leitura)."""
+        return self.servicos
+
+    def adicionar_servico(self, service_id, tipo, id_original, demanda, custo_servico, endpoints):
+        """Registra um serviço na tabela de serviços ('N', 'E' ou 'A')."""
+        self.servicos.adicionar(service_id, tipo, id_original, demanda, custo_servico, endpoints)
+        self.normalizado = False
+        self.matriz_servicos = None
+        self.indice_candidatos = None
 
     def get_service_details(self, service_id):
-        """Retorna os detalhes de um serviço específico a partir do service_map."""
-        return self.service_map.get(service_id)
+        """Retorna os detalhes de um serviço específico (dicionário) ou None.
+
+        Em laços críticos, prefira os arrays de self.servicos (demanda[sid], origem[sid], ...).
+        """
+        return self.servicos.get(service_id)
 
     def get_all_required_services(self):
         """Retorna um conjunto com os IDs de todos os serviços requeridos."""
-        return set(self.service_map.keys())
+        return set(self.servicos)
 
-    def calcular_distancias_predecessores_floyd_warshall(self):
+    def calcular_distancias_predecessores_floyd_warshall(self, backend="auto", algoritmo="floyd_warshall", num_workers=1):
         """Calcula as matrizes de distância e predecessores usando Floyd-Warshall.
 
         Este método preenche self.dist_matrix e self.pred_matrix.
         É computacionalmente intensivo (O(V^3)).
+
+        Args:
+            backend (str): "python" (Python puro), "numpy" (broadcast vetorizado)
+                ou "auto" (NumPy se estiver instalado). Em ambos os casos o resultado
+                é uma MatrizDensa acessada como {origem: {destino: valor}}.
+            algoritmo (str): "floyd_warshall", "dijkstra" (Dijkstra repetido a partir
+                de cada vértice) ou "auto" (escolha pela densidade do grafo).
+            num_workers (int): Processos usados pelo Dijkstra repetido (None = todos os núcleos).
+
+        Se self.pasta_cache_matrizes estiver definida, as matrizes são procuradas no
+        cache em disco (chave = hash das conexões e da ordem dos vértices) e, na
+        ausência, gravadas lá.
         """
+        self.limpar_cache_caminhos()
+        caminho_cache = None
+        if self.pasta_cache_matrizes and self.vertices:
+            caminho_cache = caminho_no_cache(self.pasta_cache_matrizes, hash_grafo(self))
+            matrizes = carregar_matrizes(caminho_cache)
+            if matrizes is not None and matrizes[0].nos != list(self.congelar_adjacencia().nos):
+                print(f"Aviso: Ordem dos vértices no cache {caminho_cache} difere da do grafo; recalculando.")
+                matrizes = None
+            if matrizes is not None:
+                self.dist_matrix, self.pred_matrix = matrizes
+                print(f"Matrizes de caminhos mínimos carregadas do cache: {caminho_cache}")
+                return
+
+        self._calcular_caminhos_minimos(backend, algoritmo, num_workers)
+
+        if caminho_cache:
+            try:
+                salvar_matrizes(caminho_cache, self.dist_matrix, self.pred_matrix)
+                limitar_tamanho_cache(self.pasta_cache_matrizes, self.tamanho_maximo_cache, preservar=caminho_cache)
+            except OSError as e:
+                print(f"Aviso: Não foi possível gravar o cache de matrizes em {caminho_cache}: {e}")
+
+    def _calcular_caminhos_minimos(self, backend, algoritmo, num_workers):
+        """Despacha o cálculo das matrizes para o algoritmo/backend escolhido."""
+        if algoritmo == "auto":
+            algoritmo = self.escolher_algoritmo_caminhos()
+        if algoritmo == "dijkstra":
+            self.calcular_distancias_predecessores_dijkstra(num_workers=num_workers)
+            return
+        if algoritmo != "floyd_warshall":
+            raise ValueError(f"Algoritmo de caminhos mínimos desconhecido: {algoritmo}")
+
+        if backend == "auto":
+            backend = "numpy" if numpy_disponivel() else "python"
+        if backend == "numpy" and importar_numpy() is None:
+            raise ValueError("Backend 'numpy' solicitado, mas o NumPy não está instalado.")
+        if backend not in ("python", "numpy"):
+            raise ValueError(f"Backend de Floyd-Warshall desconhecido: {backend}")
+
         print("Calculando caminhos mínimos com Floyd-Warshall...")
         num_vertices = len(self.vertices)
         if num_vertices == 0:
-            self.dist_matrix = {}
-            self.pred_matrix = {}
+            self.dist_matrix = matriz_vazia()
+            self.pred_matrix = matriz_vazia(predecessores=True)
             return
 
-        # Mapeamento de ID de vértice para índice inteiro (0 a n-1) se necessário
-        # Ou usar dicionários diretamente
-        vertices_list = list(self.vertices)
-        dist = {v: {w: float("inf") for w in self.vertices} for v in self.vertices}
-        pred = {v: {w: None for w in self.vertices} for v in self.vertices}
+        if backend == "numpy":
+            self._floyd_warshall_numpy()
+        else:
+            self._floyd_warshall_python()
+        print("Cálculo de Floyd-Warshall concluído.")
+
+    def _floyd_warshall_python(self):
+        """Floyd-Warshall em Python puro sobre listas planas indexadas (i * n + j)."""
+        csr = self.congelar_adjacencia()
+        nos = csr.nos
+        n = csr.n
+
+        dist = [INF] * (n * n)
+        pred = [SEM_PREDECESSOR] * (n * n)
 
         # Inicialização
-        for v in self.vertices:
-            dist[v][v] = 0
-            pred[v][v] = v # Ou None, dependendo da convenção para reconstrução
+        for i in range(n):
+            dist[i * n + i] = 0
+            pred[i * n + i] = i
 
-        for u in self.adj:
-            for v, custo in self.adj[u]:
-                if custo < dist[u][v]: # Considera a aresta/arco de menor custo se houver múltiplos
-                    dist[u][v] = custo
-                    pred[u][v] = u
+        for i, vizinhos in enumerate(csr.listas()):
+            for j, custo in vizinhos:
+                if custo < dist[i * n + j]: # Laços (i -> i) não superam o custo 0 da diagonal
+                    dist[i * n + j] = custo
+                    pred[i * n + j] = i
 
         # Iterações do Floyd-Warshall
-        for k in vertices_list: # Vértice intermediário
-            for i in vertices_list: # Origem
-                for j in vertices_list: # Destino
-                    if dist[i][k] != float("inf") and dist[k][j] != float("inf"):
-                        novo_custo = dist[i][k] + dist[k][j]
-                        if novo_custo < dist[i][j]:
-                            dist[i][j] = novo_custo
-                            # O predecessor de j no caminho i->j via k é o mesmo predecessor de j no caminho k->j
-                            pred[i][j] = pred[k][j]
-
-        self.dist_matrix = dist
-        self.pred_matrix = pred
-        print("Cálculo de Floyd-Warshall concluído.")
+        for k in range(n): # Vértice intermediário
+            # A linha k não muda durante a iteração k, então pode ser copiada uma vez
+            dist_k = dist[k * n:(k + 1) * n]
+            pred_k = pred[k * n:(k + 1) * n]
+            for i in range(n): # Origem
+                dist_ik = dist[i * n + k]
+                if dist_ik == INF:
+                    continue
+                base = i * n
+                for j in range(n): # Destino
+                    novo_custo = dist_ik + dist_k[j]
+                    if novo_custo < dist[base + j]:
+                        dist[base + j] = novo_custo
+                        # O predecessor de j no caminho i->j via k é o mesmo predecessor de j no caminho k->j
+                        pred[base + j] = pred_k[j]
+
+        if csr.inteiros:
+            dados_dist = array("q", (SEM_CAMINHO if d == INF else d for d in dist))
+        else:
+            dados_dist = array("d", dist)
+        self._definir_matrizes_densas(nos, dados_dist, array("i", pred))
+
+    def _definir_matrizes_densas(self, nos, dados_dist, dados_pred):
+        """Guarda os vetores planos calculados como MatrizDensa (em mmap, se configurado)."""
+        if self.matrizes_em_mmap:
+            dados_dist = copiar_para_mmap(dados_dist)
+            dados_pred = copiar_para_mmap(dados_pred)
+        self.dist_matrix = MatrizDensa(nos, dados_dist)
+        self.pred_matrix = MatrizDensa(nos, dados_pred, predecessores=True)
+        self.limpar_cache_caminhos()
+
+    def _floyd_warshall_numpy(self):
+        """Floyd-Warshall vetorizado: cada iteração de k é um broadcast linha/coluna.
+
+        Usa a mesma ordem de vértices intermediários e o mesmo critério de
+        desempate (melhoria estrita) da versão em Python puro, de modo que as
+        matrizes resultantes são idênticas.
+        """
+        np = importar_numpy()
+        csr = self.congelar_adjacencia()
+        nos = csr.nos
+        n = csr.n
+
+        dist = np.full((n, n), np.inf)
+        pred = np.full((n, n), SEM_PREDECESSOR, dtype=np.intc)
+        diagonal = np.arange(n)
+        dist[diagonal, diagonal] = 0
+        pred[diagonal, diagonal] = diagonal
+
+        # Conexões em bloco a partir do CSR (sem paralelas, que já foram deduplicadas)
+        origens = np.repeat(np.arange(n), np.diff(np.frombuffer(csr.offsets, dtype=np.int64)))
+        destinos = np.frombuffer(csr.destinos, dtype=np.intc)
+        pesos = np.frombuffer(csr.pesos, dtype=np.int64 if csr.inteiros else np.float64)
+        fora_diagonal = origens != destinos # Laços (i -> i) não superam o custo 0 da diagonal
+        origens, destinos, pesos = origens[fora_diagonal], destinos[fora_diagonal], pesos[fora_diagonal]
+        dist[origens, destinos] = pesos
+        pred[origens, destinos] = origens
+
+        melhora = np.empty((n, n), dtype=bool)
+        via_k = np.empty((n, n))
+        for k in range(n):
+            # via_k[i][j] = dist[i][k] + dist[k][j]; a linha e a coluna k não mudam nesta iteração
+            np.add(dist[:, k, None], dist[None, k, :], out=via_k)
+            np.less(via_k, dist, out=melhora)
+            np.copyto(dist, via_k, where=melhora)
+            np.copyto(pred, pred[k], where=melhora)
+
+        dist_matrix, pred_matrix = matrizes_de_numpy(nos, dist, pred, csr.inteiros)
+        self._definir_matrizes_densas(nos, dist_matrix.dados, pred_matrix.dados)
+
+    def escolher_algoritmo_caminhos(self):
+        """Escolhe entre Floyd-Warshall e Dijkstra repetido pela densidade do grafo.
+
+        Returns:
+            str: "dijkstra" para grafos esparsos, "floyd_warshall" caso contrário.
+        """
+        n = len(self.vertices)
+        if n < 2:
+            return "floyd_warshall"
+        num_conexoes = sum(len(vizinhos) for vizinhos in self.adj.values())
+        densidade = num_conexoes / (n * (n - 1))
+        limiar = LIMIAR_DIJKSTRA_NUMPY if numpy_disponivel() else LIMIAR_DIJKSTRA_PYTHON
+        return "dijkstra" if densidade * math.log2(n) < limiar else "floyd_warshall"
+
+    def calcular_distancias_predecessores_dijkstra(self, num_workers=1):
+        """Calcula as matrizes de distância e predecessores com um Dijkstra por vértice.
+
+        Preenche self.dist_matrix e self.pred_matrix no mesmo formato do
+        Floyd-Warshall. Custa O(V·E log V), muito menos que O(V^3) em grafos esparsos.
+
+        Args:
+            num_workers (int): Número de processos. Com mais de um (ou None, que usa
+                todos os núcleos) as origens são divididas entre um pool de processos;
+                grafos com menos de MIN_VERTICES_PARALELO vértices rodam em série.
+        """
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        if num_workers > 1 and len(self.vertices) >= MIN_VERTICES_PARALELO:
+            self._dijkstra_paralelo(num_workers)
+            return
+
+        print("Calculando caminhos mínimos com Dijkstra a partir de cada vértice...")
+        csr = self.congelar_adjacencia()
+        _, _, linhas_dist, linhas_pred = _dijkstra_lote(csr, 0, csr.n)
+        self._definir_matrizes_densas(csr.nos, linhas_dist, linhas_pred)
+        print("Cálculo de Dijkstra repetido concluído.")
+
+    def _dijkstra_paralelo(self, num_workers):
+        """Distribui as origens do Dijkstra repetido entre um pool de processos.
+
+        Cada processo recebe a adjacência congelada em CSR (compacta, serializável e
+        indexada por inteiros em vez de IDs) e devolve as linhas das origens do seu
+        lote, que são copiadas para as matrizes densas compartilhadas.
+        """
+        print(f"Calculando caminhos mínimos com Dijkstra em paralelo ({num_workers} processos)...")
+        csr = self.congelar_adjacencia()
+        nos, n, inteiros = csr.nos, csr.n, csr.inteiros
+
+        dados_dist = alocar_dados("q" if inteiros else "d", n * n, SEM_CAMINHO if inteiros else INF, self.matrizes_em_mmap)
+        dados_pred = alocar_dados("i", n * n, SEM_PREDECESSOR, self.matrizes_em_mmap)
+
+        # Importado aqui: o pool (multiprocessing) é caro de importar e só é usado neste caminho
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        # Lotes menores que n / num_workers equilibram melhor a carga entre os processos
+        tamanho_lote = max(1, math.ceil(n / (num_workers * 4)))
+        lotes = [range(i, min(i + tamanho_lote, n)) for i in range(0, n, tamanho_lote)]
+
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futuros = [executor.submit(_dijkstra_lote, csr, lote.start, lote.stop) for lote in lotes]
+            for futuro in as_completed(futuros):
+                inicio, fim, linhas_dist, linhas_pred = futuro.result()
+                dados_dist[inicio * n:fim * n] = linhas_dist
+                dados_pred[inicio * n:fim * n] = linhas_pred
+
+        self.dist_matrix = MatrizDensa(nos, dados_dist)
+        self.pred_matrix = MatrizDensa(nos, dados_pred, predecessores=True)
+        self.limpar_cache_caminhos()
+        print("Cálculo de Dijkstra paralelo concluído.")
+
+    def dijkstra_origem_unica(self, origem):
+        """Calcula os caminhos mínimos de uma origem para todos os vértices alcançáveis.
+
+        Dijkstra com heap binário sobre self.adj.
+
+        Args:
+            origem: Nó de origem.
+
+        Returns:
+            tuple: (dist, pred) com {destino: custo} e {destino: predecessor} apenas
+                   para os vértices alcançáveis. pred[origem] == origem, como no Floyd-Warshall.
+        """
+        dist = {origem: 0}
+        pred = {origem: origem}
+        finalizados = set()
+        pq = [(0, origem)] # Fila de prioridade (custo, vértice)
+
+        while pq:
+            d, u = heapq.heappop(pq)
+            if u in finalizados:
+                continue
+            finalizados.add(u)
+
+            for v, custo_aresta in self.adj.get(u, ()):
+                novo_custo = d + custo_aresta
+                if novo_custo < dist.get(v, float("inf")):
+                    dist[v] = novo_custo
+                    pred[v] = u
+                    heapq.heappush(pq, (novo_custo, v))
+
+        return dist, pred
 
     # --- Métodos Adicionais (Exemplo: Dijkstra para um único par, se necessário) ---
     def dijkstra(self, origem, destino):
@@ -248,6 +817,102 @@ class Grafo:
 
         return custo_final, caminho[::-1]
 
+def _dijkstra_lote(csr, inicio, fim):
+    """Executa o Dijkstra para as origens de índice inicio..fim-1 (roda em um processo do pool).
+
+    Returns:
+        tuple: (inicio, fim, linhas_dist, linhas_pred) com as linhas concatenadas
+               no mesmo formato plano das matrizes densas.
+    """
+    adjacencia = csr.listas()
+    n = csr.n
+    inteiros = csr.inteiros
+    sem_caminho = SEM_CAMINHO if inteiros else float("inf")
+    linhas_dist = array("q" if inteiros else "d", [sem_caminho]) * ((fim - inicio) * n)
+    linhas_pred = array("i", [SEM_PREDECESSOR]) * ((fim - inicio) * n)
+
+    for origem in range(inicio, fim):
+        base = (origem - inicio) * n
+        dist = [float("inf")] * n
+        finalizado = [False] * n
+        dist[origem] = 0
+        linhas_pred[base + origem] = origem
+        pq = [(0, origem)]
+        while pq:
+            d, u = heapq.heappop(pq)
+            if finalizado[u]:
+                continue
+            finalizado[u] = True
+            linhas_dist[base + u] = d
+            for v, custo_aresta in adjacencia[u]:
+                novo_custo = d + custo_aresta
+                if novo_custo < dist[v]:
+                    dist[v] = novo_custo
+                    linhas_pred[base + v] = u
+                    heapq.heappush(pq, (novo_custo, v))
+
+    return inicio, fim, linhas_dist, linhas_pred
+
+def _relaxar_conexao(dist, pred, i_u, i_v, custo):
+    """Atualiza as matrizes após a conexão i_u -> i_v passar a custar `custo` (redução ou inserção).
+
+    Um par (i, j) só melhora pelo caminho i ~> u -> v ~> j, então basta comparar
+    dist[i][u] + custo + dist[v][j] com dist[i][j]. Origens em que nem o próprio v
+    melhora são descartadas de imediato, o que torna a atualização típica bem mais
+    barata que os O(V^2) do pior caso.
+
+    Returns:
+        list: Índices das origens cujas linhas mudaram.
+    """
+    n = dist.n
+    dados_dist = dist.dados
+    dados_pred = pred.dados
+    inteiros = (dados_dist.format if isinstance(dados_dist, memoryview) else dados_dist.typecode) == "q"
+
+    def valor(d):
+        return INF if inteiros and d < 0 else d
+
+    # A linha de v não muda (custos não negativos), então pode ser copiada uma vez
+    linha_v = [valor(d) for d in dados_dist[i_v * n:(i_v + 1) * n]]
+    pred_v = dados_pred[i_v * n:(i_v + 1) * n]
+    alcancaveis_de_v = [j for j in range(n) if linha_v[j] != INF]
+
+    alteradas = []
+    for i in range(n):
+        base = i * n
+        d_iu = valor(dados_dist[base + i_u])
+        if d_iu == INF:
+            continue
+        via = d_iu + custo
+        if via >= valor(dados_dist[base + i_v]):
+            continue
+        for j in alcancaveis_de_v:
+            novo_custo = via + linha_v[j]
+            if novo_custo < valor(dados_dist[base + j]):
+                dados_dist[base + j] = novo_custo
+                # O predecessor de j passa a ser o do caminho v -> j (ou u, para o próprio v)
+                dados_pred[base + j] = i_u if j == i_v else pred_v[j]
+        alteradas.append(i)
+    return alteradas
+
+
+def _recalcular_linhas_afetadas(dist, pred, i_u, i_v, csr):
+    """Refaz, por Dijkstra, as linhas cujas árvores de caminhos mínimos usavam i_u -> i_v.
+
+    A conexão só é usada a partir da origem i se o predecessor de v nessa linha for u;
+    nas demais linhas nenhum caminho mínimo a contém, e um aumento de custo não as altera.
+
+    Returns:
+        list: Índices das origens recalculadas.
+    """
+    n = dist.n
+    afetadas = [i for i in range(n) if pred.dados[i * n + i_v] == i_u]
+    for i in afetadas:
+        _, _, linha_dist, linha_pred = _dijkstra_lote(csr, i, i + 1)
+        dist.dados[i * n:(i + 1) * n] = linha_dist
+        pred.dados[i * n:(i + 1) * n] = linha_pred
+    return afetadas
+
 # Exemplo de uso (para teste)
 if __name__ == '__main__':
     g = Grafo()
@@ -258,7 +923,7 @@ if __name__ == '__main__':
     g.adicionar_aresta_nao_requerida(2, 3, 5)
     g.adicionar_arco_nao_requerido(1, 3, 12)
     g.adicionar_vertice_requerido(3, 20, 2, 1)
-    g.service_map[1] = {"tipo": "N", "id": 3, "demanda": 20, "custo_servico": 2, "endpoints": (3, 3)}
+    g.adicionar_servico(1, "N", 3, 20, 2, (3, 3))
 
     print("Vértices:", g.vertices)
     print("Adjacência:", g.adj)
@@ -1,14 +1,34 @@
 import math
+import random
 import time
 
 from rota import Rota # Importa a classe Rota do novo módulo
 
+# Regras clássicas do Path-Scanning para desempatar (ou, com alpha > 0, escolher
+# dentro da lista restrita de candidatos) os serviços mais próximos:
+#   max_dist_deposito / min_dist_deposito: maior/menor distância do fim do serviço ao depósito
+#   max_razao / min_razao: maior/menor razão demanda / custo de serviço
+#   capacidade: max_dist_deposito até metade da capacidade, min_dist_deposito depois
+REGRAS_PATH_SCANNING = ("max_dist_deposito", "min_dist_deposito", "max_razao", "min_razao", "capacidade")
+REGRA_ALEATORIA = "aleatoria" # Sorteia uma das regras acima a cada nova rota
+ALPHA_PADRAO = 0.02 # Largura da lista restrita de candidatos nas partidas aleatórias
+
 
-def construir_solucao_path_scanning(grafo):
+def construir_solucao_path_scanning(grafo, regra=None, alpha=0.0, rng=None):
     """Constrói uma solução inicial usando a heurística Path-Scanning.
 
+    A cada passo a rota segue para o serviço não atendido mais próximo que caiba
+    na capacidade restante. Sem regra e com alpha = 0 (padrão), empates ficam com
+    o menor service_id e a construção é determinística. Com alpha > 0, a lista
+    restrita de candidatos (RCL) reúne os serviços viáveis a distância até
+    dmin + alpha * (dmax - dmin); a regra escolhe entre eles (sem regra, a escolha
+    é uniforme) e empates na regra são sorteados com rng.
+
     Args:
         grafo (Grafo): Objeto grafo populado com dados da instância e caminhos mínimos.
+        regra (str): Uma de REGRAS_PATH_SCANNING, REGRA_ALEATORIA ou None.
+        alpha (float): Entre 0 e 1; 0 considera só os serviços à distância mínima.
+        rng (random.Random): Gerador dos sorteios (padrão: o módulo random).
 
     Returns:
         tuple: (rotas_finais, custo_total, tempo_execucao)
@@ -19,8 +39,8 @@ def construir_solucao_path_scanning(grafo):
     start_time = time.time()
 
     if grafo.dist_matrix is None or grafo.pred_matrix is None:
-        print("Calculando matrizes de caminhos mínimos (Floyd-Warshall) antes de iniciar Path-Scanning...")
-        grafo.calcular_distancias_predecessores_floyd_warshall()
+        print("Calculando matrizes de caminhos mínimos antes de iniciar Path-Scanning...")
+        grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
         if grafo.dist_matrix is None:
              raise RuntimeError("Falha ao calcular as matrizes de caminhos mínimos.")
 
@@ -32,54 +52,55 @@ def construir_solucao_path_scanning(grafo):
 
     print(f"Iniciando Path-Scanning com {len(servicos_nao_atendidos)} serviços requeridos.")
 
+    tabela = grafo.servicos
+    demandas, origens, destinos, custos_servico = tabela.demanda, tabela.origem, tabela.destino, tabela.custo_servico
+    # Candidatos de cada vértice já ordenados por (distância, service_id): o primeiro
+    # serviço não atendido que cabe na rota é o mais próximo, sem varrer todos os
+    # serviços a cada passo. inicio_lista[no] pula os atendidos do início da lista.
+    indice = grafo.get_indice_candidatos()
+    inicio_lista = {}
+    aleatorio = regra is not None or alpha > 0
+    if aleatorio:
+        rng = rng or random
+        ate_deposito = indice.distancias_deposito()
+        regra_rota = regra
+
     while servicos_nao_atendidos:
         rota_atual = Rota(id_proxima_rota, grafo.deposito)
         localizacao_atual = grafo.deposito
+        if regra == REGRA_ALEATORIA:
+            regra_rota = rng.choice(REGRAS_PATH_SCANNING)
         # print(f"\nIniciando Rota {id_proxima_rota} a partir do depósito {localizacao_atual}")
 
         while True:
             melhor_servico_id = -1
-            menor_custo_insercao = float("inf")
-            melhor_caminho = []
             melhor_custo_travessia = float("inf")
-            melhor_detalhes_servico = None
-
-            # print(f"  Buscando próximo serviço. {len(servicos_nao_atendidos)} restantes. Local: {localizacao_atual}")
-            for service_id in servicos_nao_atendidos:
-                detalhes = grafo.get_service_details(service_id)
-                if not detalhes:
-                    # print(f"Aviso: Detalhes não encontrados para service_id {service_id}. Pulando.")
-                    continue
-
-                demanda_servico = detalhes["demanda"]
-                no_inicio_servico = detalhes["endpoints"][0]
-
-                if not rota_atual.verificar_capacidade(demanda_servico, grafo.capacidade):
-                    # print(f"    Serviço {service_id} excede capacidade ({rota_atual.demanda_acumulada}+{demanda_servico} > {grafo.capacidade}).")
-                    continue
-
-                custo_trav, caminho = grafo.get_shortest_path(localizacao_atual, no_inicio_servico)
-
-                if custo_trav == float("inf"):
-                    # print(f"    Serviço {service_id} inalcançável de {localizacao_atual}.")
-                    continue
-
-                custo_insercao = custo_trav
-
-                if custo_insercao < menor_custo_insercao:
-                    # print(f"    Novo melhor serviço encontrado: {service_id} com custo {custo_insercao}")
-                    menor_custo_insercao = custo_insercao
-                    melhor_servico_id = service_id
-                    melhor_caminho = caminho
-                    melhor_custo_travessia = custo_trav
-                    melhor_detalhes_servico = detalhes
+            folga = grafo.capacidade - rota_atual.demanda_acumulada
+
+            candidatos = indice.candidatos(localizacao_atual)
+            pos = inicio_lista.get(localizacao_atual, 0)
+            while pos < len(candidatos) and candidatos[pos] not in servicos_nao_atendidos:
+                pos += 1
+            inicio_lista[localizacao_atual] = pos
+            if aleatorio:
+                melhor_servico_id, melhor_custo_travessia = _escolher_candidato(
+                    candidatos, indice.distancias(localizacao_atual), pos, servicos_nao_atendidos, tabela,
+                    folga, alpha, regra_rota, rota_atual.demanda_acumulada < grafo.capacidade / 2, ate_deposito, rng)
+            else:
+                for pos in range(pos, len(candidatos)):
+                    service_id = candidatos[pos]
+                    if service_id in servicos_nao_atendidos and demandas[service_id] <= folga:
+                        melhor_servico_id = service_id
+                        melhor_custo_travessia = indice.distancias(localizacao_atual)[pos]
+                        break
 
             if melhor_servico_id != -1:
                 # print(f"  Adicionando serviço {melhor_servico_id} à rota {id_proxima_rota}.")
-                u, v = melhor_detalhes_servico["endpoints"]
-                demanda = melhor_detalhes_servico["demanda"]
-                custo_servico = melhor_detalhes_servico["custo_servico"]
-                caminho_para_adicionar = melhor_caminho[1:] if len(melhor_caminho) > 1 else []
+                u, v = origens[melhor_servico_id], destinos[melhor_servico_id]
+                demanda = demandas[melhor_servico_id]
+                custo_servico = custos_servico[melhor_servico_id]
+                _, melhor_caminho = grafo.get_shortest_path(localizacao_atual, u)
+                caminho_para_adicionar = melhor_caminho[1:] if len(melhor_caminho) > 1 else ()
 
                 rota_atual.adicionar_visita_servico(
                     melhor_servico_id,
@@ -102,10 +123,9 @@ def construir_solucao_path_scanning(grafo):
         custo_retorno, caminho_retorno = grafo.get_shortest_path(localizacao_atual, grafo.deposito)
         if custo_retorno == float("inf"):
              print(f"Alerta: Não foi possível encontrar caminho de retorno ao depósito para a rota {rota_atual.id_rota} a partir do nó {localizacao_atual}.")
-             if rota_atual.sequencia_visitas_detalhada[-1][0] != "D":
-                 rota_atual.sequencia_visitas_detalhada.append(("D", 0))
+             rota_atual.fechar()
         else:
-             caminho_retorno_adicionar = caminho_retorno[1:] if len(caminho_retorno) > 1 else []
+             caminho_retorno_adicionar = caminho_retorno[1:] if len(caminho_retorno) > 1 else ()
              rota_atual.adicionar_retorno_deposito(custo_retorno, caminho_retorno_adicionar)
 
         if rota_atual.servicos_atendidos:
@@ -135,6 +155,138 @@ def construir_solucao_path_scanning(grafo):
 
     return rotas_finais, custo_total_solucao, tempo_execucao
 
+
+def _escolher_candidato(candidatos, distancias, inicio, servicos_nao_atendidos, tabela, folga, alpha, regra,
+                        abaixo_da_metade, ate_deposito, rng):
+    """Escolhe o próximo serviço pela RCL e pela regra (ver construir_solucao_path_scanning).
+
+    Returns:
+        tuple: (service_id, distância até ele), ou (-1, inf) se nenhum serviço couber.
+    """
+    demandas = tabela.demanda
+
+    def viavel(service_id):
+        return service_id in servicos_nao_atendidos and demandas[service_id] <= folga
+
+    fim = len(candidatos)
+    primeiro = next((pos for pos in range(inicio, fim) if viavel(candidatos[pos])), None)
+    if primeiro is None:
+        return -1, float("inf")
+    limite = distancias[primeiro]
+    if alpha > 0:
+        # A lista está ordenada: o último viável é o mais distante (dmax)
+        ultimo = next(pos for pos in range(fim - 1, primeiro - 1, -1) if viavel(candidatos[pos]))
+        limite += alpha * (distancias[ultimo] - limite)
+
+    rcl = []
+    for pos in range(primeiro, fim):
+        if distancias[pos] > limite:
+            break
+        if viavel(candidatos[pos]):
+            rcl.append(pos)
+    if len(rcl) == 1:
+        return candidatos[rcl[0]], distancias[rcl[0]]
+
+    if regra is None:
+        escolhidos = rcl
+    else:
+        if regra == "capacidade":
+            regra = "max_dist_deposito" if abaixo_da_metade else "min_dist_deposito"
+        if regra.endswith("dist_deposito"):
+            valor = ate_deposito.__getitem__
+        else:
+            custos_servico = tabela.custo_servico
+            valor = lambda sid: demandas[sid] / custos_servico[sid] if custos_servico[sid] else float("inf")
+        sinal = 1 if regra.startswith("max") else -1
+        valores = [sinal * valor(candidatos[pos]) for pos in rcl]
+        melhor = max(valores)
+        escolhidos = [pos for pos, v in zip(rcl, valores) if v == melhor]
+    pos = escolhidos[0] if len(escolhidos) == 1 else rng.choice(escolhidos)
+    return candidatos[pos], distancias[pos]
+
+
+def partidas_multi_start(tentativas, alpha=ALPHA_PADRAO, semente=0):
+    """Configurações (regra, alpha, semente) das partidas do multi-start, em ordem.
+
+    A partida 0 é o Path-Scanning determinístico; as cinco seguintes usam cada
+    regra clássica (alpha = 0); as demais sorteiam a regra a cada rota e escolhem
+    na RCL de largura alpha. Cada partida tem a própria semente, então o resultado
+    não depende de qual processo a executa.
+    """
+    partidas = [(None, 0.0, None)] + [(regra, 0.0, f"{semente}-{t + 1}") for t, regra in enumerate(REGRAS_PATH_SCANNING)]
+    partidas += [(REGRA_ALEATORIA, alpha, f"{semente}-{t}") for t in range(len(partidas), tentativas)]
+    return partidas[:tentativas]
+
+
+def _executar_partida(grafo, partida):
+    regra, alpha, semente = partida
+    rotas, custo, _ = construir_solucao_path_scanning(grafo, regra, alpha, random.Random(semente))
+    return rotas, custo
+
+
+def construir_solucao_path_scanning_multi(grafo, tentativas=20, alpha=ALPHA_PADRAO, num_workers=1,
+                                          limite_tempo=None, semente=None):
+    """Path-Scanning com múltiplas partidas (ver partidas_multi_start), ficando com a melhor.
+
+    Args:
+        grafo (Grafo): Grafo com os caminhos mínimos calculados.
+        tentativas (int): Número máximo de partidas.
+        alpha (float): Largura da RCL nas partidas aleatórias.
+        num_workers (int): Processos em paralelo (1 = no próprio processo).
+        limite_tempo (float): Segundos a partir dos quais nenhuma partida nova começa
+            (a primeira sempre roda). None = sem limite.
+        semente (int): Semente base das partidas (padrão: sorteada do módulo random,
+            o que respeita uma semente fixada por quem chama).
+
+    Returns:
+        tuple: (rotas, custo, tempo) da melhor partida; tempo é o total do multi-start.
+    """
+    inicio = time.time()
+    prazo = None if limite_tempo is None else inicio + limite_tempo
+    if semente is None:
+        semente = random.getrandbits(64)
+    partidas = partidas_multi_start(tentativas, alpha, semente)
+    grafo.get_indice_candidatos() # Montado uma vez e compartilhado pelas partidas (e copiado para os processos)
+
+    melhor = None # (custo, número da partida, rotas)
+    if num_workers > 1 and len(partidas) > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_definir_grafo_processo, initargs=(grafo,)) as executor:
+            futuros = {executor.submit(_partida_no_processo, partida, prazo if t else None): t
+                       for t, partida in enumerate(partidas)}
+            for futuro in as_completed(futuros):
+                resultado = futuro.result()
+                if resultado is not None and (melhor is None or (resultado[1], futuros[futuro]) < melhor[:2]):
+                    melhor = (resultado[1], futuros[futuro], resultado[0])
+                if prazo is not None and melhor is not None and time.time() >= prazo:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    break
+    else:
+        for t, partida in enumerate(partidas):
+            if t and prazo is not None and time.time() >= prazo:
+                break
+            rotas, custo = _executar_partida(grafo, partida)
+            if melhor is None or custo < melhor[0]:
+                melhor = (custo, t, rotas)
+
+    custo, _, rotas = melhor
+    return rotas, custo, time.time() - inicio
+
+
+# Grafo de cada processo do pool, recebido uma única vez na inicialização
+_grafo_processo = None
+
+
+def _definir_grafo_processo(grafo):
+    global _grafo_processo
+    _grafo_processo = grafo
+
+
+def _partida_no_processo(partida, prazo):
+    if prazo is not None and time.time() >= prazo:
+        return None
+    return _executar_partida(_grafo_processo, partida)
+
 # Exemplo de uso (requer grafo.py e parser.py)
 if __name__ == '__main__':
     from grafo import Grafo
@@ -177,22 +329,3 @@ if __name__ == '__main__':
                 traceback.print_exc()
         else:
             print("Falha ao ler o grafo da instância.")
-
-
-
-import random
-
-def construir_solucao_path_scanning_multi(grafo, tentativas=20):
-    melhor_rotas = None
-    melhor_custo = float("inf")
-    melhor_tempo = 0
-    for t in range(tentativas):
-        random_seed = t * 137  # garante diferentes seeds
-        random.seed(random_seed)
-        # Supondo que construir_solucao_path_scanning use alguma aleatoriedade
-        rotas, custo, tempo = construir_solucao_path_scanning(grafo)
-        if custo < melhor_custo:
-            melhor_rotas = rotas
-            melhor_custo = custo
-            melhor_tempo = tempo
-    return melhor_rotas, melhor_custo, melhor_tempo
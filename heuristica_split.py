@@ -0,0 +1,213 @@
+import time
+from collections import deque
+
+# Construção "rota primeiro, agrupamento depois": os serviços são encadeados em um
+# único tour gigante (sem considerar a capacidade) e o Split o corta, de forma
+# ótima para aquela ordem, em rotas que respeitam a capacidade. O tour gigante é
+# também um cromossomo compacto (uma lista de service_ids) para o algoritmo genético.
+#
+# Custos do tour t_1..t_n em vetores de prefixo (índices 1..n):
+#   demanda[k]  demanda acumulada de t_1..t_k
+#   custo[k]    custos de serviço de t_1..t_k mais os deslocamentos entre serviços
+#               consecutivos (trecho[k] = fim de t_(k-1) -> início de t_k)
+#   ida[k]      depósito -> início de t_k;  volta[k]  fim de t_k -> depósito
+# A rota com t_(i+1)..t_j custa então, em O(1):
+#   ida[i+1] + custo[j] - custo[i] - trecho[i+1] + volta[j]
+
+# A partir deste número de serviços o Split usa a variante linear com deque;
+# abaixo dele a versão de Bellman, O(n * serviços por rota), é igualmente rápida
+LIMIAR_SPLIT_LINEAR = 50
+
+
+def prefixos_tour(grafo, tour):
+    """Calcula os vetores (demanda, custo, trecho, ida, volta) do tour (ver cabeçalho)."""
+    tabela = grafo.servicos
+    demandas, custos_servico, origens, destinos = tabela.demanda, tabela.custo_servico, tabela.origem, tabela.destino
+    distancia = grafo.get_custo_caminho
+    deposito = grafo.deposito
+
+    acesso = grafo.distancias_por_indice()
+    if acesso is not None:
+        # Grafo normalizado: leitura direta do vetor plano da matriz de distâncias
+        dados, n_vertices, indice = acesso
+
+        def distancia(u, v):
+            return dados[indice[u] * n_vertices + indice[v]]
+
+    n = len(tour)
+    demanda = [0] * (n + 1)
+    custo = [0] * (n + 1)
+    trecho = [0] * (n + 1)
+    ida = [0] * (n + 1)
+    volta = [0] * (n + 1)
+    anterior = None
+    for k, service_id in enumerate(tour, 1):
+        inicio, fim = origens[service_id], destinos[service_id]
+        trecho[k] = distancia(anterior, inicio) if anterior is not None else 0
+        demanda[k] = demanda[k - 1] + demandas[service_id]
+        custo[k] = custo[k - 1] + trecho[k] + custos_servico[service_id]
+        ida[k] = distancia(deposito, inicio)
+        volta[k] = distancia(fim, deposito)
+        anterior = fim
+    return demanda, custo, trecho, ida, volta
+
+
+def split_bellman(grafo, tour):
+    """Split por programação dinâmica sobre o grafo auxiliar (Bellman), O(n * serviços por rota).
+
+    Returns:
+        tuple: (rotas, custo) com as rotas como listas de service_ids.
+
+    Raises:
+        ValueError: Se algum serviço sozinho exceder a capacidade.
+    """
+    demanda, custo, trecho, ida, volta = prefixos_tour(grafo, tour)
+    capacidade = grafo.capacidade
+    n = len(tour)
+    valor = [0] + [float("inf")] * n
+    predecessor = [0] * (n + 1)
+    for i in range(n):
+        if valor[i] == float("inf"):
+            continue
+        base = valor[i] - custo[i] - trecho[i + 1] + ida[i + 1]
+        for j in range(i + 1, n + 1):
+            if demanda[j] - demanda[i] > capacidade:
+                break
+            candidato = base + custo[j] + volta[j]
+            if candidato < valor[j]:
+                valor[j] = candidato
+                predecessor[j] = i
+    if valor[n] == float("inf"):
+        raise ValueError("Há serviço com demanda maior que a capacidade do veículo.")
+    return _rotas_do_split(tour, predecessor), valor[n]
+
+
+def split_linear(grafo, tour):
+    """Split em O(n) com uma fila dupla monotônica (Vidal, 2016), sem limite de frota.
+
+    valor[j] = custo[j] + volta[j] + min{p(i)}, com p(i) = valor[i] - custo[i] -
+    trecho[i+1] + ida[i+1], sobre os i cuja rota até j cabe na capacidade. Esses i
+    formam uma janela que só avança; a fila guarda seus candidatos com p crescente.
+
+    Returns:
+        tuple: (rotas, custo) com as rotas como listas de service_ids.
+
+    Raises:
+        ValueError: Se algum serviço sozinho exceder a capacidade.
+    """
+    demanda, custo, trecho, ida, volta = prefixos_tour(grafo, tour)
+    capacidade = grafo.capacidade
+    n = len(tour)
+    valor = [0] * (n + 1)
+    predecessor = [0] * (n + 1)
+    p = [0] * (n + 1)
+    p[0] = ida[1] if n else 0
+    fila = deque([0])
+    for j in range(1, n + 1):
+        while fila and demanda[j] - demanda[fila[0]] > capacidade:
+            fila.popleft()
+        if not fila:
+            raise ValueError("Há serviço com demanda maior que a capacidade do veículo.")
+        i = fila[0]
+        valor[j] = p[i] + custo[j] + volta[j]
+        predecessor[j] = i
+        if j < n:
+            p[j] = valor[j] - custo[j] - trecho[j + 1] + ida[j + 1]
+            while fila and p[fila[-1]] >= p[j]:
+                fila.pop()
+            fila.append(j)
+    return _rotas_do_split(tour, predecessor), valor[n]
+
+
+def split(grafo, tour):
+    """Corta o tour gigante em rotas de custo mínimo (Bellman ou linear, conforme o tamanho)."""
+    if len(tour) >= LIMIAR_SPLIT_LINEAR:
+        return split_linear(grafo, tour)
+    return split_bellman(grafo, tour)
+
+
+def _rotas_do_split(tour, predecessor):
+    rotas = []
+    j = len(tour)
+    while j > 0:
+        i = predecessor[j]
+        rotas.append(list(tour[i:j]))
+        j = i
+    rotas.reverse()
+    return rotas
+
+
+def tour_gigante_de_rotas(rotas):
+    """Concatena as rotas (objetos Rota ou listas de service_ids) em um tour gigante."""
+    tour = []
+    for rota in rotas:
+        if isinstance(rota, list):
+            tour.extend(rota)
+        else:
+            tour.extend(rota.servicos)
+    return tour
+
+
+def tour_gigante_vizinho_mais_proximo(grafo):
+    """Tour gigante pelo vizinho mais próximo: partindo do depósito, sempre o serviço mais perto.
+
+    Usa o IndiceCandidatos do grafo (o mesmo do Path-Scanning), ignorando a capacidade.
+    """
+    indice = grafo.get_indice_candidatos()
+    destinos = grafo.servicos.destino
+    restantes = set(grafo.servicos)
+    inicio_lista = {}
+    tour = []
+    local = grafo.deposito
+    while restantes:
+        candidatos = indice.candidatos(local)
+        pos = inicio_lista.get(local, 0)
+        while pos < len(candidatos) and candidatos[pos] not in restantes:
+            pos += 1
+        inicio_lista[local] = pos
+        if pos == len(candidatos):
+            # Nada alcançável daqui (grafo não normalizado): continua pelo menor service_id
+            service_id = min(restantes)
+        else:
+            service_id = candidatos[pos]
+        tour.append(service_id)
+        restantes.remove(service_id)
+        local = destinos[service_id]
+    return tour
+
+
+def construir_solucao_split(grafo, tour=None):
+    """Constrói uma solução cortando um tour gigante com o Split.
+
+    Args:
+        grafo (Grafo): Grafo com os caminhos mínimos calculados.
+        tour (list): Tour gigante (service_ids); padrão: o do vizinho mais próximo.
+
+    Returns:
+        tuple: (rotas, custo_total, tempo_execucao) como em construir_solucao_path_scanning.
+    """
+    from algoritmo_genetico_avancado import converter_para_objetos_rota
+
+    inicio = time.time()
+    if grafo.dist_matrix is None:
+        grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
+    if tour is None:
+        tour = tour_gigante_vizinho_mais_proximo(grafo)
+    rotas_servicos, custo = split(grafo, tour)
+    return converter_para_objetos_rota(grafo, rotas_servicos), custo, time.time() - inicio
+
+
+# Exemplo de uso: compara o Split do tour gigante com o Path-Scanning
+if __name__ == '__main__':
+    import sys
+    from parser import ler_arquivo_dat
+    from heuristica_path_scanning import construir_solucao_path_scanning
+
+    caminho_instancia = sys.argv[1] if len(sys.argv) > 1 else "selected_instances/BHW1.dat"
+    grafo = ler_arquivo_dat(caminho_instancia, verbose=False)
+    grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
+    rotas_ps, custo_ps, tempo_ps = construir_solucao_path_scanning(grafo)
+    rotas, custo, tempo = construir_solucao_split(grafo)
+    print(f"Split (vizinho mais próximo): {custo} com {len(rotas)} rotas em {tempo:.4f} s")
+    _, custo_resplit = split(grafo, tour_gigante_de_rotas(rotas_ps))
+    print(f"Path-Scanning: {custo_ps}; mesmo tour recortado pelo Split: {custo_resplit}")
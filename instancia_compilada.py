@@ -0,0 +1,183 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from adjacencia_csr import AdjacenciaCSR
+from grafo import Grafo
+
+# Formato binário de uma instância já lida (todos os campos com 8 bytes, ordem nativa):
+#   cabeçalho: MAGICO, versão, depósito, capacidade (float64), n vértices, m conexões,
+#              s serviços, arestas e arcos não requeridos, tamanho do bloco de IDs,
+#              tipo dos custos ('q' ou 'd') + 7 bytes de preenchimento
+#   vértices:              n * int64
+#   adjacência CSR:        offsets (n+1) * int64, destinos m * int64, pesos m * tipo
+#   serviços (1..s):       tipo (código do caractere), u, v, demanda, custo de serviço,
+#                          custo de travessia — cada um s * int64
+#   arestas não requeridas: u, v (int64) e custo (tipo), cada um com um valor por aresta
+#   arcos não requeridos:   idem
+#   IDs originais dos serviços: texto UTF-8 separado por SEPARADOR_IDS
+MAGICO = b"GLMI"
+VERSAO = 1
+CABECALHO = struct.Struct("=4sIqdQQQQQQc7x")
+SEPARADOR_IDS = "\x1f"
+
+
+def eh_instancia_compilada(caminho):
+    """Retorna True se o arquivo começa com o número mágico do formato compilado."""
+    try:
+        with open(caminho, "rb") as f:
+            return f.read(len(MAGICO)) == MAGICO
+    except OSError:
+        return False
+
+
+def compilar_instancia(grafo, caminho):
+    """Grava o Grafo (já lido do .dat) no formato binário compilado.
+
+    São gravados a adjacência congelada em CSR, os serviços (tabela de serviços),
+    as listas de arestas/arcos não requeridos, capacidade e depósito. A escrita
+    usa um arquivo temporário renomeado ao final, como em cache_matrizes.py.
+    """
+    csr = grafo.congelar_adjacencia()
+    tipo = "q" if csr.inteiros else "d"
+    tabela = grafo.servicos
+    num_servicos = len(tabela)
+    if num_servicos != len(tabela.tipo) - 1:
+        raise ValueError("Os service_ids devem ser sequenciais a partir de 1 para compilar a instância.")
+
+    # As colunas da tabela de serviços são gravadas diretamente (sem a posição 0)
+    colunas_servicos = [array("q", list(tabela.tipo[1:])), array("q", tabela.origem[1:]), array("q", tabela.destino[1:]),
+                        array("q", tabela.demanda[1:]), array("q", tabela.custo_servico[1:]),
+                        array("q", (_custo_travessia(grafo, tabela, sid) for sid in range(1, num_servicos + 1)))]
+    ids = SEPARADOR_IDS.join(str(id_original) for id_original in tabela.ids[1:]).encode("utf-8")
+
+    capacidade = float(grafo.capacidade) if grafo.capacidade is not None else float("inf")
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    caminho_tmp = f"{caminho}.{os.getpid()}.tmp"
+    with open(caminho_tmp, "wb") as f:
+        f.write(CABECALHO.pack(MAGICO, VERSAO, grafo.deposito, capacidade, csr.n, csr.num_conexoes(), num_servicos,
+                               len(grafo.arestas_nao_req), len(grafo.arcos_nao_req), len(ids), tipo.encode()))
+        f.write(array("q", csr.nos).tobytes())
+        f.write(csr.offsets.tobytes())
+        f.write(array("q", csr.destinos).tobytes())
+        f.write(csr.pesos.tobytes())
+        for coluna in colunas_servicos:
+            f.write(coluna.tobytes())
+        for conexoes in (grafo.arestas_nao_req, grafo.arcos_nao_req):
+            f.write(array("q", (u for u, _, _ in conexoes)).tobytes())
+            f.write(array("q", (v for _, v, _ in conexoes)).tobytes())
+            f.write(array(tipo, (custo for _, _, custo in conexoes)).tobytes())
+        f.write(ids)
+    os.replace(caminho_tmp, caminho)
+
+
+def _custo_travessia(grafo, tabela, service_id):
+    tipo = chr(tabela.tipo[service_id])
+    endpoints = (tabela.origem[service_id], tabela.destino[service_id])
+    if tipo == "E":
+        return grafo.requeridos_e[endpoints]["custo_travessia"]
+    if tipo == "A":
+        return grafo.requeridos_a[endpoints]["custo_travessia"]
+    return 0
+
+
+def carregar_instancia_compilada(caminho):
+    """Carrega (via mmap) uma instância compilada e reconstrói o Grafo.
+
+    Returns:
+        Grafo: O grafo equivalente ao obtido por ler_arquivo_dat sobre o .dat original.
+
+    Raises:
+        ValueError: Se o arquivo não estiver no formato/versão esperados.
+    """
+    with open(caminho, "rb") as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with mapa, memoryview(mapa) as visao:
+        return _montar_grafo(visao)
+
+
+def _montar_grafo(visao):
+    if len(visao) < CABECALHO.size:
+        raise ValueError("Arquivo de instância compilada truncado.")
+    magico, versao, deposito, capacidade, n, m, s, ne, na, tamanho_ids, tipo = CABECALHO.unpack_from(visao, 0)
+    tipo = tipo.decode()
+    if magico != MAGICO or versao != VERSAO or tipo not in ("q", "d"):
+        raise ValueError("Arquivo não é uma instância compilada compatível.")
+    tamanho_esperado = CABECALHO.size + 8 * (n + (n + 1) + 2 * m + 6 * s + 3 * ne + 3 * na) + tamanho_ids
+    if len(visao) != tamanho_esperado:
+        raise ValueError("Arquivo de instância compilada com tamanho inválido.")
+
+    posicao = CABECALHO.size
+
+    def ler(tipo_valores, quantidade):
+        nonlocal posicao
+        valores = array(tipo_valores)
+        valores.frombytes(visao[posicao:posicao + 8 * quantidade])
+        posicao += 8 * quantidade
+        return valores
+
+    nos = ler("q", n).tolist()
+    offsets = ler("q", n + 1)
+    destinos = array("i", ler("q", m))
+    pesos = ler(tipo, m)
+    tipos, us, vs, demandas, custos_servico, custos_travessia = (ler("q", s).tolist() for _ in range(6))
+    conexoes_nao_req = []
+    for quantidade in (ne, na):
+        u, v, custo = ler("q", quantidade), ler("q", quantidade), ler(tipo, quantidade)
+        conexoes_nao_req.append(list(zip(u, v, custo)))
+    ids = bytes(visao[posicao:posicao + tamanho_ids]).decode("utf-8").split(SEPARADOR_IDS) if s else []
+
+    grafo = Grafo()
+    grafo.deposito = deposito
+    grafo.capacidade = int(capacidade) if capacidade != float("inf") else capacidade
+    grafo.arestas_nao_req, grafo.arcos_nao_req = conexoes_nao_req
+    grafo.definir_adjacencia(AdjacenciaCSR(nos, offsets, destinos, pesos, tipo == "q"))
+
+    # Reconstrói os serviços na mesma ordem (e com os mesmos IDs) atribuída pelo parser
+    for indice in range(s):
+        service_id = indice + 1
+        tipo_servico = chr(tipos[indice])
+        u, v = us[indice], vs[indice]
+        demanda, custo_servico = demandas[indice], custos_servico[indice]
+        if tipo_servico == "N":
+            grafo.adicionar_vertice_requerido(u, demanda, custo_servico, service_id)
+            id_original = int(ids[indice])
+        else:
+            requeridos = grafo.requeridos_e if tipo_servico == "E" else grafo.requeridos_a
+            if (u, v) not in requeridos:
+                requeridos[(u, v)] = {"custo_travessia": custos_travessia[indice], "demanda": demanda, "custo_servico": custo_servico, "service_id": service_id}
+            id_original = ids[indice]
+        grafo.adicionar_servico(service_id, tipo_servico, id_original, demanda, custo_servico, (u, v))
+    return grafo
+
+
+def compilar_pasta(pasta_origem, pasta_destino):
+    """Compila todos os .dat de pasta_origem para pasta_destino (mesmos nomes de arquivo).
+
+    Como ler_arquivo_dat reconhece o formato compilado pelo número mágico, basta
+    apontar o programa para pasta_destino para usar as versões compiladas.
+    """
+    from parser import ler_arquivo_dat
+
+    compiladas = 0
+    for nome in sorted(os.listdir(pasta_origem)):
+        if not nome.endswith(".dat"):
+            continue
+        grafo = ler_arquivo_dat(os.path.join(pasta_origem, nome), verbose=False)
+        if grafo is None:
+            print(f"Aviso: {nome} não pôde ser lida e não foi compilada.")
+            continue
+        compilar_instancia(grafo, os.path.join(pasta_destino, nome))
+        compiladas += 1
+    print(f"{compiladas} instâncias compiladas em {pasta_destino}.")
+    return compiladas
+
+
+# Uso: python instancia_compilada.py <pasta_origem> <pasta_destino>
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Uso: python instancia_compilada.py <pasta_origem> <pasta_destino>")
+        sys.exit(1)
+    compilar_pasta(sys.argv[1], sys.argv[2])
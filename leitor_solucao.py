@@ -0,0 +1,291 @@
+import os
+import re
+import sys
+from array import array
+from collections import Counter, namedtuple
+
+from gerar_arquivo_solucao import RotaCompacta
+from matriz_densa import MatrizDensa, SEM_CAMINHO
+from rota import Rota
+from dependencias_opcionais import importar_numpy, numpy_disponivel # Sem NumPy os custos são recalculados em Python puro
+
+# Formato lido (o mesmo gravado por escrever_arquivo_solucao):
+#   linha 1: custo total      linha 2: número de rotas      linhas 3 e 4: inteiros extras
+#   uma linha por rota: 0 1 id_rota demanda custo total_visitas (D 0,1,id) (S id,u,v) ... (D 0,1,id)
+VISITA = re.compile(r"\(([DS]) (-?\d+),(-?\d+),(-?\d+)\)")
+
+# Solução lida de um arquivo. As rotas ficam na forma compacta (ver gerar_arquivo_solucao);
+# demanda e custo de cada RotaCompacta são os valores declarados no arquivo.
+SolucaoLida = namedtuple("SolucaoLida", ["custo_total", "num_rotas", "extras", "rotas"])
+
+# Resultado de validar_solucao: erros é vazio quando a solução é válida
+ResultadoValidacao = namedtuple("ResultadoValidacao", ["valida", "erros", "custo", "custos_rotas", "demandas_rotas"])
+
+
+def ler_solucao(caminho):
+    """Lê um arquivo sol-*.dat. Veja ler_texto_solucao."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        return ler_texto_solucao(f.read())
+
+
+def ler_texto_solucao(texto):
+    """Interpreta o conteúdo de um arquivo de solução (ou de um registro de arquivo_solucoes).
+
+    Returns:
+        SolucaoLida: Custo total, número de rotas, as duas linhas extras do cabeçalho
+                     e a lista de RotaCompacta, na ordem do arquivo.
+
+    Raises:
+        ValueError: Se o texto não estiver no formato esperado.
+    """
+    linhas = texto.splitlines()
+    if len(linhas) < 4:
+        raise ValueError("Arquivo de solução sem o cabeçalho de 4 linhas.")
+    try:
+        custo_total = _numero(linhas[0])
+        num_rotas = int(linhas[1])
+        extras = (int(linhas[2]), int(linhas[3]))
+    except ValueError:
+        raise ValueError("Cabeçalho do arquivo de solução mal formatado.") from None
+
+    rotas = []
+    for numero_linha, linha in enumerate(linhas[4:], start=5):
+        if not linha.strip():
+            continue
+        partes = linha.split(None, 6)
+        if len(partes) < 6:
+            raise ValueError(f"Linha {numero_linha}: rota mal formatada.")
+        try:
+            id_rota, demanda, custo, total_visitas = int(partes[2]), _numero(partes[3]), _numero(partes[4]), int(partes[5])
+        except ValueError:
+            raise ValueError(f"Linha {numero_linha}: resumo da rota mal formatado.") from None
+        visitas = VISITA.findall(partes[6]) if len(partes) > 6 else []
+        servicos, origens, destinos = array("i"), array("i"), array("i")
+        for tipo, a, b, c in visitas:
+            if tipo == "S":
+                servicos.append(int(a))
+                origens.append(int(b))
+                destinos.append(int(c))
+        # Arquivos antigos declaram só as visitas de serviço; os atuais contam também as do depósito
+        if total_visitas not in (len(visitas), len(servicos)):
+            raise ValueError(f"Linha {numero_linha}: {len(visitas)} visitas lidas, {total_visitas} declaradas.")
+        rotas.append(RotaCompacta(id_rota, servicos, origens, destinos, demanda, custo))
+
+    if len(rotas) != num_rotas:
+        raise ValueError(f"{len(rotas)} rotas lidas, {num_rotas} declaradas no cabeçalho.")
+    return SolucaoLida(custo_total, num_rotas, extras, rotas)
+
+
+def _numero(texto):
+    valor = float(texto)
+    return int(valor) if valor.is_integer() else valor
+
+
+def rotas_servicos(solucao):
+    """Retorna as rotas como listas de service_ids (o formato usado pelo AG e pelo R&R)."""
+    return [list(rota.servicos) for rota in solucao.rotas]
+
+
+def reconstruir_rotas(grafo, solucao):
+    """Reconstrói objetos Rota a partir de uma solução lida.
+
+    Requer as matrizes de caminhos mínimos do grafo.
+    """
+    rotas = []
+    tabela = grafo.servicos
+    for rota_lida in solucao.rotas:
+        rota = Rota(rota_lida.id_rota, grafo.deposito)
+        atual = grafo.deposito
+        for service_id, u, v in zip(rota_lida.servicos, rota_lida.origens, rota_lida.destinos):
+            if atual != u:
+                custo_ate_servico, caminho = grafo.get_shortest_path(atual, u)
+            else:
+                custo_ate_servico, caminho = 0, [atual]
+            rota.adicionar_visita_servico(service_id, u, v, tabela.demanda[service_id], tabela.custo_servico[service_id], custo_ate_servico, caminho)
+            atual = v
+        custo_retorno, caminho_retorno = grafo.get_shortest_path(atual, grafo.deposito) if atual != grafo.deposito else (0, [atual])
+        rota.adicionar_retorno_deposito(custo_retorno, caminho_retorno)
+        rotas.append(rota)
+    return rotas
+
+
+def validar_solucao(grafo, solucao):
+    """Confere uma solução lida contra o Grafo da instância.
+
+    Verifica: cobertura (cada service_id do service_map atendido exatamente uma vez,
+    sem IDs desconhecidos), extremidades de cada visita compatíveis com o serviço,
+    capacidade de cada rota, e demanda/custo declarados (por rota e total) contra os
+    valores recalculados com as matrizes de caminhos mínimos. O custo de uma rota é o
+    dos deslocamentos depósito -> u1, v1 -> u2, ..., vk -> depósito mais os custos de
+    serviço. Com NumPy e a matriz densa, o recálculo é feito de forma vetorizada.
+
+    Returns:
+        ResultadoValidacao: (valida, erros, custo recalculado, custos e demandas por rota).
+    """
+    if grafo.dist_matrix is None:
+        grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
+    servicos = grafo.service_map
+    erros = []
+
+    contagem = Counter()
+    for rota in solucao.rotas:
+        contagem.update(rota.servicos)
+    desconhecidos = sorted(sid for sid in contagem if sid not in servicos)
+    faltando = sorted(sid for sid in servicos if sid not in contagem)
+    repetidos = sorted(sid for sid, vezes in contagem.items() if vezes > 1 and sid in servicos)
+    if desconhecidos:
+        erros.append(f"Serviços desconhecidos: {_resumir(desconhecidos)}")
+    if faltando:
+        erros.append(f"Serviços não atendidos: {_resumir(faltando)}")
+    if repetidos:
+        erros.append(f"Serviços atendidos mais de uma vez: {_resumir(repetidos)}")
+
+    tabela = grafo.servicos
+    aresta = ord("E")
+    for rota in solucao.rotas:
+        for service_id, u, v in zip(rota.servicos, rota.origens, rota.destinos):
+            if not tabela.contem(service_id):
+                continue
+            inicio, fim = tabela.origem[service_id], tabela.destino[service_id]
+            if (u, v) != (inicio, fim) and not (tabela.tipo[service_id] == aresta and (v, u) == (inicio, fim)):
+                erros.append(f"Rota {rota.id_rota}: serviço {service_id} visitado como ({u},{v}), esperado ({inicio},{fim}).")
+    if erros:
+        return ResultadoValidacao(False, erros, None, None, None)
+
+    if numpy_disponivel() and isinstance(grafo.dist_matrix, MatrizDensa):
+        custos_rotas, demandas_rotas = _recalcular_numpy(grafo, solucao)
+    else:
+        custos_rotas, demandas_rotas = _recalcular_python(grafo, solucao)
+
+    INF = float("inf")
+    for rota, custo, demanda in zip(solucao.rotas, custos_rotas, demandas_rotas):
+        if demanda > grafo.capacidade:
+            erros.append(f"Rota {rota.id_rota}: demanda {demanda} excede a capacidade {grafo.capacidade}.")
+        if demanda != rota.demanda:
+            erros.append(f"Rota {rota.id_rota}: demanda declarada {rota.demanda}, recalculada {demanda}.")
+        if custo == INF:
+            erros.append(f"Rota {rota.id_rota}: há trechos sem caminho entre visitas consecutivas.")
+        elif custo != rota.custo:
+            erros.append(f"Rota {rota.id_rota}: custo declarado {rota.custo}, recalculado {custo}.")
+
+    custo_total = sum(custos_rotas)
+    if custo_total != solucao.custo_total:
+        erros.append(f"Custo total declarado {solucao.custo_total}, recalculado {custo_total}.")
+    return ResultadoValidacao(not erros, erros, custo_total, custos_rotas, demandas_rotas)
+
+
+def _resumir(ids, limite=10):
+    texto = ", ".join(str(i) for i in ids[:limite])
+    return texto + (f" ... ({len(ids)} no total)" if len(ids) > limite else "")
+
+
+def _recalcular_python(grafo, solucao):
+    distancia = grafo.get_custo_caminho
+    tabela = grafo.servicos
+    deposito = grafo.deposito
+    custos, demandas = [], []
+    for rota in solucao.rotas:
+        custo = demanda = 0
+        atual = deposito
+        for service_id, u, v in zip(rota.servicos, rota.origens, rota.destinos):
+            custo += distancia(atual, u) + tabela.custo_servico[service_id]
+            demanda += tabela.demanda[service_id]
+            atual = v
+        custos.append(custo + distancia(atual, deposito))
+        demandas.append(demanda)
+    return custos, demandas
+
+
+def _recalcular_numpy(grafo, solucao):
+    """Recalcula custos e demandas de todas as rotas com poucas operações vetorizadas."""
+    np = importar_numpy()
+    matriz = grafo.dist_matrix
+    dist_inteiras = matriz.dados.typecode == "q" if isinstance(matriz.dados, array) else matriz.dados.format == "q"
+    dist = np.frombuffer(matriz.dados, dtype=np.int64 if dist_inteiras else np.float64).reshape(matriz.n, matriz.n)
+
+    # Colunas da tabela de serviços (por service_id) e índices dos nós na matriz
+    tabela = grafo.servicos
+    custo_servico = np.frombuffer(tabela.custo_servico, dtype=np.int64 if tabela.custo_servico.typecode == "q" else np.float64)
+    demanda_servico = np.frombuffer(tabela.demanda, dtype=np.int64 if tabela.demanda.typecode == "q" else np.float64)
+    inteiros = dist_inteiras and tabela.custo_servico.typecode == "q"
+    indice = matriz.indice
+
+    # Todas as visitas concatenadas; cada rota ganha os trechos depósito -> u1 ... vk -> depósito
+    tamanhos = np.array([len(rota.servicos) for rota in solucao.rotas], dtype=np.int64)
+    ids = np.array([sid for rota in solucao.rotas for sid in rota.servicos], dtype=np.int64)
+    origens = np.array([indice[u] for rota in solucao.rotas for u in rota.origens], dtype=np.int64)
+    destinos = np.array([indice[v] for rota in solucao.rotas for v in rota.destinos], dtype=np.int64)
+    deposito = indice[grafo.deposito]
+
+    inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1])) if len(tamanhos) else tamanhos
+    anteriores = np.empty_like(origens)
+    anteriores[1:] = destinos[:-1]
+    anteriores[inicios[tamanhos > 0]] = deposito
+    trechos = dist[anteriores, origens]
+
+    ultimos = np.full(len(tamanhos), deposito, dtype=np.int64)
+    ultimos[tamanhos > 0] = destinos[(inicios + tamanhos - 1)[tamanhos > 0]]
+    retornos = dist[ultimos, deposito]
+
+    sem_caminho = (trechos == SEM_CAMINHO) if dist_inteiras else np.isinf(trechos)
+    custo_visita = trechos + custo_servico[ids]
+    rota_da_visita = np.repeat(np.arange(len(tamanhos)), tamanhos)
+    custos = np.bincount(rota_da_visita, weights=custo_visita, minlength=len(tamanhos)) + retornos
+    invalidas = np.bincount(rota_da_visita, weights=sem_caminho, minlength=len(tamanhos)) > 0
+    invalidas |= (retornos == SEM_CAMINHO) if dist_inteiras else np.isinf(retornos)
+    demandas = np.bincount(rota_da_visita, weights=demanda_servico[ids], minlength=len(tamanhos))
+
+    INF = float("inf")
+    custos_rotas = [INF if invalida else (int(c) if inteiros else float(c)) for c, invalida in zip(custos.tolist(), invalidas.tolist())]
+    demandas_rotas = [int(d) if d.is_integer() else d for d in demandas.tolist()]
+    return custos_rotas, demandas_rotas
+
+
+def validar_pasta(pasta_solucoes, pastas_instancias):
+    """Valida todos os sol-*.dat de uma pasta contra as instâncias de mesmo nome.
+
+    Returns:
+        dict: {nome do arquivo de solução: ResultadoValidacao ou mensagem de erro (str)}.
+    """
+    from carregamento_lote import listar_arquivos_instancias
+    from parser import ler_instancia
+
+    instancias = {os.path.basename(c): c for c in reversed(listar_arquivos_instancias(pastas_instancias))}
+    resultados = {}
+    for nome in sorted(os.listdir(pasta_solucoes)):
+        if not (nome.startswith("sol-") and nome.endswith(".dat")):
+            continue
+        caminho_instancia = instancias.get(nome[len("sol-"):])
+        if caminho_instancia is None:
+            resultados[nome] = "Instância correspondente não encontrada."
+            continue
+        try:
+            grafo = ler_instancia(caminho_instancia, info=_sem_mensagem, aviso=_sem_mensagem)
+            grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
+            resultados[nome] = validar_solucao(grafo, ler_solucao(os.path.join(pasta_solucoes, nome)))
+        except ValueError as e:
+            resultados[nome] = str(e)
+    return resultados
+
+
+def _sem_mensagem(mensagem):
+    pass
+
+
+# Uso: python leitor_solucao.py [pasta_solucoes] [pastas_instancias ...]
+if __name__ == '__main__':
+    import contextlib
+    import io
+    import time
+
+    pasta = sys.argv[1] if len(sys.argv) > 1 else "solucoes_etapa2"
+    pastas_instancias = sys.argv[2:] or ["selected_instances"]
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultados = validar_pasta(pasta, pastas_instancias)
+    invalidas = 0
+    for nome, resultado in resultados.items():
+        if isinstance(resultado, str) or not resultado.valida:
+            invalidas += 1
+            print(f"{nome}: {resultado if isinstance(resultado, str) else '; '.join(resultado.erros)}")
+    print(f"{len(resultados)} soluções verificadas em {time.perf_counter() - inicio:.2f} s ({invalidas} inválidas).")
@@ -1,19 +1,39 @@
-from busca_local import two_opt, relocate, swap
+import time
+INICIO_PROGRAMA = time.perf_counter() # Referência para medir o tempo de inicialização
+
+import importlib
 import os
 import sys
-import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from parser import ler_arquivo_dat
-from grafo import Grafo
-from estatisticas import calcular_estatisticas
-from heuristica_path_scanning import construir_solucao_path_scanning, construir_solucao_path_scanning_multi
-from melhoria import melhorar_solucao_2opt
-from algoritmo_genetico_avancado import otimizar_com_algoritmo_genetico_avancado
-from gerar_arquivo_solucao import escrever_arquivo_solucao
-from entrada_manual import ler_dados_via_input
-from ruin_and_recreate import ruin_and_recreate   # << INTEGRAÇÃO DO R&R
+from solucionador import preparar_caminhos_minimos, PASTA_SOLUCOES_OTIMIZADAS
+
+# Fases do programa: nome -> (módulo, função). O módulo de cada fase só é importado
+# quando ela roda (ver fase()), então calcular só as estatísticas de uma instância
+# não paga pela importação da busca local, do AG etc.
+FASES = {
+    "estatisticas": ("estatisticas", "calcular_estatisticas"),
+    "path_scanning": ("heuristica_path_scanning", "construir_solucao_path_scanning"),
+    "escrever_solucao": ("gerar_arquivo_solucao", "escrever_arquivo_solucao"),
+    "otimizacao": ("solucionador", "resolver_instancia"),
+    "entrada_manual": ("entrada_manual", "ler_dados_via_input"),
+}
+
+# Pasta do cache em disco das matrizes de caminhos mínimos (ver cache_matrizes.py)
+PASTA_CACHE_MATRIZES = "cache_matrizes"
+# Pastas onde as instâncias .dat são procuradas (as inexistentes são ignoradas)
+PASTAS_INSTANCIAS = [
+    "selected_instances",
+    "../G0/G0",
+    "../dados/dados/MCGRP"
+]
+
+def fase(nome):
+    """Retorna a função da fase `nome` (ver FASES), importando seu módulo na primeira chamada."""
+    modulo, funcao = FASES[nome]
+    return getattr(importlib.import_module(modulo), funcao)
 
 def listar_instancias(pasta):
     try:
@@ -60,7 +80,7 @@ def executar_etapa1(grafo):
         print("Erro: Grafo não carregado.")
         return False
     try:
-        stats = calcular_estatisticas(grafo)
+        stats = fase("estatisticas")(grafo)
         print("\n=== Estatísticas do Grafo ===")
         for k, v in stats.items():
             print(f"{k}: {v}")
@@ -80,14 +100,14 @@ def executar_etapa2(grafo, nome_instancia):
 
     try:
         if grafo.dist_matrix is None:
-            print("Calculando matrizes de caminhos mínimos (Floyd-Warshall)...", end=" ", flush=True)
+            print("Calculando matrizes de caminhos mínimos...", end=" ", flush=True)
             start_fw = time.time()
-            grafo.calcular_distancias_predecessores_floyd_warshall()
+            grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
             end_fw = time.time()
             print(f"Concluído em {end_fw - start_fw:.4f} segundos.")
 
         print("Construindo rotas com Path-Scanning...", end=" ", flush=True)
-        rotas, custo_total, tempo_heuristica = construir_solucao_path_scanning(grafo)
+        rotas, custo_total, tempo_heuristica = fase("path_scanning")(grafo)
         print(f"Concluído em {tempo_heuristica:.4f} segundos.")
 
         pasta_solucoes = "solucoes_etapa2"
@@ -96,7 +116,7 @@ def executar_etapa2(grafo, nome_instancia):
         nome_arquivo_solucao = f"sol-{nome_base_instancia}.dat"
         caminho_arquivo_saida = os.path.join(pasta_solucoes, nome_arquivo_solucao)
 
-        escrever_arquivo_solucao(rotas, custo_total, grafo, caminho_arquivo_saida)
+        fase("escrever_solucao")(rotas, custo_total, grafo, caminho_arquivo_saida)
 
         print(f"\nSolução da Etapa 2 gerada para a instância {nome_instancia}.")
         print(f"Custo Total: {int(round(custo_total))}")
@@ -112,7 +132,7 @@ def executar_etapa2(grafo, nome_instancia):
         traceback.print_exc()
     return None
 
-def main():
+def main(solucao_inicial=None, apenas_estatisticas=False, workers=1):
     print("==================================================")
     print("   Trabalho Prático - Algoritmos em Grafos")
     print("==================================================")
@@ -121,12 +141,7 @@ def main():
     nome_instancia_carregada = None
     caminho_instancia_carregada = None
 
-    pastas_instancias = [
-        "selected_instances",
-        "../G0/G0",
-        "../dados/dados/MCGRP"
-    ]
-    pastas_validas = [p for p in pastas_instancias if os.path.isdir(p)]
+    pastas_validas = [p for p in PASTAS_INSTANCIAS if os.path.isdir(p)]
 
     print("\n=== Modo de entrada ===")
     print("[1] Escolher uma instância da pasta 'selected_instances' (ou outras configuradas)")
@@ -153,7 +168,7 @@ def main():
     elif escolha_modo == "2":
         print("\n--- Inserção Manual de Grafo (Etapa 1) ---")
         try:
-            grafo_obj = ler_dados_via_input()
+            grafo_obj = fase("entrada_manual")()
             if grafo_obj:
                 print("Grafo criado manualmente com sucesso.")
                 nome_instancia_carregada = "Manual"
@@ -168,81 +183,28 @@ def main():
         return
 
     if grafo_obj:
+        preparar_caminhos_minimos(grafo_obj, PASTA_CACHE_MATRIZES)
         sucesso_stats = executar_etapa1(grafo_obj)
 
-        if sucesso_stats and nome_instancia_carregada != "Manual":
+        if not apenas_estatisticas and sucesso_stats and nome_instancia_carregada != "Manual":
             print("\n--- Gerando Solução Otimizada (Todas as Estratégias) ---")
-            # 1. Path-Scanning Multi-Start
-            rotas_iniciais, custo_inicial, tempo_inicial = construir_solucao_path_scanning_multi(grafo_obj, tentativas=30)
-            print(f'[Multi-Start] Melhor custo inicial encontrado: {custo_inicial}')
-
-            capacidade_maxima = grafo_obj.capacidade
-
-            # 2. Otimização Conservadora
-            rotas_conserv, custo_conserv, tempo_conserv = melhorar_solucao_2opt(grafo_obj, rotas_iniciais)
-            print(f'[Conservadora] Custo após otimização conservadora: {custo_conserv}')
-
-            # 3. Busca Local Avançada (2-opt, relocate, swap)
-            melhor_rotas = [r for r in rotas_iniciais]
-            for i, rota in enumerate(melhor_rotas):
-                rota.sequencia_visitas_detalhada = two_opt(rota.sequencia_visitas_detalhada, grafo_obj)
-                if hasattr(rota, "atualizar_demanda_custo"):
-                    rota.atualizar_demanda_custo(grafo_obj)
-
-            for ciclo in range(3):
-                melhor_rotas = relocate(melhor_rotas, grafo_obj, capacidade_maxima)
-                for rota in melhor_rotas:
-                    rota.sequencia_visitas_detalhada = two_opt(rota.sequencia_visitas_detalhada, grafo_obj)
-                    if hasattr(rota, "atualizar_demanda_custo"):
-                        rota.atualizar_demanda_custo(grafo_obj)
-            for ciclo in range(3):
-                melhor_rotas = swap(melhor_rotas, grafo_obj, capacidade_maxima)
-                for rota in melhor_rotas:
-                    rota.sequencia_visitas_detalhada = two_opt(rota.sequencia_visitas_detalhada, grafo_obj)
-                    if hasattr(rota, "atualizar_demanda_custo"):
-                        rota.atualizar_demanda_custo(grafo_obj)
-            custo_melhorado = sum(rota.custo_acumulado for rota in melhor_rotas)
-            print(f'[Busca Local] Custo após melhorias locais: {custo_melhorado}')
-
-            # 4. Algoritmo Genético Avançado sobre a melhor solução encontrada até aqui
-            rotas_rr, custo_rr, tempo_ag = otimizar_com_algoritmo_genetico_avancado(grafo_obj, melhor_rotas)
-            print(f'[Algoritmo Genético Avançado] Custo após AG: {custo_rr}')
-
-            # Seleciona a melhor entre as quatro estratégias
-            melhor_solucao = rotas_iniciais
-            melhor_custo_final = custo_inicial
-            metodo = "Path-Scanning Multi-Start"
-            if custo_conserv < melhor_custo_final:
-                melhor_solucao = rotas_conserv
-                melhor_custo_final = custo_conserv
-                metodo = "Otimização Conservadora"
-            if custo_melhorado < melhor_custo_final:
-                melhor_solucao = melhor_rotas
-                melhor_custo_final = custo_melhorado
-                metodo = "Busca Local Avançada"
-            if custo_rr < melhor_custo_final:
-                melhor_solucao = rotas_rr
-                melhor_custo_final = custo_rr
-                metodo = "Ruin & Recreate"
-            print(f'[FINAL] Melhor método: {metodo}, Custo final: {melhor_custo_final}')
-
-            pasta_solucoes_otimizadas = "solucoes_otimizadas"
-            os.makedirs(pasta_solucoes_otimizadas, exist_ok=True)
-            nome_base_instancia = os.path.splitext(nome_instancia_carregada)[0]
-            nome_arquivo_solucao_otimizada = f"sol-{nome_base_instancia}.dat"
-            caminho_arquivo_saida_otimizada = os.path.join(pasta_solucoes_otimizadas, nome_arquivo_solucao_otimizada)
-
-            escrever_arquivo_solucao(melhor_solucao, melhor_custo_final, grafo_obj, caminho_arquivo_saida_otimizada)
+            resultado = fase("otimizacao")(grafo_obj, nome_instancia_carregada, PASTA_SOLUCOES_OTIMIZADAS,
+                                           solucao_inicial=solucao_inicial, workers_construcao=workers)
 
             print(f"\nSolução Otimizada gerada para a instância {nome_instancia_carregada}.")
-            print(f"Custo Inicial (Path-Scanning): {int(round(custo_inicial))}")
-            print(f"Custo Conservadora: {int(round(custo_conserv))}")
-            print(f"Custo Busca Local: {int(round(custo_melhorado))}")
-            print(f"Custo Ruin & Recreate: {int(round(custo_rr))}")
-            print(f"Custo Otimizado (Melhor): {int(round(melhor_custo_final))}")
-            print(f"Número de Rotas (Inicial): {len(rotas_iniciais)}")
-            print(f"Arquivo de solução otimizada salvo em: {caminho_arquivo_saida_otimizada}")
-        else:
+            origem_inicial = "Path-Scanning" if resultado["inicio"] == "path_scanning" else "Solução Carregada"
+            print(f"Custo Inicial ({origem_inicial}): {int(round(resultado['custo_path_scanning']))}")
+            if "custo_split" in resultado:
+                print(f"Custo Split (Tour Gigante): {int(round(resultado['custo_split']))}")
+            print(f"Custo Conservadora: {int(round(resultado['custo_conservadora']))}")
+            print(f"Custo Busca Local: {int(round(resultado['custo_busca_local']))}")
+            print(f"Custo Ruin & Recreate: {int(round(resultado['custo_ag']))}")
+            print(f"Custo Otimizado (Melhor): {int(round(resultado['custo_final']))}")
+            print(f"Número de Rotas (Inicial): {resultado['rotas_iniciais']}")
+            print(f"Arquivo de solução otimizada salvo em: {resultado['arquivo']}")
+            cache = grafo_obj.estatisticas_cache_caminhos()
+            print(f"Cache de caminhos: {cache['hits']} acertos, {cache['misses']} falhas (taxa de acerto {cache['taxa_acerto']:.1%})")
+        elif not apenas_estatisticas:
             print("Não foi possível gerar a solução inicial para otimização.")
     else:
         print("Não foi possível carregar ou criar o grafo.")
@@ -250,8 +212,28 @@ def main():
     print("\nEncerrando o programa.")
 
 if __name__ == "__main__":
+    import argparse
+
+    argumentos = argparse.ArgumentParser(description="Trabalho Prático - Algoritmos em Grafos")
+    argumentos.add_argument("--solucao-inicial", metavar="ARQUIVO",
+                            help="sol-*.dat de uma execução anterior usado como ponto de partida da otimização")
+    argumentos.add_argument("--stats-only", action="store_true",
+                            help="Apenas lê a instância e calcula as estatísticas (sem otimização)")
+    argumentos.add_argument("--semente", type=int, default=None,
+                            help="Semente dos geradores aleatórios (torna a execução reproduzível)")
+    argumentos.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Processos usados pelas partidas do Path-Scanning (padrão: núcleos da máquina)")
+    opcoes = argumentos.parse_args()
+    if opcoes.semente is not None:
+        import random
+        random.seed(opcoes.semente)
+    if opcoes.stats_only:
+        print(f"Inicialização: {(time.perf_counter() - INICIO_PROGRAMA) * 1000:.1f} ms")
+    # O caminho é relativo à pasta de onde o programa foi chamado, não à do projeto
+    solucao_inicial = os.path.abspath(opcoes.solucao_inicial) if opcoes.solucao_inicial else None
+
     abspath = os.path.abspath(__file__)
     dname = os.path.dirname(abspath)
     if dname:
         os.chdir(dname)
-    main()
+    main(solucao_inicial, opcoes.stats_only, opcoes.workers)
@@ -0,0 +1,278 @@
+import mmap
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+
+INF = float("inf")
+SEM_PREDECESSOR = -1 # Marca "sem predecessor" na matriz de predecessores compacta
+SEM_CAMINHO = -1     # Marca "sem caminho" quando as distâncias são guardadas como inteiros
+
+
+class MatrizDensa(Mapping):
+    """Matriz V x V armazenada de forma contígua, indexada pelos IDs dos vértices.
+
+    Os valores ficam em um único vetor plano (linha-major) e o mapeamento
+    ID do vértice <-> índice é mantido em `nos`/`indice`. Para quem consome,
+    a matriz se comporta como o antigo dicionário de dicionários
+    ({origem: {destino: valor}}): `m[u][v]`, `m.get(u, {}).get(v)`, `u in m`,
+    iteração sobre origens e destinos etc.
+    """
+
+    def __init__(self, nos, dados, predecessores=False):
+        """Cria a matriz a partir de um vetor plano já preenchido.
+
+        Args:
+            nos (list): IDs dos vértices na ordem dos índices (0 a n-1).
+            dados (array): Vetor plano com n*n valores. Para distâncias, valores
+                negativos (SEM_CAMINHO) representam ausência de caminho.
+            predecessores (bool): Se True, os valores são índices de vértices
+                (SEM_PREDECESSOR para nenhum) e são traduzidos de volta para IDs.
+        """
+        self.nos = list(nos)
+        self.indice = {no: i for i, no in enumerate(self.nos)}
+        self.n = len(self.nos)
+        self.dados = dados
+        self.predecessores = predecessores
+
+    def __getitem__(self, origem):
+        return _LinhaMatriz(self, self.indice[origem] * self.n)
+
+    def valor(self, origem, destino):
+        """Acesso escalar direto a m[origem][destino], sem criar a visão da linha.
+
+        É a forma indicada para laços críticos (busca local, custo de rotas).
+        """
+        indice = self.indice
+        valor = self.dados[indice[origem] * self.n + indice[destino]]
+        if self.predecessores:
+            return None if valor == SEM_PREDECESSOR else self.nos[valor]
+        return valor if valor >= 0 else INF
+
+    def __contains__(self, origem):
+        return origem in self.indice
+
+    def __iter__(self):
+        return iter(self.nos)
+
+    def __len__(self):
+        return self.n
+
+    def __getstate__(self):
+        # Matrizes carregadas do cache apontam para um mmap (memoryview), que não é
+        # serializável; ao enviar para outro processo os dados são copiados para um array.
+        estado = self.__dict__.copy()
+        if isinstance(self.dados, memoryview):
+            estado["dados"] = _para_array(self.dados)
+        return estado
+
+    def tornar_gravavel(self, em_mmap=False):
+        """Garante que os dados possam ser alterados no lugar (atualizações incrementais).
+
+        Matrizes carregadas do cache em disco apontam para um mmap somente leitura;
+        nesse caso os dados são copiados para um array (ou mmap anônimo, se em_mmap).
+        """
+        if isinstance(self.dados, memoryview) and self.dados.readonly:
+            dados = _para_array(self.dados)
+            self.dados = copiar_para_mmap(dados) if em_mmap else dados
+
+
+class _LinhaMatriz(Mapping):
+    """Visão (sem cópia) de uma linha da MatrizDensa."""
+    __slots__ = ("_matriz", "_base")
+
+    def __init__(self, matriz, base):
+        self._matriz = matriz
+        self._base = base
+
+    def __getitem__(self, destino):
+        matriz = self._matriz
+        valor = matriz.dados[self._base + matriz.indice[destino]]
+        if matriz.predecessores:
+            return None if valor == SEM_PREDECESSOR else matriz.nos[valor]
+        return valor if valor >= 0 else INF
+
+    def __contains__(self, destino):
+        return destino in self._matriz.indice
+
+    def __iter__(self):
+        return iter(self._matriz.nos)
+
+    def __len__(self):
+        return self._matriz.n
+
+
+class LinhasSobDemanda:
+    """Linhas de caminhos mínimos calculadas na primeira consulta e mantidas em cache LRU.
+
+    Cada linha (distâncias e predecessores a partir de uma origem) é produzida
+    por `calcular_linhas(inicio, fim)`, com a mesma assinatura de retorno de
+    grafo._dijkstra_lote. Quando o número de linhas guardadas excede o orçamento
+    de memória, as usadas há mais tempo são descartadas.
+    """
+
+    def __init__(self, nos, calcular_linhas, orcamento_bytes, bytes_por_linha):
+        self.nos = list(nos)
+        self.indice = {no: i for i, no in enumerate(self.nos)}
+        self.n = len(self.nos)
+        self.calcular_linhas = calcular_linhas
+        self.max_linhas = max(1, orcamento_bytes // max(1, bytes_por_linha))
+        self.linhas = OrderedDict() # {índice da origem: (linha_dist, linha_pred)}
+        self.linhas_calculadas = 0
+        self.linhas_descartadas = 0
+
+    def linha(self, i):
+        """Retorna (linha_dist, linha_pred) da origem de índice i, calculando se necessário."""
+        par = self.linhas.get(i)
+        if par is not None:
+            self.linhas.move_to_end(i)
+            return par
+        _, _, linha_dist, linha_pred = self.calcular_linhas(i, i + 1)
+        par = (linha_dist, linha_pred)
+        self.linhas[i] = par
+        self.linhas_calculadas += 1
+        if len(self.linhas) > self.max_linhas:
+            self.linhas.popitem(last=False)
+            self.linhas_descartadas += 1
+        return par
+
+    def reiniciar(self, calcular_linhas):
+        """Descarta todas as linhas guardadas e passa a usar uma nova função de cálculo."""
+        self.calcular_linhas = calcular_linhas
+        self.linhas.clear()
+
+
+class MatrizSobDemanda(Mapping):
+    """Matriz de caminhos mínimos cujas linhas são calculadas sob demanda.
+
+    Oferece a mesma interface de leitura da MatrizDensa (`m[u][v]`, `m.valor(u, v)`,
+    iteração), mas nenhuma linha existe antes de ser consultada. Distâncias e
+    predecessores compartilham o mesmo LinhasSobDemanda.
+    """
+
+    def __init__(self, linhas, predecessores=False):
+        self.linhas = linhas
+        self.nos = linhas.nos
+        self.indice = linhas.indice
+        self.n = linhas.n
+        self.predecessores = predecessores
+
+    def _vetor(self, origem):
+        return self.linhas.linha(self.indice[origem])[1 if self.predecessores else 0]
+
+    def __getitem__(self, origem):
+        return _LinhaMatriz(_VetorLinha(self, self._vetor(origem)), 0)
+
+    def valor(self, origem, destino):
+        """Acesso escalar direto a m[origem][destino] (calcula a linha da origem se preciso)."""
+        valor = self._vetor(origem)[self.indice[destino]]
+        if self.predecessores:
+            return None if valor == SEM_PREDECESSOR else self.nos[valor]
+        return valor if valor >= 0 else INF
+
+    def __contains__(self, origem):
+        return origem in self.indice
+
+    def __iter__(self):
+        return iter(self.nos)
+
+    def __len__(self):
+        return self.n
+
+
+class _VetorLinha:
+    """Adapta uma única linha da MatrizSobDemanda à interface usada por _LinhaMatriz."""
+    __slots__ = ("dados", "indice", "nos", "n", "predecessores")
+
+    def __init__(self, matriz, dados):
+        self.dados = dados
+        self.indice = matriz.indice
+        self.nos = matriz.nos
+        self.n = matriz.n
+        self.predecessores = matriz.predecessores
+
+
+def alocar_dados(tipo, tamanho, valor_inicial, em_mmap=False):
+    """Aloca um vetor plano de `tamanho` posições do tipo indicado ('q', 'd' ou 'i').
+
+    Com em_mmap=True o vetor fica em um mmap anônimo: as páginas são reservadas
+    sob demanda pelo sistema operacional e podem ir para o swap sem pressionar o
+    heap do Python, o que ajuda nas instâncias com milhares de vértices.
+    """
+    if not em_mmap:
+        return array(tipo, [valor_inicial]) * tamanho
+
+    bloco = array(tipo, [valor_inicial]) * min(tamanho, 1 << 16)
+    dados = _mmap_anonimo(tipo, tamanho)
+    for inicio in range(0, tamanho, len(bloco)):
+        fim = min(inicio + len(bloco), tamanho)
+        dados[inicio:fim] = bloco[:fim - inicio]
+    return dados
+
+
+def copiar_para_mmap(dados):
+    """Copia um array já preenchido para um mmap anônimo (ver alocar_dados)."""
+    copia = _mmap_anonimo(dados.typecode, len(dados))
+    copia[:] = dados
+    return copia
+
+
+def _para_array(dados):
+    copia = array(dados.format)
+    copia.frombytes(dados.cast("B"))
+    return copia
+
+
+def _mmap_anonimo(tipo, tamanho):
+    tamanho_item = array(tipo).itemsize
+    mapa = mmap.mmap(-1, max(tamanho * tamanho_item, tamanho_item))
+    return memoryview(mapa).cast(tipo)[:tamanho]
+
+
+def matriz_vazia(predecessores=False):
+    """Retorna uma MatrizDensa sem vértices (grafo vazio)."""
+    return MatrizDensa([], array("i" if predecessores else "q"), predecessores=predecessores)
+
+
+def matrizes_de_numpy(nos, dist, pred, inteiros):
+    """Converte as matrizes NumPy (float64 / int) em um par de MatrizDensa.
+
+    Os dados são copiados para `array` da biblioteca padrão, o que torna o acesso
+    escalar (`m[u][v]`) bem mais barato que indexar um ndarray elemento a elemento.
+    Se todos os custos do grafo forem inteiros, as distâncias são guardadas como
+    inteiros de 64 bits, preservando o tipo dos custos que o restante do código
+    espera (ex.: custos impressos no arquivo de solução).
+    """
+    import numpy as np
+
+    if inteiros:
+        dist_plano = np.where(np.isinf(dist), SEM_CAMINHO, dist).astype(np.int64)
+        dados_dist = array("q")
+    else:
+        dist_plano = dist.astype(np.float64)
+        dados_dist = array("d")
+    dados_dist.frombytes(np.ascontiguousarray(dist_plano).tobytes())
+
+    dados_pred = array("i")
+    dados_pred.frombytes(np.ascontiguousarray(pred, dtype=np.intc).tobytes())
+
+    return MatrizDensa(nos, dados_dist), MatrizDensa(nos, dados_pred, predecessores=True)
+
+
+def matrizes_de_dicionarios(dist, pred):
+    """Converte matrizes no formato dicionário de dicionários em um par de MatrizDensa."""
+    nos = list(dist)
+    indice = {no: i for i, no in enumerate(nos)}
+    inteiros = all(isinstance(valor, int) or valor == INF for linha in dist.values() for valor in linha.values())
+
+    dados_dist = array("q" if inteiros else "d")
+    dados_pred = array("i")
+    for origem in nos:
+        linha_dist = dist[origem]
+        linha_pred = pred[origem]
+        for destino in nos:
+            valor = linha_dist.get(destino, INF)
+            dados_dist.append(SEM_CAMINHO if inteiros and valor == INF else valor)
+            anterior = linha_pred.get(destino)
+            dados_pred.append(SEM_PREDECESSOR if anterior is None else indice[anterior])
+
+    return MatrizDensa(nos, dados_dist), MatrizDensa(nos, dados_pred, predecessores=True)
@@ -0,0 +1,80 @@
+from array import array
+
+from matriz_densa import INF, SEM_CAMINHO
+
+
+class MatrizServicos:
+    """Custos de deslocamento entre serviços, indexados por service_id.
+
+    A posição [i][j] guarda o custo do caminho mínimo do fim do serviço i
+    (endpoints[1]) até o início do serviço j (endpoints[0]); o índice 0
+    representa o depósito. Com isso o custo de uma rota descrita como lista de
+    service_ids é obtido só com indexação, sem consultar a matriz V x V nem
+    reconstruir caminhos. Para instâncias com S serviços a matriz tem
+    (S+1) x (S+1) posições, normalmente muito menos que V x V.
+    """
+
+    def __init__(self, grafo):
+        """Constrói a matriz a partir da tabela de serviços e das matrizes de caminhos do grafo."""
+        tabela = grafo.servicos
+        self.n = len(tabela.tipo)
+        n = self.n
+
+        # Pontos de partida/chegada por índice; o depósito ocupa o índice 0
+        inicio = tabela.origem.tolist()
+        fim = tabela.destino.tolist()
+        inicio[0] = fim[0] = grafo.deposito
+        self.valido = array("b", (1 if tipo else 0 for tipo in tabela.tipo))
+        self.valido[0] = 1
+        self.demanda = array(tabela.demanda.typecode, tabela.demanda)
+        custos_servico = tabela.custo_servico.tolist()
+
+        custos = []
+        for i in range(n):
+            origem = fim[i]
+            for j in range(n):
+                custos.append(grafo.get_custo_caminho(origem, inicio[j]) if self.valido[i] and self.valido[j] else INF)
+
+        self.inteiros = all(isinstance(c, int) for c in custos if c != INF) and all(isinstance(c, int) for c in custos_servico)
+        if self.inteiros:
+            self.dados = array("q", (SEM_CAMINHO if c == INF else c for c in custos))
+            self.custo_servico = array("q", custos_servico)
+        else:
+            self.dados = array("d", custos)
+            self.custo_servico = array("d", custos_servico)
+
+    def custo(self, i, j):
+        """Custo do fim do serviço i até o início do serviço j (0 = depósito)."""
+        valor = self.dados[i * self.n + j]
+        return valor if valor >= 0 else INF
+
+    def custo_rota(self, servicos):
+        """Calcula (custo, demanda) de uma rota depósito -> servicos... -> depósito.
+
+        Equivale a melhoria.calcular_custo_rota_completa: inclui deslocamentos e
+        custos de serviço. Retorna (inf, inf) se algum serviço for desconhecido ou
+        algum trecho for inalcançável.
+        """
+        n = self.n
+        dados = self.dados
+        valido = self.valido
+        custo_servico = self.custo_servico
+        demanda_servico = self.demanda
+
+        custo = 0
+        demanda = 0
+        anterior = 0
+        for service_id in servicos:
+            if not 0 < service_id < n or not valido[service_id]:
+                return INF, INF
+            trecho = dados[anterior * n + service_id]
+            if trecho < 0:
+                return INF, INF
+            custo += trecho + custo_servico[service_id]
+            demanda += demanda_servico[service_id]
+            anterior = service_id
+
+        trecho = dados[anterior * n]
+        if trecho < 0:
+            return INF, INF
+        return custo + trecho, demanda
@@ -1,11 +1,15 @@
 import copy
 import time
 from rota import Rota
+from prefixos_rota import PrefixosRota
 
 def calcular_custo_rota_completa(grafo, rota_sequencia, deposito_id):
     """Calcula o custo total de uma rota dada sua sequência de nós e serviços.
     Isso é necessário para avaliar o impacto de movimentos na busca local.
     """
+    if deposito_id == grafo.deposito:
+        # Custos entre serviços pré-calculados: a rota é avaliada só com indexação
+        return grafo.get_matriz_servicos().custo_rota(rota_sequencia)
     custo_total = 0
     demanda_total = 0
     current_node = deposito_id
@@ -50,18 +54,18 @@ def calcular_custo_rota_completa(grafo, rota_sequencia, deposito_id):
     current_demanda = 0
     current_cost = 0
     servicos_visitados_ids = set()
+    tabela = grafo.servicos
 
     for service_id in rota_sequencia:
-        detalhes = grafo.get_service_details(service_id)
-        if not detalhes:
+        if not tabela.contem(service_id):
             return float("inf"), float("inf") # Erro
 
-        u_servico, v_servico = detalhes["endpoints"]
-        demanda_servico = detalhes["demanda"]
-        custo_servico = detalhes["custo_servico"]
+        u_servico, v_servico = tabela.origem[service_id], tabela.destino[service_id]
+        demanda_servico = tabela.demanda[service_id]
+        custo_servico = tabela.custo_servico[service_id]
 
         # Custo de travessia do nó atual até o início do serviço
-        custo_travessia_para_servico, _ = grafo.get_shortest_path(current_node_for_cost, u_servico)
+        custo_travessia_para_servico = grafo.get_custo_caminho(current_node_for_cost, u_servico)
         if custo_travessia_para_servico == float("inf"):
             return float("inf"), float("inf") # Inalcançável
 
@@ -71,7 +75,7 @@ def calcular_custo_rota_completa(grafo, rota_sequencia, deposito_id):
         servicos_visitados_ids.add(service_id)
 
     # Custo de retorno ao depósito
-    custo_retorno_deposito, _ = grafo.get_shortest_path(current_node_for_cost, deposito_id)
+    custo_retorno_deposito = grafo.get_custo_caminho(current_node_for_cost, deposito_id)
     if custo_retorno_deposito == float("inf"):
         return float("inf"), float("inf") # Inalcançável
 
@@ -96,10 +100,7 @@ def melhorar_solucao_2opt(grafo, rotas_iniciais, max_iteracoes=100):
     # Uma rota será uma lista de service_ids na ordem de visita.
     rotas_para_otimizar = []
     for r in rotas_iniciais:
-        servicos_na_rota = []
-        for item in r.sequencia_visitas_detalhada:
-            if item[0] == 'S':
-                servicos_na_rota.append(item[1]) # Adiciona o service_id
+        servicos_na_rota = list(r.servicos) # service_ids na ordem de visita
         if servicos_na_rota: # Adiciona apenas rotas que realmente atendem serviços
             rotas_para_otimizar.append(servicos_na_rota)
 
@@ -114,25 +115,22 @@ def melhorar_solucao_2opt(grafo, rotas_iniciais, max_iteracoes=100):
             if len(rota_servicos) < 2: # Não é possível aplicar 2-opt em rotas com menos de 2 serviços
                 continue
 
+            # Inverter o segmento i..j não muda a demanda; o delta de custo sai dos vetores de prefixo em O(1)
+            prefixos = PrefixosRota(grafo, rota_servicos)
             for i in range(len(rota_servicos) - 1):
                 for j in range(i + 1, len(rota_servicos)):
-                    # Cria uma nova rota invertendo o segmento entre i e j
-                    nova_rota_servicos = rota_servicos[:i] + rota_servicos[i:j+1][::-1] + rota_servicos[j+1:]
-
-                    # Calcula o custo e demanda da nova rota
-                    novo_custo_rota, nova_demanda_rota = calcular_custo_rota_completa(grafo, nova_rota_servicos, grafo.deposito)
-
-                    # Verifica se a nova rota é válida (não excede capacidade) e se é melhor
-                    custo_rota_original, _ = calcular_custo_rota_completa(grafo, rota_servicos, grafo.deposito)
-                    if nova_demanda_rota <= grafo.capacidade and novo_custo_rota < custo_rota_original:
+                    delta = prefixos.delta_inversao(i, j)
+                    if delta < 0:
                         # Aplica a melhoria
-                        rotas_para_otimizar[idx_rota] = nova_rota_servicos
+                        custo_rota_original = prefixos.custo_total
+                        rota_servicos = rota_servicos[:i] + rota_servicos[i:j+1][::-1] + rota_servicos[j+1:]
+                        prefixos = PrefixosRota(grafo, rota_servicos)
+                        rotas_para_otimizar[idx_rota] = rota_servicos
                         melhoria_encontrada_nesta_iteracao = True
-                        # Atualiza o custo total da solução
                         # Recalcula o custo total de todas as rotas após a melhoria
                         melhor_custo_total = sum(calcular_custo_rota_completa(grafo, r, grafo.deposito)[0] for r in rotas_para_otimizar)
                         melhor_solucao_2opt = copy.deepcopy(rotas_para_otimizar)
-                        print(f"  Melhoria 2-opt na rota {idx_rota+1} (segmento {i}-{j}). Custo original da rota: {custo_rota_original}, Novo custo da rota: {novo_custo_rota}. Novo custo total da solução: {melhor_custo_total}")
+                        print(f"  Melhoria 2-opt na rota {idx_rota+1} (segmento {i}-{j}). Custo original da rota: {custo_rota_original}, Novo custo da rota: {prefixos.custo_total}. Novo custo total da solução: {melhor_custo_total}")
                         # Não quebra aqui, continua buscando melhorias na mesma rota
 
         if not melhoria_encontrada_nesta_iteracao:
@@ -141,14 +139,14 @@ def melhorar_solucao_2opt(grafo, rotas_iniciais, max_iteracoes=100):
 
     # Converter de volta para objetos Rota
     rotas_melhoradas = []
+    tabela = grafo.servicos
     for idx, rota_servicos in enumerate(melhor_solucao_2opt):
         rota_obj = Rota(idx + 1, grafo.deposito)
         
         # Reconstruir a rota com os serviços otimizados
         current_node = grafo.deposito
         for service_id in rota_servicos:
-            detalhes = grafo.get_service_details(service_id)
-            u_servico, v_servico = detalhes["endpoints"]
+            u_servico, v_servico = tabela.origem[service_id], tabela.destino[service_id]
             
             # Adicionar caminho até o serviço
             if current_node != u_servico:
@@ -158,8 +156,8 @@ def melhorar_solucao_2opt(grafo, rotas_iniciais, max_iteracoes=100):
                 caminho_ate_servico = [current_node]
             
             # Adicionar o serviço
-            demanda_servico = detalhes["demanda"]
-            custo_servico = detalhes["custo_servico"]
+            demanda_servico = tabela.demanda[service_id]
+            custo_servico = tabela.custo_servico[service_id]
             rota_obj.adicionar_visita_servico(service_id, u_servico, v_servico, demanda_servico, custo_servico, custo_travessia_ate_servico, caminho_ate_servico)
             current_node = v_servico
         
@@ -0,0 +1,142 @@
+from collections import namedtuple
+
+from adjacencia_csr import AdjacenciaCSR
+
+# Etapa executada logo após a leitura da instância (ver parser.ler_instancia). Ela
+# concentra em um único ponto as verificações que antes só apareciam durante a
+# resolução (custos float("inf") em get_shortest_path, avisos no Path-Scanning):
+#   - índice denso: os vértices recebem índices 0..V-1 na ordem crescente dos IDs,
+#     usados pela adjacência CSR e, portanto, pelas matrizes de caminhos mínimos.
+#     Os IDs originais continuam sendo os usados nas rotas e nos arquivos de solução;
+#   - conexões paralelas: só a de menor custo entre u -> v é mantida na adjacência;
+#   - serviços duplicados: arestas/arcos requeridos com as mesmas extremidades;
+#   - conectividade: todo serviço precisa ser alcançável a partir do depósito e
+#     poder voltar a ele. Caso contrário, a instância não tem solução viável.
+# Quando ela termina sem erro, todo serviço tem caminho de ida e volta ao depósito e
+# grafo.normalizado é True. Com isso, Grafo.distancias_por_indice expõe o vetor plano
+# da matriz de distâncias para os laços críticos (prefixos da busca local, Split,
+# Path-Scanning), que o indexam direto sem testar se o caminho existe. Os grafos não
+# normalizados (entrada manual, ler_instancia com normalizar=False) ou alterados
+# depois (remoção de conexão, serviço novo) seguem por MatrizDensa.valor e pelas
+# verificações de custo float("inf").
+
+RelatorioNormalizacao = namedtuple("RelatorioNormalizacao", [
+    "vertices",               # Número de vértices (V)
+    "ids_contiguos",          # True se os IDs originais já eram 1..V
+    "conexoes_paralelas",     # Conexões descartadas por repetirem u -> v
+    "servicos_duplicados",    # Lista de (service_id, service_id anterior com as mesmas extremidades)
+    "vertices_isolados",      # Vértices fora da componente do depósito que não têm serviços
+])
+
+
+def normalizar_grafo(grafo, aviso=print):
+    """Prepara o grafo lido para os algoritmos de resolução.
+
+    Define grafo.ids_vertices (índice denso -> ID original) e grafo.indice_vertices
+    (ID original -> índice denso), congela a adjacência nessa ordem e verifica a
+    conectividade entre o depósito e os serviços.
+
+    Args:
+        grafo (Grafo): Grafo recém-lido (antes do cálculo dos caminhos mínimos).
+        aviso (callable): Recebe os avisos (serviços duplicados, vértices isolados).
+
+    Returns:
+        RelatorioNormalizacao: O que foi encontrado na instância.
+
+    Raises:
+        ValueError: Se o depósito não for um vértice do grafo ou se algum serviço
+            não puder ser alcançado a partir do depósito (ou não puder voltar a ele).
+    """
+    if grafo.deposito not in grafo.vertices:
+        raise ValueError(f"Depósito {grafo.deposito} não é um vértice do grafo.")
+
+    ids_vertices = sorted(grafo.vertices)
+    grafo.definir_ordem_vertices(ids_vertices)
+    csr = grafo.congelar_adjacencia()
+    indice = grafo.indice_vertices
+    tabela = grafo.servicos
+
+    servicos_duplicados = _servicos_duplicados(tabela)
+    for service_id, anterior in servicos_duplicados:
+        aviso(f"Aviso: Serviço {tabela.ids[service_id]} ({tabela.origem[service_id]}, {tabela.destino[service_id]}) "
+              f"repete as extremidades do serviço {tabela.ids[anterior]}; os dois serão atendidos.")
+
+    ida = _alcancaveis(csr, indice[grafo.deposito])
+    volta = _alcancaveis(_reversa(csr), indice[grafo.deposito])
+    inalcancaveis = [sid for sid in tabela
+                     if not (ida[indice[tabela.origem[sid]]] and volta[indice[tabela.destino[sid]]])]
+    if inalcancaveis:
+        exemplos = ", ".join(str(tabela.ids[sid]) for sid in inalcancaveis[:10])
+        raise ValueError(f"{len(inalcancaveis)} serviço(s) sem caminho de ida e volta ao depósito "
+                         f"{grafo.deposito}: {exemplos}{'...' if len(inalcancaveis) > 10 else ''}")
+
+    vertices_isolados = [ids_vertices[i] for i in range(csr.n) if not (ida[i] and volta[i])]
+    if vertices_isolados:
+        aviso(f"Aviso: {len(vertices_isolados)} vértice(s) sem ida e volta ao depósito (nenhum com serviço).")
+
+    grafo.normalizado = True
+    return RelatorioNormalizacao(
+        vertices=csr.n,
+        ids_contiguos=ids_vertices == list(range(1, csr.n + 1)),
+        conexoes_paralelas=_conexoes_declaradas(grafo) - csr.num_conexoes(),
+        servicos_duplicados=servicos_duplicados,
+        vertices_isolados=vertices_isolados,
+    )
+
+
+def _servicos_duplicados(tabela):
+    """Pares (service_id, primeiro service_id) de arestas/arcos requeridos com as mesmas extremidades."""
+    primeiros = {}
+    duplicados = []
+    for sid in tabela:
+        tipo = tabela.tipo[sid]
+        if tipo == ord("N"):
+            continue
+        chave = (tipo, tabela.origem[sid], tabela.destino[sid])
+        anterior = primeiros.setdefault(chave, sid)
+        if anterior != sid:
+            duplicados.append((sid, anterior))
+    return duplicados
+
+
+def _conexoes_declaradas(grafo):
+    """Conexões direcionadas listadas no arquivo (arestas contam nos dois sentidos)."""
+    tabela = grafo.servicos
+    requeridas = sum(2 if tabela.tipo[sid] == ord("E") else 1 for sid in tabela if tabela.tipo[sid] != ord("N"))
+    return 2 * len(grafo.arestas_nao_req) + len(grafo.arcos_nao_req) + requeridas
+
+
+def _alcancaveis(csr, origem):
+    """bytearray com 1 nos índices alcançáveis a partir de origem (busca em largura)."""
+    visitados = bytearray(csr.n)
+    visitados[origem] = 1
+    fila = [origem]
+    offsets, destinos = csr.offsets, csr.destinos
+    for u in fila: # A lista cresce durante a iteração
+        for v in destinos[offsets[u]:offsets[u + 1]]:
+            if not visitados[v]:
+                visitados[v] = 1
+                fila.append(v)
+    return visitados
+
+
+def _reversa(csr):
+    """AdjacenciaCSR com todas as conexões invertidas (para a busca de volta ao depósito)."""
+    adj = {}
+    nos = csr.nos
+    for i in range(csr.n):
+        for j, custo in csr.vizinhos(i):
+            adj.setdefault(nos[j], []).append((nos[i], custo))
+    return AdjacenciaCSR.de_adjacencia(nos, adj)
+
+
+# Exemplo de uso: normaliza uma instância e mostra o relatório
+if __name__ == '__main__':
+    import sys
+    from parser import ler_instancia
+
+    caminho_instancia = sys.argv[1] if len(sys.argv) > 1 else "selected_instances/BHW1.dat"
+    grafo = ler_instancia(caminho_instancia, info=lambda mensagem: None, normalizar=False)
+    relatorio = normalizar_grafo(grafo)
+    for campo, valor in relatorio._asdict().items():
+        print(f"{campo}: {valor}")
@@ -1,242 +1,289 @@
-import re
 import os # Adicionado para checagem de existência no main
 from grafo import Grafo # Assume que grafo.py está no mesmo diretório ou PYTHONPATH
+from instancia_compilada import carregar_instancia_compilada, eh_instancia_compilada
+from normalizacao import normalizar_grafo
 
-def ler_arquivo_dat(caminho):
+# Cabeçalhos que abrem cada seção do arquivo .dat (comparados com o início da linha)
+CABECALHOS_SECOES = (
+    ("ReN", "ReN."),
+    ("ReE", "ReE."),
+    ("ReA", "ReA."),
+    ("ARC", "ARC"),   # Seção de arcos não requeridos
+    ("EDGE", "EDGE"), # Seção de arestas não requeridas (se existir)
+    ("FIM", "FIM"),
+)
+_PREFIXOS_CABECALHOS = tuple(inicio for _, inicio in CABECALHOS_SECOES)
+
+# Descrição das seções de dados, usada nos avisos de seção ausente ou vazia
+DESCRICAO_SECOES = {
+    "ReN": "ReN",
+    "ReE": "ReE",
+    "ReA": "ReA",
+    "EDGE": "EDGE (arestas não requeridas)",
+    "ARC": "ARC (arcos não requeridos)",
+}
+
+
+def tokenizar_dat(arquivo):
+    """Percorre as linhas de um arquivo .dat uma única vez, como máquina de estados.
+
+    O estado é a seção corrente, trocada sempre que uma linha de cabeçalho
+    (ReN., ReE., EDGE, ReA., ARC) aparece. Linhas antes da primeira seção
+    pertencem ao cabeçalho da instância (seção None). Nada é armazenado: cada
+    linha não vazia é entregue assim que lida.
+
+    Args:
+        arquivo: Iterável de linhas (ex.: o objeto de arquivo aberto).
+
+    Yields:
+        tuple: (secao, partes, linha) com a linha já separada em colunas.
+    """
+    secao = None
+    vistas = set()
+    for linha in arquivo:
+        linha_strip = linha.strip()
+        if not linha_strip:
+            continue
+        if linha_strip.startswith(_PREFIXOS_CABECALHOS): # Teste rápido; a seção é resolvida abaixo
+            nome = next((nome for nome, inicio in CABECALHOS_SECOES if nome not in vistas and linha_strip.startswith(inicio)), None)
+            if nome is not None:
+                secao = nome
+                vistas.add(nome)
+                continue
+        yield secao, linha_strip.split(), linha_strip
+
+
+def ler_arquivo_dat(caminho, verbose=True):
     """Lê um arquivo de instância .dat e retorna um objeto Grafo populado.
 
+    A leitura é feita em uma única passada (ver tokenizar_dat): cada linha é
+    inserida no Grafo assim que lida, sem carregar o arquivo inteiro em memória.
+    Arquivos no formato compilado (ver instancia_compilada.py) são reconhecidos
+    pelo número mágico e carregados diretamente, sem parsing de texto.
+
     Args:
         caminho (str): O caminho para o arquivo .dat.
+        verbose (bool): Se False, suprime as mensagens de progresso e os avisos
+            de linhas mal formatadas (erros continuam sendo exibidos).
 
     Returns:
         Grafo: Um objeto da classe Grafo contendo os dados da instância.
                Retorna None se ocorrer um erro na leitura ou parsing.
     """
+    mensagem = print if verbose else _ignorar_mensagem
+    try:
+        return ler_instancia(caminho, info=mensagem, aviso=mensagem)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo não encontrado em {caminho}")
+        return None
+    except ValueError as e:
+        print(f"Erro ao carregar a instância {caminho}: {e}")
+        return None
+    except Exception as e:
+        print(f"Erro inesperado ao ler o arquivo {caminho}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def ler_instancia(caminho, info=print, aviso=print, normalizar=True):
+    """Lê uma instância (.dat texto ou compilada) propagando as exceções.
+
+    É o núcleo de ler_arquivo_dat, para quem precisa tratar os erros por conta
+    própria (ex.: carregamento_lote). Por padrão o grafo lido passa pela
+    normalização (ver normalizacao.py), que falha com ValueError se algum serviço
+    não tiver caminho de ida e volta ao depósito.
+
+    Args:
+        caminho (str): O caminho para o arquivo.
+        info (callable): Recebe as mensagens de progresso.
+        aviso (callable): Recebe os avisos (linhas mal formatadas, seções ausentes).
+        normalizar (bool): Se False, devolve o grafo exatamente como lido.
+
+    Returns:
+        Grafo: O grafo da instância.
+
+    Raises:
+        OSError: Se o arquivo não puder ser lido.
+        ValueError: Se o arquivo compilado estiver em formato inválido ou se a
+            instância não passar na normalização.
+    """
+    if eh_instancia_compilada(caminho):
+        grafo = carregar_instancia_compilada(caminho)
+        info(f"Instância compilada {caminho} carregada. Vértices: {len(grafo.vertices)}, Serviços: {len(grafo.service_map)}")
+        if normalizar:
+            normalizar_grafo(grafo, aviso)
+        return grafo
+
     grafo = Grafo()
-    service_id_counter = 1
-    grafo.service_map = {}
+    grafo.capacidade = None
+    grafo.deposito = None
+    leitor = _LeitorInstancia(grafo, info, aviso)
+
+    with open(caminho, 'r', encoding='utf-8') as f:
+        secao_atual = None
+        processar = leitor.cabecalho
+        for secao, partes, linha in tokenizar_dat(f):
+            if secao != secao_atual:
+                # Troca de estado: o processador só é resolvido quando a seção muda
+                if not leitor.cabecalho_concluido:
+                    leitor.concluir_cabecalho(caminho)
+                processar = leitor.processador(secao)
+                secao_atual = secao
+            processar(partes, linha)
+
+    if not leitor.cabecalho_concluido:
+        leitor.concluir_cabecalho(caminho)
+    info(f"Seções processadas: {', '.join(leitor.secoes_lidas)}")
+    for secao, descricao in DESCRICAO_SECOES.items():
+        if secao not in leitor.secoes_lidas:
+            aviso(f"Aviso: Seção {descricao} não encontrada ou vazia.")
+
+    # Adiciona vértices isolados requeridos que podem não ter arestas/arcos
+    # (já tratado em adicionar_vertice_requerido)
+    grafo.vertices.update(grafo.requeridos_v.keys())
+
+    info(f"Leitura de {caminho} concluída. Vértices: {len(grafo.vertices)}, Serviços: {len(grafo.service_map)}")
+    # Verifica se algum serviço foi lido
+    if not grafo.service_map:
+        aviso("Aviso: Nenhum serviço requerido foi lido ou mapeado. Verifique as seções ReN, ReE, ReA.")
+
+    if normalizar:
+        relatorio = normalizar_grafo(grafo, aviso)
+        if relatorio.conexoes_paralelas:
+            info(f"Conexões paralelas unificadas: {relatorio.conexoes_paralelas}")
+    return grafo
+
+
+def _ignorar_mensagem(mensagem):
+    pass
 
-    try:
-        with open(caminho, 'r', encoding='utf-8') as f:
-            linhas = f.readlines()
-
-        # 1. Extrair informações do cabeçalho (mais flexível)
-        grafo.capacidade = None
-        grafo.deposito = None
-        for linha in linhas:
-            linha_lower = linha.lower().strip()
-            # Procura por linhas contendo 'capacity:' ou 'depot node:' (case-insensitive)
-            if 'capacity:' in linha_lower:
-                try:
-                    # Pega o valor após o último ':'
-                    grafo.capacidade = int(linha.split(':')[-1].strip())
-                except (ValueError, IndexError):
-                    print(f"Aviso: Falha ao extrair capacidade da linha: {linha.strip()}")
-            elif 'depot node:' in linha_lower:
-                try:
-                    # Pega o valor após o último ':'
-                    grafo.deposito = int(linha.split(':')[-1].strip())
-                except (ValueError, IndexError):
-                    print(f"Aviso: Falha ao extrair depósito da linha: {linha.strip()}")
-
-            # Otimização: parar se ambos foram encontrados (geralmente estão no início)
-            if grafo.capacidade is not None and grafo.deposito is not None:
-                 break
 
+class _LeitorInstancia:
+    """Insere no Grafo as linhas entregues por tokenizar_dat, seção a seção."""
+
+    def __init__(self, grafo, info=print, aviso=print):
+        self.grafo = grafo
+        self.info = info
+        self.aviso = aviso
+        self.service_id_counter = 1
+        self.cabecalho_concluido = False
+        self.secoes_lidas = [] # Seções com ao menos uma linha de dados, na ordem do arquivo
+        self.processadores = {
+            "ReN": self.no_requerido,
+            "ReE": self.aresta_requerida,
+            "ReA": self.arco_requerido,
+            "EDGE": self.aresta_nao_requerida,
+            "ARC": self.arco_nao_requerido,
+        }
+
+    def cabecalho(self, partes, linha):
+        """Extrai capacidade e depósito das linhas de cabeçalho (case-insensitive)."""
+        grafo = self.grafo
+        linha_lower = linha.lower()
+        if 'capacity:' in linha_lower:
+            try:
+                # Pega o valor após o último ':'
+                grafo.capacidade = int(linha.split(':')[-1].strip())
+            except (ValueError, IndexError):
+                self.aviso(f"Aviso: Falha ao extrair capacidade da linha: {linha}")
+        elif 'depot node:' in linha_lower:
+            try:
+                grafo.deposito = int(linha.split(':')[-1].strip())
+            except (ValueError, IndexError):
+                self.aviso(f"Aviso: Falha ao extrair depósito da linha: {linha}")
+
+    def concluir_cabecalho(self, caminho):
+        """Aplica os valores padrão ausentes ao chegar na primeira seção."""
+        grafo = self.grafo
         # Lida com casos onde capacidade/depósito não foram encontrados
         if grafo.capacidade is None:
-            print(f"Aviso: Capacidade não encontrada explicitamente em {caminho}. Assumindo infinito.")
+            self.aviso(f"Aviso: Capacidade não encontrada explicitamente em {caminho}. Assumindo infinito.")
             grafo.capacidade = float('inf')
         if grafo.deposito is None:
-            print(f"Aviso: Depósito não encontrado explicitamente em {caminho}. Assumindo nó 1.")
+            self.aviso(f"Aviso: Depósito não encontrado explicitamente em {caminho}. Assumindo nó 1.")
             grafo.deposito = 1
-        print(f"Valores usados: Capacidade={grafo.capacidade}, Depósito={grafo.deposito}")
-
-
-        # 2. Encontrar índices de início e fim das seções relevantes (mais flexível)
-        section_indices = {}
-        # Cabeçalhos simplificados para detecção mais robusta
-        section_starts = {
-            "ReN": "ReN.",
-            "ReE": "ReE.",
-            "ReA": "ReA.",
-            "ARC": "ARC", # Seção de arcos não requeridos
-            "EDGE": "EDGE", # Seção de arestas não requeridas (se existir)
-            "FIM": "FIM"
-        }
-        active_sections = list(section_starts.keys())
-
-        # Encontra o início de cada seção potencial
-        for i, linha in enumerate(linhas):
-            linha_strip = linha.strip()
-            for key, start_text in section_starts.items():
-                if linha_strip.startswith(start_text) and f"{key}_start" not in section_indices:
-                    # Armazena o índice da linha *após* o cabeçalho
-                    # Considera possível linha em branco após cabeçalho
-                    start_index = i + 1
-                    if start_index < len(linhas) and not linhas[start_index].strip():
-                        start_index += 1
-                    section_indices[f"{key}_start"] = start_index
-                    break # Passa para a próxima linha após encontrar um cabeçalho
-
-        # Define o fim de cada seção baseado no início da próxima ou no fim do arquivo
-        sorted_sections = sorted(section_indices.items(), key=lambda item: item[1])
-        num_sections = len(sorted_sections)
-
-        for i in range(num_sections):
-            current_section_key, start_index = sorted_sections[i]
-            section_name = current_section_key.replace("_start", "")
-
-            # O fim é a linha *antes* do início da próxima seção
-            if i + 1 < num_sections:
-                next_section_key, next_start_index = sorted_sections[i+1]
-                # O índice de início já considera a linha após o cabeçalho
-                # O fim é a linha do cabeçalho da próxima seção
-                end_index = next_start_index - (2 if (next_start_index > 0 and not linhas[next_start_index-2].strip()) else 1)
-            else:
-                # Última seção vai até o fim do arquivo
-                end_index = len(linhas)
-
-            section_indices[f"{section_name}_end"] = end_index
-
-        # --- Parsing das Seções --- #
-
-        # 3. Processar Nós Requeridos (ReN)
-        if "ReN_start" in section_indices:
-            start = section_indices["ReN_start"]
-            end = section_indices["ReN_end"]
-            print(f"Processando ReN de {start} a {end}")
-            for i in range(start, end):
-                linha = linhas[i]
-                partes = linha.strip().split()
-                if len(partes) >= 3 and partes[0].startswith('N'):
-                    try:
-                        no = int(partes[0][1:])
-                        demanda = int(partes[1])
-                        custo_servico = int(partes[2])
-                        grafo.adicionar_vertice_requerido(no, demanda, custo_servico, service_id_counter)
-                        grafo.service_map[service_id_counter] = {'tipo': 'N', 'id': no, 'demanda': demanda, 'custo_servico': custo_servico, 'endpoints': (no, no)}
-                        service_id_counter += 1
-                    except (ValueError, IndexError):
-                        print(f"Aviso: Linha de nó requerido mal formatada: {linha.strip()}")
-                        continue
-        else:
-             print("Aviso: Seção ReN não encontrada.")
-
-        # 4. Processar Arestas Requeridas (ReE)
-        if "ReE_start" in section_indices:
-            start = section_indices["ReE_start"]
-            end = section_indices["ReE_end"]
-            print(f"Processando ReE de {start} a {end}")
-            for i in range(start, end):
-                linha = linhas[i]
-                partes = linha.strip().split()
-                if len(partes) >= 6 and partes[0].startswith('E'):
-                    try:
-                        u, v = int(partes[1]), int(partes[2])
-                        custo_travessia = int(partes[3])
-                        demanda = int(partes[4])
-                        custo_servico = int(partes[5])
-                        grafo.adicionar_aresta_requerida(u, v, custo_travessia, demanda, custo_servico, service_id_counter)
-                        grafo.service_map[service_id_counter] = {'tipo': 'E', 'id': partes[0], 'demanda': demanda, 'custo_servico': custo_servico, 'endpoints': tuple(sorted((u, v)))}
-                        service_id_counter += 1
-                    except (ValueError, IndexError):
-                        print(f"Aviso: Linha de aresta requerida mal formatada: {linha.strip()}")
-                        continue
-        else:
-            print("Aviso: Seção ReE não encontrada ou vazia.")
-
-        # 5. Processar Arcos Requeridos (ReA)
-        if "ReA_start" in section_indices:
-            start = section_indices["ReA_start"]
-            end = section_indices["ReA_end"]
-            print(f"Processando ReA de {start} a {end}")
-            for i in range(start, end):
-                linha = linhas[i]
-                partes = linha.strip().split()
-                if len(partes) >= 6 and partes[0].startswith('A'):
-                    try:
-                        u, v = int(partes[1]), int(partes[2])
-                        custo_travessia = int(partes[3])
-                        demanda = int(partes[4])
-                        custo_servico = int(partes[5])
-                        grafo.adicionar_arco_requerido(u, v, custo_travessia, demanda, custo_servico, service_id_counter)
-                        grafo.service_map[service_id_counter] = {'tipo': 'A', 'id': partes[0], 'demanda': demanda, 'custo_servico': custo_servico, 'endpoints': (u, v)}
-                        service_id_counter += 1
-                    except (ValueError, IndexError):
-                        print(f"Aviso: Linha de arco requerido mal formatada: {linha.strip()}")
-                        continue
-        else:
-            print("Aviso: Seção ReA não encontrada.")
-
-        # 6. Processar Arestas NÃO Requeridas (EDGE) - Se existir
-        if "EDGE_start" in section_indices:
-            start = section_indices["EDGE_start"]
-            end = section_indices["EDGE_end"]
-            print(f"Processando EDGE (não req.) de {start} a {end}")
-            for i in range(start, end):
-                linha = linhas[i]
-                partes = linha.strip().split()
-                # Formato pode variar, exemplo: NrE<id> FROM_N TO_N T_COST
-                if len(partes) >= 4: # Precisa de pelo menos u, v, custo
-                    try:
-                        # Tenta pegar as colunas corretas (pode precisar de ajuste)
-                        u, v, custo = int(partes[1]), int(partes[2]), int(partes[3])
-                        grafo.adicionar_aresta_nao_requerida(u, v, custo)
-                    except (ValueError, IndexError):
-                        # Tenta formato alternativo sem ID: FROM_N TO_N T_COST
-                        if len(partes) == 3:
-                             try:
-                                 u, v, custo = int(partes[0]), int(partes[1]), int(partes[2])
-                                 grafo.adicionar_aresta_nao_requerida(u, v, custo)
-                             except (ValueError, IndexError):
-                                 print(f"Aviso: Linha de aresta não requerida mal formatada: {linha.strip()}")
-                                 continue
-                        else:
-                            print(f"Aviso: Linha de aresta não requerida mal formatada: {linha.strip()}")
-                            continue
-        else:
-            print("Aviso: Seção EDGE (arestas não requeridas) não encontrada.")
-
-        # 7. Processar Arcos NÃO Requeridos (ARC)
-        if "ARC_start" in section_indices:
-            start = section_indices["ARC_start"]
-            end = section_indices["ARC_end"]
-            print(f"Processando ARC (não req.) de {start} a {end}")
-            for i in range(start, end):
-                linha = linhas[i]
-                partes = linha.strip().split()
-                # Formato esperado: NrA<id> FROM_N TO_N T_COST
-                if len(partes) >= 4: # Precisa de ID, u, v, custo
-                    try:
-                        u, v, custo = int(partes[1]), int(partes[2]), int(partes[3])
-                        grafo.adicionar_arco_nao_requerido(u, v, custo)
-                    except (ValueError, IndexError):
-                        print(f"Aviso: Linha de arco não requerido mal formatada: {linha.strip()}")
-                        continue
-        else:
-            print("Aviso: Seção ARC (arcos não requeridos) não encontrada.")
+        self.info(f"Valores usados: Capacidade={grafo.capacidade}, Depósito={grafo.deposito}")
+        self.cabecalho_concluido = True
 
-        # Garante que todos os vértices mencionados estão no conjunto de vértices
-        # (já tratado em _add_adj e adicionar_vertice_requerido)
-        # Adiciona vértices isolados requeridos que podem não ter arestas/arcos
-        grafo.vertices.update(grafo.requeridos_v.keys())
+    def processador(self, secao):
+        """Retorna a função que trata as linhas de dados da seção."""
+        processador = self.processadores.get(secao)
+        if processador is None:
+            return self.ignorar # Seção FIM ou desconhecida
+        self.secoes_lidas.append(secao)
+        return processador
 
-        print(f"Leitura de {caminho} concluída. Vértices: {len(grafo.vertices)}, Serviços: {len(grafo.service_map)}")
-        # Verifica se algum serviço foi lido
-        if not grafo.service_map:
-             print("Aviso: Nenhum serviço requerido foi lido ou mapeado. Verifique as seções ReN, ReE, ReA.")
+    def ignorar(self, partes, linha):
+        pass
 
-        return grafo
+    def _novo_servico(self, tipo, id_original, demanda, custo_servico, endpoints):
+        service_id = self.service_id_counter
+        self.grafo.adicionar_servico(service_id, tipo, id_original, demanda, custo_servico, endpoints)
+        self.service_id_counter += 1
 
-    except FileNotFoundError:
-        print(f"Erro: Arquivo não encontrado em {caminho}")
-        return None
-    except Exception as e:
-        print(f"Erro inesperado ao ler o arquivo {caminho}: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+    def no_requerido(self, partes, linha):
+        if len(partes) >= 3 and partes[0].startswith('N'):
+            try:
+                no = int(partes[0][1:])
+                demanda = int(partes[1])
+                custo_servico = int(partes[2])
+            except (ValueError, IndexError):
+                self.aviso(f"Aviso: Linha de nó requerido mal formatada: {linha}")
+                return
+            self.grafo.adicionar_vertice_requerido(no, demanda, custo_servico, self.service_id_counter)
+            self._novo_servico('N', no, demanda, custo_servico, (no, no))
+
+    def aresta_requerida(self, partes, linha):
+        if len(partes) >= 6 and partes[0].startswith('E'):
+            try:
+                u, v = int(partes[1]), int(partes[2])
+                custo_travessia = int(partes[3])
+                demanda = int(partes[4])
+                custo_servico = int(partes[5])
+            except (ValueError, IndexError):
+                self.aviso(f"Aviso: Linha de aresta requerida mal formatada: {linha}")
+                return
+            self.grafo.adicionar_aresta_requerida(u, v, custo_travessia, demanda, custo_servico, self.service_id_counter)
+            self._novo_servico('E', partes[0], demanda, custo_servico, tuple(sorted((u, v))))
+
+    def arco_requerido(self, partes, linha):
+        if len(partes) >= 6 and partes[0].startswith('A'):
+            try:
+                u, v = int(partes[1]), int(partes[2])
+                custo_travessia = int(partes[3])
+                demanda = int(partes[4])
+                custo_servico = int(partes[5])
+            except (ValueError, IndexError):
+                self.aviso(f"Aviso: Linha de arco requerido mal formatada: {linha}")
+                return
+            self.grafo.adicionar_arco_requerido(u, v, custo_travessia, demanda, custo_servico, self.service_id_counter)
+            self._novo_servico('A', partes[0], demanda, custo_servico, (u, v))
+
+    def aresta_nao_requerida(self, partes, linha):
+        # Formato: NrE<id> FROM_N TO_N T_COST, ou alternativo sem ID: FROM_N TO_N T_COST
+        if len(partes) >= 4:
+            colunas = partes[1:4]
+        elif len(partes) == 3:
+            colunas = partes
+        else:
+            return
+        try:
+            u, v, custo = int(colunas[0]), int(colunas[1]), int(colunas[2])
+        except ValueError:
+            self.aviso(f"Aviso: Linha de aresta não requerida mal formatada: {linha}")
+            return
+        self.grafo.adicionar_aresta_nao_requerida(u, v, custo)
+
+    def arco_nao_requerido(self, partes, linha):
+        # Formato esperado: NrA<id> FROM_N TO_N T_COST
+        if len(partes) >= 4:
+            try:
+                u, v, custo = int(partes[1]), int(partes[2]), int(partes[3])
+            except ValueError:
+                self.aviso(f"Aviso: Linha de arco não requerido mal formatada: {linha}")
+                return
+            self.grafo.adicionar_arco_nao_requerido(u, v, custo)
 
 # Exemplo de uso (para teste)
 if __name__ == '__main__':
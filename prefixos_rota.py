@@ -0,0 +1,151 @@
+from itertools import accumulate
+
+# Vetores de prefixo de uma rota, para avaliar movimentos de busca local em O(1)
+# em vez de recalcular a rota inteira a cada tentativa.
+#
+# A rota depósito -> s_1 -> ... -> s_k -> depósito é estendida com o depósito nas
+# posições 0 e k+1 (entrada = saída = depósito, sem custo nem demanda). Para p = 0..k+1:
+#   ida[p]      soma das ligações saída(q-1) -> entrada(q), q <= p (sentido da rota)
+#   volta[p]    soma das ligações saída_inv(q) -> entrada_inv(q-1), q <= p: as mesmas
+#               ligações percorridas ao contrário, como em um trecho invertido
+#   servico[p]  custos de serviço de s_1..s_p
+#   demanda[p]  demanda de s_1..s_p
+# O custo da rota é ida[k+1] + servico[k+1]. Um trecho s_i..s_j (posições P..Q
+# estendidas) custa ida[Q] - ida[P] em ligações no sentido normal e volta[Q] - volta[P]
+# invertido. As posições recebidas pelos métodos são as dos serviços na rota
+# (0..k-1, como em Rota.servicos), não as estendidas.
+#
+# Em grafos normalizados (Grafo.distancias_por_indice) as ligações são lidas direto
+# do vetor plano da matriz: cada posição guarda o início da linha da sua saída
+# (linha_saida[p] = índice * V) e a coluna da sua entrada, e a ligação p -> q é
+# dados[linha_saida[p] + coluna_entrada[q]].
+
+
+class PrefixosRota:
+    """Custos e demandas acumulados de uma rota, com deltas de movimentos em O(1).
+
+    Os deltas (custo novo - custo atual da rota) consideram os deslocamentos mínimos
+    entre visitas e os custos de serviço, a mesma definição de Rota.atualizar_demanda_custo.
+    Os vetores valem para a sequência recebida: depois de alterá-la, construa outro
+    PrefixosRota (Rota.prefixos faz isso automaticamente).
+    """
+
+    def __init__(self, grafo, servicos, origens=None, destinos=None, inverter_arestas=False):
+        """Calcula os vetores de prefixo.
+
+        Args:
+            grafo (Grafo): Grafo com as matrizes de caminhos mínimos calculadas.
+            servicos (sequence): service_ids na ordem de visita.
+            origens, destinos (sequence): Nós de entrada e saída de cada visita; padrão:
+                as extremidades da tabela de serviços (orientação das listas do AG).
+            inverter_arestas (bool): Se True, um trecho invertido atende as arestas
+                (tipo 'E') de v para u; senão, cada serviço mantém sua orientação.
+        """
+        tabela = grafo.servicos
+        deposito = grafo.deposito
+        if origens is None:
+            origens = [tabela.origem[sid] for sid in servicos]
+            destinos = [tabela.destino[sid] for sid in servicos]
+        self.distancia = distancia = grafo.dist_matrix.valor
+        self.entrada = entrada = [deposito, *origens, deposito]
+        self.saida = saida = [deposito, *destinos, deposito]
+        if inverter_arestas:
+            aresta = ord("E")
+            tipos = [tabela.tipo[sid] == aresta for sid in servicos]
+            self.entrada_inv = [deposito, *(v if e else u for u, v, e in zip(origens, destinos, tipos)), deposito]
+            self.saida_inv = [deposito, *(u if e else v for u, v, e in zip(origens, destinos, tipos)), deposito]
+        else:
+            self.entrada_inv, self.saida_inv = entrada, saida
+        entrada_inv, saida_inv = self.entrada_inv, self.saida_inv
+
+        n = len(entrada)
+        acesso = grafo.distancias_por_indice()
+        self.dados = None
+        if acesso is None:
+            self.ida = list(accumulate((distancia(saida[p - 1], entrada[p]) for p in range(1, n)), initial=0))
+            self.volta = list(accumulate((distancia(saida_inv[p], entrada_inv[p - 1]) for p in range(1, n)), initial=0))
+        else:
+            self.dados, self.n_vertices, self.indice = dados, n_vertices, indice = acesso
+            self.linha_saida = linha_saida = [indice[no] * n_vertices for no in saida]
+            self.coluna_entrada = coluna_entrada = [indice[no] for no in entrada]
+            self.linha_saida_inv = linha_saida_inv = [indice[no] * n_vertices for no in saida_inv]
+            self.coluna_entrada_inv = coluna_entrada_inv = [indice[no] for no in entrada_inv]
+            self.ida = list(accumulate((dados[linha_saida[p - 1] + coluna_entrada[p]] for p in range(1, n)), initial=0))
+            self.volta = list(accumulate((dados[linha_saida_inv[p] + coluna_entrada_inv[p - 1]] for p in range(1, n)),
+                                         initial=0))
+        self.servico = list(accumulate((tabela.custo_servico[sid] for sid in servicos), initial=0))
+        self.servico.append(self.servico[-1])
+        self.demanda = list(accumulate((tabela.demanda[sid] for sid in servicos), initial=0))
+        self.demanda.append(self.demanda[-1])
+
+    @property
+    def custo_total(self):
+        return self.ida[-1] + self.servico[-1]
+
+    @property
+    def demanda_total(self):
+        return self.demanda[-1]
+
+    def demanda_trecho(self, i, j):
+        """Demanda dos serviços nas posições i..j."""
+        return self.demanda[j + 1] - self.demanda[i]
+
+    def delta_remocao(self, i):
+        """Variação de custo ao retirar o serviço da posição i."""
+        p = i + 1
+        if self.dados is None:
+            ligacao = self.distancia(self.saida[p - 1], self.entrada[p + 1])
+        else:
+            ligacao = self.dados[self.linha_saida[p - 1] + self.coluna_entrada[p + 1]]
+        return ligacao - (self.ida[p + 1] - self.ida[p - 1]) - (self.servico[p] - self.servico[p - 1])
+
+    def _ligacoes_ate_e_apos(self, anterior, u, v, seguinte):
+        """Custo de saida[anterior] -> u mais v -> entrada[seguinte] (posições estendidas)."""
+        dados = self.dados
+        if dados is None:
+            return self.distancia(self.saida[anterior], u) + self.distancia(v, self.entrada[seguinte])
+        indice = self.indice
+        return (dados[self.linha_saida[anterior] + indice[u]]
+                + dados[indice[v] * self.n_vertices + self.coluna_entrada[seguinte]])
+
+    def delta_insercao(self, i, u, v, custo_servico):
+        """Variação de custo ao inserir, antes da posição i (0..k), um serviço atendido de u para v."""
+        return self._ligacoes_ate_e_apos(i, u, v, i + 1) + custo_servico - (self.ida[i + 1] - self.ida[i])
+
+    def delta_substituicao(self, i, u, v, custo_servico):
+        """Variação de custo ao trocar o serviço da posição i por outro atendido de u para v."""
+        p = i + 1
+        return (self._ligacoes_ate_e_apos(p - 1, u, v, p + 1) + custo_servico
+                - (self.ida[p + 1] - self.ida[p - 1]) - (self.servico[p] - self.servico[p - 1]))
+
+    def delta_inversao(self, i, j):
+        """Variação de custo ao inverter o trecho das posições i..j (2-opt dentro da rota)."""
+        p, q = i + 1, j + 1
+        dados = self.dados
+        if dados is None:
+            ligacoes = (self.distancia(self.saida[p - 1], self.entrada_inv[q])
+                        + self.distancia(self.saida_inv[p], self.entrada[q + 1]))
+        else:
+            ligacoes = (dados[self.linha_saida[p - 1] + self.coluna_entrada_inv[q]]
+                        + dados[self.linha_saida_inv[p] + self.coluna_entrada[q + 1]])
+        return ligacoes + self.volta[q] - self.volta[p] - (self.ida[q + 1] - self.ida[p - 1])
+
+# Exemplo de uso: confere os deltas de uma rota do Path-Scanning contra o recálculo completo
+if __name__ == '__main__':
+    import sys
+    from parser import ler_instancia
+    from heuristica_path_scanning import construir_solucao_path_scanning
+
+    caminho_instancia = sys.argv[1] if len(sys.argv) > 1 else "selected_instances/BHW1.dat"
+    grafo = ler_instancia(caminho_instancia, info=lambda mensagem: None)
+    grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
+    rotas, _, _ = construir_solucao_path_scanning(grafo)
+    servicos = list(max(rotas, key=lambda rota: len(rota.servicos)).servicos)
+    prefixos = PrefixosRota(grafo, servicos)
+    matriz = grafo.get_matriz_servicos()
+    custo = matriz.custo_rota(servicos)[0]
+    print(f"Rota com {len(servicos)} serviços, custo {prefixos.custo_total} (recalculado: {custo})")
+    i, j = 0, len(servicos) - 1
+    invertida = servicos[:i] + servicos[i:j + 1][::-1] + servicos[j + 1:]
+    print(f"Inversão {i}..{j}: delta {prefixos.delta_inversao(i, j)}, "
+          f"recalculado {matriz.custo_rota(invertida)[0] - custo}")
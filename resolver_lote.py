@@ -0,0 +1,169 @@
+import argparse
+import contextlib
+import csv
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from carregamento_lote import listar_arquivos_instancias
+from parser import ler_instancia
+from solucionador import preparar_caminhos_minimos, resolver_instancia, PASTA_SOLUCOES_OTIMIZADAS
+
+# Resolve todas as instâncias das pastas, sem interação, em paralelo:
+#   python resolver_lote.py [pastas ...] [--workers N] [--limite-tempo S] [--semente K]
+#                           [--saida PASTA] [--resumo ARQUIVO.csv] [--cache PASTA]
+#                           [--solucoes-iniciais PASTA]
+# Cada processo resolve uma instância por vez e grava <saida>/sol-<instância>.dat assim
+# que termina; o processo principal acrescenta uma linha ao CSV de resumo a cada
+# instância concluída (custo e tempo de cada etapa). Com --solucoes-iniciais, cada
+# instância parte do sol-<instância>.dat dessa pasta, quando existir (início a quente).
+
+COLUNAS_RESUMO = [
+    "instancia", "status", "erro", "vertices", "servicos", "inicio",
+    "tempo_leitura", "tempo_caminhos",
+    "custo_path_scanning", "tempo_path_scanning",
+    "custo_split", "tempo_split",
+    "custo_conservadora", "tempo_conservadora",
+    "custo_busca_local", "tempo_busca_local",
+    "custo_ag", "tempo_ag",
+    "melhor_metodo", "custo_final", "tempo_total", "arquivo",
+]
+
+
+def resolver_arquivo(caminho, pasta_saida, limite_tempo=None, semente=None, pasta_cache=None, pasta_iniciais=None,
+                     silencioso=True):
+    """Lê e resolve uma instância (roda em um processo do pool), capturando erros.
+
+    A semente de cada instância é derivada de `semente` e do nome do arquivo, de modo
+    que o resultado não depende da ordem nem do processo em que a instância roda.
+    Se pasta_iniciais tiver um sol-<instância>.dat, ele é o ponto de partida.
+
+    Returns:
+        dict: Uma linha do resumo (chaves de COLUNAS_RESUMO).
+    """
+    nome = os.path.basename(caminho)
+    linha = {"instancia": nome, "status": "ok"}
+    if semente is not None:
+        random.seed(f"{semente}-{nome}")
+
+    inicio = time.time()
+    saida = open(os.devnull, "w") if silencioso else contextlib.nullcontext(sys.stdout)
+    try:
+        with saida as destino, contextlib.redirect_stdout(destino):
+            grafo = ler_instancia(caminho, info=_sem_mensagem, aviso=_sem_mensagem)
+            linha["tempo_leitura"] = time.time() - inicio
+            linha["vertices"] = len(grafo.vertices)
+            linha["servicos"] = len(grafo.service_map)
+            preparar_caminhos_minimos(grafo, pasta_cache)
+            solucao_inicial = None
+            if pasta_iniciais:
+                solucao_inicial = os.path.join(pasta_iniciais, f"sol-{os.path.splitext(nome)[0]}.dat")
+                if not os.path.isfile(solucao_inicial):
+                    solucao_inicial = None
+            resultado = resolver_instancia(grafo, nome, pasta_saida, limite_tempo, solucao_inicial)
+        for coluna in COLUNAS_RESUMO:
+            if coluna in resultado:
+                linha[coluna] = resultado[coluna]
+        linha["melhor_metodo"] = resultado["metodo"]
+    except Exception as e:
+        linha["status"] = "erro"
+        linha["erro"] = f"{type(e).__name__}: {e}"
+    linha["tempo_total"] = time.time() - inicio
+    return linha
+
+
+def resolver_lote(pastas, pasta_saida=PASTA_SOLUCOES_OTIMIZADAS, arquivo_resumo=None, num_workers=None,
+                  limite_tempo=None, semente=None, pasta_cache=None, pasta_iniciais=None):
+    """Resolve todas as instâncias .dat das pastas e escreve o resumo em CSV.
+
+    Args:
+        pastas (list): Pastas com as instâncias (as inexistentes são ignoradas).
+        pasta_saida (str): Pasta dos arquivos sol-*.dat.
+        arquivo_resumo (str): CSV de resumo (padrão: <pasta_saida>/resumo.csv).
+        num_workers (int): Processos em paralelo (None = todos os núcleos; 1 = no próprio processo).
+        limite_tempo (float): Tempo máximo por instância, em segundos (None = sem limite).
+        semente (int): Semente base dos geradores aleatórios (None = não fixa).
+        pasta_cache (str): Pasta do cache em disco das matrizes (None = sem cache).
+        pasta_iniciais (str): Pasta com soluções de execuções anteriores (início a quente).
+
+    Returns:
+        list: As linhas do resumo, na ordem de conclusão.
+    """
+    caminhos = listar_arquivos_instancias(pastas)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if arquivo_resumo is None:
+        arquivo_resumo = os.path.join(pasta_saida, "resumo.csv")
+    os.makedirs(pasta_saida, exist_ok=True)
+    os.makedirs(os.path.dirname(arquivo_resumo) or ".", exist_ok=True)
+
+    print(f"Resolvendo {len(caminhos)} instâncias com {num_workers} processo(s)...")
+    inicio = time.time()
+    linhas = []
+    with open(arquivo_resumo, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.DictWriter(f, fieldnames=COLUNAS_RESUMO)
+        escritor.writeheader()
+        f.flush()
+        for linha in _executar(caminhos, num_workers, pasta_saida, limite_tempo, semente, pasta_cache, pasta_iniciais):
+            escritor.writerow({coluna: _formatar(valor) for coluna, valor in linha.items()})
+            f.flush()
+            linhas.append(linha)
+            if linha["status"] == "ok":
+                print(f"[{len(linhas)}/{len(caminhos)}] {linha['instancia']}: custo {linha['custo_final']} "
+                      f"({linha['melhor_metodo']}) em {linha['tempo_total']:.2f} s")
+            else:
+                print(f"[{len(linhas)}/{len(caminhos)}] {linha['instancia']}: {linha['erro']}")
+
+    falhas = sum(1 for linha in linhas if linha["status"] != "ok")
+    print(f"{len(linhas)} instâncias resolvidas em {time.time() - inicio:.2f} s ({falhas} falhas).")
+    print(f"Resumo salvo em: {arquivo_resumo}")
+    return linhas
+
+
+def _executar(caminhos, num_workers, pasta_saida, limite_tempo, semente, pasta_cache, pasta_iniciais):
+    if num_workers <= 1:
+        for caminho in caminhos:
+            yield resolver_arquivo(caminho, pasta_saida, limite_tempo, semente, pasta_cache, pasta_iniciais)
+        return
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futuros = [executor.submit(resolver_arquivo, caminho, pasta_saida, limite_tempo, semente, pasta_cache, pasta_iniciais)
+                   for caminho in caminhos]
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+
+
+def _formatar(valor):
+    if isinstance(valor, float):
+        return f"{valor:.4f}"
+    return valor
+
+
+def _sem_mensagem(mensagem):
+    pass
+
+
+def _argumentos(args=None):
+    from main import PASTAS_INSTANCIAS
+
+    parser = argparse.ArgumentParser(description="Resolve em lote todas as instâncias .dat, sem interação.")
+    parser.add_argument("pastas", nargs="*", default=PASTAS_INSTANCIAS,
+                        help="Pastas com as instâncias (padrão: as pastas configuradas em main.py)")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos (padrão: núcleos da máquina)")
+    parser.add_argument("--limite-tempo", type=float, default=None, help="Tempo máximo por instância, em segundos")
+    parser.add_argument("--semente", type=int, default=None, help="Semente base dos geradores aleatórios")
+    parser.add_argument("--saida", default=PASTA_SOLUCOES_OTIMIZADAS, help="Pasta dos arquivos de solução")
+    parser.add_argument("--resumo", default=None, help="Arquivo CSV de resumo (padrão: <saida>/resumo.csv)")
+    parser.add_argument("--cache", default=None, help="Pasta do cache em disco das matrizes de caminhos mínimos")
+    parser.add_argument("--solucoes-iniciais", default=None,
+                        help="Pasta com sol-*.dat de execuções anteriores usados como ponto de partida")
+    return parser.parse_args(args)
+
+
+if __name__ == '__main__':
+    opcoes = _argumentos()
+    resolver_lote(opcoes.pastas, opcoes.saida, opcoes.resumo, opcoes.workers,
+                  opcoes.limite_tempo, opcoes.semente, opcoes.cache, opcoes.solucoes_iniciais)
@@ -1,7 +1,25 @@
-import math
+from array import array
+
+from prefixos_rota import PrefixosRota
 
 class Rota:
-    """Representa uma única rota de um veículo."""
+    """Representa uma única rota de um veículo.
+
+    O estado canônico é compacto: os service_ids visitados, em ordem, em um
+    array('i') (servicos), com as extremidades de entrada e saída de cada visita
+    em arrays paralelos (origens, destinos), mais a demanda e o custo acumulados.
+    Os nós de travessia não são guardados; a sequência detalhada no formato
+    antigo ([('D', 0), ('S', id, u, v), ..., ('D', 0)]) é montada só quando
+    pedida, e sequencia_com_travessias(grafo) inclui também os nós 'T'.
+
+    prefixos(grafo) guarda os vetores de prefixo (PrefixosRota) usados para avaliar
+    movimentos em O(1); os métodos remover_servico, inserir_servico, trocar_servico e
+    inverter_trecho aplicam esses movimentos atualizando demanda e custo pelo delta.
+    """
+    __slots__ = ("id_rota", "deposito_id", "servicos", "origens", "destinos",
+                 "demanda_acumulada", "custo_acumulado", "ultimo_no_visitado", "retorna_ao_deposito",
+                 "_prefixos")
+
     def __init__(self, id_rota, deposito_id):
         """Inicializa uma rota.
 
@@ -11,38 +29,157 @@ class Rota:
         """
         self.id_rota = id_rota
         self.deposito_id = deposito_id
-        self.sequencia_visitas_detalhada = [("D", 0)] # Começa no depósito
-        self.servicos_atendidos = set() # Conjunto de service_ids atendidos nesta rota
+        self.servicos = array("i") # service_ids na ordem de visita
+        self.origens = array("i")  # Nó por onde cada serviço começa (u)
+        self.destinos = array("i") # Nó onde cada serviço termina (v)
         self.demanda_acumulada = 0
         self.custo_acumulado = 0
         self.ultimo_no_visitado = deposito_id
+        self.retorna_ao_deposito = False # True após adicionar_retorno_deposito (visita final 'D')
+        self._prefixos = None # PrefixosRota da sequência atual (None = recalcular na próxima consulta)
 
-    def adicionar_visita_servico(self, service_id, u, v, demanda, custo_servico, custo_travessia_ate_servico, caminho_ate_servico):
-        """Adiciona a visita a um serviço à rota."""
-        # Adiciona nós de travessia
-        for i in range(len(caminho_ate_servico) -1):
-             no_travessia = caminho_ate_servico[i]
-             if no_travessia != self.deposito_id and no_travessia != u:
-                 self.sequencia_visitas_detalhada.append(("T", no_travessia))
-
-        # Adiciona a visita ao serviço
-        self.sequencia_visitas_detalhada.append(("S", service_id, u, v))
-        self.servicos_atendidos.add(service_id)
+    def adicionar_visita_servico(self, service_id, u, v, demanda, custo_servico, custo_travessia_ate_servico, caminho_ate_servico=()):
+        """Adiciona a visita a um serviço à rota.
+
+        caminho_ate_servico é aceito por compatibilidade; os nós de travessia não são guardados.
+        """
+        self._prefixos = None
+        self.servicos.append(service_id)
+        self.origens.append(u)
+        self.destinos.append(v)
         self.demanda_acumulada += demanda
         self.custo_acumulado += custo_travessia_ate_servico + custo_servico
         self.ultimo_no_visitado = v
 
-    def adicionar_retorno_deposito(self, custo_travessia_retorno, caminho_retorno):
+    def adicionar_retorno_deposito(self, custo_travessia_retorno, caminho_retorno=()):
         """Adiciona o retorno ao depósito no final da rota."""
-        for i in range(len(caminho_retorno) -1):
-             no_travessia = caminho_retorno[i]
-             if no_travessia != self.deposito_id:
-                 self.sequencia_visitas_detalhada.append(("T", no_travessia))
-
-        self.sequencia_visitas_detalhada.append(("D", 0))
+        self.retorna_ao_deposito = True
         self.custo_acumulado += custo_travessia_retorno
         self.ultimo_no_visitado = self.deposito_id
 
+    def fechar(self):
+        """Marca a visita final ao depósito sem somar custo (ex.: quando não há caminho de volta)."""
+        self.retorna_ao_deposito = True
+
+    @property
+    def servicos_atendidos(self):
+        """Conjunto dos service_ids atendidos nesta rota."""
+        return set(self.servicos)
+
+    @property
+    def sequencia_visitas_detalhada(self):
+        """Lista [('D', 0), ('S', id, u, v), ..., ('D', 0)], montada a cada acesso.
+
+        Alterar a lista retornada não altera a rota: atribua uma nova sequência
+        (os itens 'T' são ignorados) e chame atualizar_demanda_custo.
+        """
+        sequencia = [("D", 0)]
+        sequencia.extend(("S", sid, u, v) for sid, u, v in zip(self.servicos, self.origens, self.destinos))
+        if self.retorna_ao_deposito:
+            sequencia.append(("D", 0))
+        return sequencia
+
+    @sequencia_visitas_detalhada.setter
+    def sequencia_visitas_detalhada(self, sequencia):
+        servicos, origens, destinos = array("i"), array("i"), array("i")
+        for item in sequencia:
+            if item[0] == "S":
+                servicos.append(item[1])
+                origens.append(item[2])
+                destinos.append(item[3])
+        self.servicos, self.origens, self.destinos = servicos, origens, destinos
+        self._prefixos = None
+        self.retorna_ao_deposito = len(sequencia) > 1 and sequencia[-1][0] == "D"
+        self.ultimo_no_visitado = self.deposito_id if self.retorna_ao_deposito or not destinos else destinos[-1]
+
+    def sequencia_com_travessias(self, grafo):
+        """Sequência detalhada com os nós de travessia ('T', no) entre as visitas, via caminhos mínimos."""
+        sequencia = [("D", 0)]
+        atual = self.deposito_id
+        paradas = list(zip(self.servicos, self.origens, self.destinos))
+        if self.retorna_ao_deposito:
+            paradas.append(None)
+        for parada in paradas:
+            destino = self.deposito_id if parada is None else parada[1]
+            if atual != destino:
+                _, caminho = grafo.get_shortest_path(atual, destino)
+                sequencia.extend(("T", no) for no in caminho[1:-1] if no != self.deposito_id)
+            if parada is None:
+                sequencia.append(("D", 0))
+            else:
+                sequencia.append(("S",) + parada)
+                atual = parada[2]
+        return sequencia
+
+    def copiar(self):
+        """Cópia independente da rota (só os arrays são duplicados)."""
+        copia = Rota.__new__(Rota)
+        copia.id_rota = self.id_rota
+        copia.deposito_id = self.deposito_id
+        copia.servicos = array("i", self.servicos)
+        copia.origens = array("i", self.origens)
+        copia.destinos = array("i", self.destinos)
+        copia.demanda_acumulada = self.demanda_acumulada
+        copia.custo_acumulado = self.custo_acumulado
+        copia.ultimo_no_visitado = self.ultimo_no_visitado
+        copia.retorna_ao_deposito = self.retorna_ao_deposito
+        copia._prefixos = self._prefixos # Imutável: pode ser compartilhado até a primeira alteração
+        return copia
+
+    def __copy__(self):
+        return self.copiar()
+
+    def __deepcopy__(self, memo):
+        return self.copiar()
+
+    def prefixos(self, grafo):
+        """PrefixosRota da sequência atual (recalculado só depois de alterações)."""
+        if self._prefixos is None:
+            self._prefixos = PrefixosRota(grafo, self.servicos, self.origens, self.destinos, inverter_arestas=True)
+        return self._prefixos
+
+    def remover_servico(self, posicao, grafo):
+        """Retira o serviço da posição indicada e retorna seu service_id."""
+        prefixos = self.prefixos(grafo)
+        self.custo_acumulado += prefixos.delta_remocao(posicao)
+        self.demanda_acumulada -= prefixos.demanda_trecho(posicao, posicao)
+        service_id = self.servicos.pop(posicao)
+        del self.origens[posicao], self.destinos[posicao]
+        self._prefixos = None
+        return service_id
+
+    def inserir_servico(self, posicao, service_id, grafo):
+        """Insere o serviço (na orientação da tabela de serviços) antes da posição indicada."""
+        tabela = grafo.servicos
+        u, v = tabela.origem[service_id], tabela.destino[service_id]
+        self.custo_acumulado += self.prefixos(grafo).delta_insercao(posicao, u, v, tabela.custo_servico[service_id])
+        self.demanda_acumulada += tabela.demanda[service_id]
+        self.servicos.insert(posicao, service_id)
+        self.origens.insert(posicao, u)
+        self.destinos.insert(posicao, v)
+        self._prefixos = None
+
+    def trocar_servico(self, posicao, service_id, grafo):
+        """Substitui o serviço da posição indicada (orientação da tabela) e retorna o service_id anterior."""
+        tabela = grafo.servicos
+        u, v = tabela.origem[service_id], tabela.destino[service_id]
+        prefixos = self.prefixos(grafo)
+        self.custo_acumulado += prefixos.delta_substituicao(posicao, u, v, tabela.custo_servico[service_id])
+        self.demanda_acumulada += tabela.demanda[service_id] - prefixos.demanda_trecho(posicao, posicao)
+        anterior = self.servicos[posicao]
+        self.servicos[posicao], self.origens[posicao], self.destinos[posicao] = service_id, u, v
+        self._prefixos = None
+        return anterior
+
+    def inverter_trecho(self, i, j, grafo):
+        """Inverte a ordem dos serviços nas posições i..j; as arestas passam a ser atendidas de v para u."""
+        prefixos = self.prefixos(grafo)
+        self.custo_acumulado += prefixos.delta_inversao(i, j)
+        self.servicos[i:j + 1] = self.servicos[i:j + 1][::-1]
+        self.origens[i:j + 1] = array("i", prefixos.entrada_inv[j + 1:i:-1])
+        self.destinos[i:j + 1] = array("i", prefixos.saida_inv[j + 1:i:-1])
+        self._prefixos = None
+
     def verificar_capacidade(self, nova_demanda, capacidade_maxima):
         """Verifica se adicionar uma nova demanda excederia a capacidade."""
         return self.demanda_acumulada + nova_demanda <= capacidade_maxima
@@ -54,55 +191,38 @@ class Rota:
     def get_output_format(self):
         """Formata a rota para o padrão de saída especificado.
 
-        Correção: Conta apenas visitas de serviço (S) para o número de visitas no resumo.
+        Só as visitas ao depósito (D) e aos serviços (S) são impressas e contadas,
+        conforme a regra 2 do padrao_escrita.dat; os nós de travessia não entram.
         """
-        visitas_output = []
-        for tipo_entrada in self.sequencia_visitas_detalhada:
-            tipo = tipo_entrada[0]
-            if tipo == "D":
-                # Formato: (D 0,1,ID_ROTA)
-                visitas_output.append(f"(D 0,1,{self.id_rota})")
-            elif tipo == "S":
-                # Formato: (S id_serviço,exterminadade_serviço,outra_extermidade_do_servico)
-                service_id = tipo_entrada[1]
-                u = tipo_entrada[2]
-                v = tipo_entrada[3]
-                visitas_output.append(f"(S {service_id},{u},{v})")
-            elif tipo == "T":
-                # Formato: (T no_travessia,no_travessia,no_travessia) - assumindo que 'T' é um nó de travessia
-                # O padrão de escrita não especifica 'T', então vamos ignorar para o output final, mas manter na lógica interna
-                # Ou, se for para representar o nó, pode ser (N no_id,no_id,no_id) ou similar se o professor aceitar
-                # Por enquanto, vamos manter apenas D e S no output final, conforme o padrao_escrita.dat indica:
-                # "2) Só serão impressos as informações das visitas dos serviços nas rotas."
-                pass # Ignora nós de travessia no output final, conforme a regra 2 do padrao_escrita.dat
-
-        num_visitas_para_output = sum(1 for item in self.sequencia_visitas_detalhada if item[0] in ["D", "S"])
+        deposito = f"(D 0,1,{self.id_rota})"
+        visitas_output = [deposito]
+        visitas_output.extend(f"(S {sid},{u},{v})" for sid, u, v in zip(self.servicos, self.origens, self.destinos))
+        if self.retorna_ao_deposito:
+            visitas_output.append(deposito)
 
         # Linha de resumo da rota
         # depósito(0) dia(1) id_rota demanda_total custo_total total_de_visitas (formato output)
-        resumo = f"0 1 {self.id_rota} {self.demanda_acumulada} {self.custo_acumulado} {num_visitas_para_output}"
+        resumo = f"0 1 {self.id_rota} {self.demanda_acumulada} {self.custo_acumulado} {len(visitas_output)}"
         sequencia = " ".join(visitas_output)
         return resumo, sequencia
 
     def atualizar_demanda_custo(self, grafo):
-        """Recalcula a demanda acumulada e o custo acumulado da rota, baseada na sequencia_visitas_detalhada."""
+        """Recalcula a demanda e o custo acumulados a partir dos serviços da rota.
+
+        O custo é o dos deslocamentos mínimos depósito -> u1, v1 -> u2, ..., vk -> depósito
+        mais os custos de serviço (a mesma definição de leitor_solucao.validar_solucao).
+        """
+        distancia = grafo.dist_matrix.valor
+        tabela = grafo.servicos
+        demandas, custos_servico = tabela.demanda, tabela.custo_servico
         demanda = 0
         custo = 0
         ultimo = self.deposito_id
-        for item in self.sequencia_visitas_detalhada:
-            if item[0] == "S":
-                service_id = item[1]
-                demanda += grafo.service_map[service_id]["demanda"]
-                u, v = item[2], item[3]
-                custo += grafo.dist_matrix[ultimo][u]
-                custo += grafo.dist_matrix[u][v]
-                ultimo = v
-            elif item[0] == "D":
-                custo += grafo.dist_matrix[ultimo][self.deposito_id]
-                ultimo = self.deposito_id
-            elif item[0] == "T":
-                no = item[1]
-                custo += grafo.dist_matrix[ultimo][no]
-                ultimo = no
+        for service_id, u, v in zip(self.servicos, self.origens, self.destinos):
+            demanda += demandas[service_id]
+            custo += distancia(ultimo, u) + custos_servico[service_id]
+            ultimo = v
+        custo += distancia(ultimo, self.deposito_id)
         self.demanda_acumulada = demanda
         self.custo_acumulado = custo
+        self._prefixos = None
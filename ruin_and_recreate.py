@@ -3,64 +3,58 @@ import copy
 from rota import Rota
 
 def inserir_servico_na_melhor_posicao(rotas, grafo, servico, capacidade):
-    """Insere o serviço na melhor posição possível em qualquer rota (ou cria nova)"""
-    melhor_custo = float('inf')
+    """Insere o serviço na melhor posição possível em qualquer rota (ou cria nova).
+
+    O acréscimo de custo de cada posição vem dos vetores de prefixo da rota, em O(1).
+    """
+    tabela = grafo.servicos
+    u, v = tabela.origem[servico], tabela.destino[servico]
+    demanda, custo_servico = tabela.demanda[servico], tabela.custo_servico[servico]
+    melhor_delta = float('inf')
     melhor_insercao = None
     for idx_rota, rota in enumerate(rotas):
-        servicos_ids = [item[1] for item in rota.sequencia_visitas_detalhada if item[0] == 'S']
-        for pos in range(len(servicos_ids) + 1):
-            nova_seq = servicos_ids[:pos] + [servico] + servicos_ids[pos:]
-            custo, demanda = calcular_custo_rota_completa(grafo, nova_seq, grafo.deposito)
-            if demanda <= capacidade and custo < melhor_custo:
-                melhor_custo = custo
-                melhor_insercao = (idx_rota, pos, nova_seq)
+        if not rota.verificar_capacidade(demanda, capacidade):
+            continue
+        prefixos = rota.prefixos(grafo)
+        for pos in range(len(rota.servicos) + 1):
+            delta = prefixos.delta_insercao(pos, u, v, custo_servico)
+            if delta < melhor_delta:
+                melhor_delta = delta
+                melhor_insercao = (idx_rota, pos)
     # Se não couber em nenhuma rota, cria nova rota
     if melhor_insercao is None:
-        nova_rota = Rota(len(rotas) + 1, grafo.deposito)
-        nova_seq = [servico]
-        custo, demanda = calcular_custo_rota_completa(grafo, nova_seq, grafo.deposito)
-        if demanda <= capacidade:
-            return rotas + [nova_rota], True
-        else:
+        if demanda > capacidade:
             return rotas, False
+        nova_rota = Rota(len(rotas) + 1, grafo.deposito)
+        nova_rota.fechar()
+        nova_rota.inserir_servico(0, servico, grafo)
+        return rotas + [nova_rota], True
     # Faz a inserção na melhor rota
-    idx_rota, pos, nova_seq = melhor_insercao
-    nova_rota_obj = Rota(idx_rota + 1, grafo.deposito)
-    current_node = grafo.deposito
-    for s in nova_seq:
-        detalhes = grafo.get_service_details(s)
-        u, v = detalhes["endpoints"]
-        if current_node != u:
-            custo_travessia, caminho = grafo.get_shortest_path(current_node, u)
-        else:
-            custo_travessia = 0
-            caminho = [current_node]
-        nova_rota_obj.adicionar_visita_servico(s, u, v, detalhes["demanda"], detalhes["custo_servico"], custo_travessia, caminho)
-        current_node = v
-    if current_node != grafo.deposito:
-        custo_ret, caminho_ret = grafo.get_shortest_path(current_node, grafo.deposito)
-        nova_rota_obj.adicionar_retorno_deposito(custo_ret, caminho_ret)
-    rotas[idx_rota] = nova_rota_obj
+    idx_rota, pos = melhor_insercao
+    rotas[idx_rota].inserir_servico(pos, servico, grafo)
     return rotas, True
 
 def calcular_custo_rota_completa(grafo, rota_sequencia, deposito_id):
+    if deposito_id == grafo.deposito:
+        # Custos entre serviços pré-calculados: a rota é avaliada só com indexação
+        return grafo.get_matriz_servicos().custo_rota(rota_sequencia)
     custo_total = 0
     demanda_total = 0
     current_node = deposito_id
+    tabela = grafo.servicos
     for service_id in rota_sequencia:
-        detalhes = grafo.get_service_details(service_id)
-        if not detalhes:
+        if not tabela.contem(service_id):
             return float("inf"), float("inf")
-        u_servico, v_servico = detalhes["endpoints"]
-        demanda_servico = detalhes["demanda"]
-        custo_servico = detalhes["custo_servico"]
-        custo_travessia_para_servico, _ = grafo.get_shortest_path(current_node, u_servico)
+        u_servico, v_servico = tabela.origem[service_id], tabela.destino[service_id]
+        demanda_servico = tabela.demanda[service_id]
+        custo_servico = tabela.custo_servico[service_id]
+        custo_travessia_para_servico = grafo.get_custo_caminho(current_node, u_servico)
         if custo_travessia_para_servico == float("inf"):
             return float("inf"), float("inf")
         custo_total += custo_travessia_para_servico + custo_servico
         demanda_total += demanda_servico
         current_node = v_servico
-    custo_retorno_deposito, _ = grafo.get_shortest_path(current_node, deposito_id)
+    custo_retorno_deposito = grafo.get_custo_caminho(current_node, deposito_id)
     if custo_retorno_deposito == float("inf"):
         return float("inf"), float("inf")
     custo_total += custo_retorno_deposito
@@ -72,16 +66,19 @@ def ruin_and_recreate(grafo, rotas, capacidade, porc_remove=0.35, max_iter=50):
     melhor_custo = sum(r.custo_acumulado for r in melhor_rotas)
     todos_servicos = []
     for rota in melhor_rotas:
-        todos_servicos += [item[1] for item in rota.sequencia_visitas_detalhada if item[0] == 'S']
+        todos_servicos += rota.servicos
     for iter in range(max_iter):
         num_remove = max(1, int(porc_remove * len(todos_servicos)))
         servicos_remover = random.sample(todos_servicos, num_remove)
+        removidos = set(servicos_remover)
         # Remove serviços das rotas
         novas_rotas = []
         for rota in melhor_rotas:
             nova_rota = copy.deepcopy(rota)
-            nova_rota.sequencia_visitas_detalhada = [item for item in rota.sequencia_visitas_detalhada if item[0] != 'S' or item[1] not in servicos_remover]
-            if any(item[0] == 'S' for item in nova_rota.sequencia_visitas_detalhada):
+            for pos in reversed(range(len(nova_rota.servicos))):
+                if nova_rota.servicos[pos] in removidos:
+                    nova_rota.remover_servico(pos, grafo)
+            if nova_rota.servicos:
                 novas_rotas.append(nova_rota)
         # Reinsere cada serviço removido na melhor posição possível
         sucesso = True
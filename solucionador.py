@@ -0,0 +1,183 @@
+import os
+import time
+
+# Os módulos de cada etapa (busca local, AG, leitura/escrita de soluções) são
+# importados dentro das funções que os usam: preparar_caminhos_minimos e as
+# constantes ficam disponíveis sem o custo de carregar o otimizador inteiro.
+
+# Acima deste número de vértices as matrizes V x V não são pré-calculadas: as linhas
+# de caminhos mínimos são obtidas sob demanda (ver Grafo.ativar_caminhos_sob_demanda)
+LIMIAR_VERTICES_SOB_DEMANDA = 5000
+
+PASTA_SOLUCOES_OTIMIZADAS = "solucoes_otimizadas"
+
+# Partidas do Path-Scanning multi-start e a fração de limite_tempo que elas podem usar
+TENTATIVAS_PATH_SCANNING = 30
+FRACAO_TEMPO_PATH_SCANNING = 0.2
+
+
+def preparar_caminhos_minimos(grafo, pasta_cache_matrizes=None):
+    """Configura o cache em disco e o modo sob demanda (grafos grandes) das matrizes."""
+    grafo.pasta_cache_matrizes = pasta_cache_matrizes
+    if len(grafo.vertices) > LIMIAR_VERTICES_SOB_DEMANDA:
+        grafo.ativar_caminhos_sob_demanda()
+
+
+def carregar_solucao_inicial(grafo, caminho_solucao):
+    """Lê e valida um sol-*.dat salvo anteriormente para usar como ponto de partida.
+
+    Returns:
+        tuple: (rotas, custo) com objetos Rota reconstruídos, ou None se o arquivo
+               não puder ser lido ou não for uma solução válida para o grafo.
+    """
+    from leitor_solucao import ler_solucao, reconstruir_rotas, validar_solucao
+
+    try:
+        solucao = ler_solucao(caminho_solucao)
+    except (OSError, ValueError) as e:
+        print(f"Aviso: solução inicial {caminho_solucao} ignorada ({e}).")
+        return None
+    validacao = validar_solucao(grafo, solucao)
+    if not validacao.valida:
+        print(f"Aviso: solução inicial {caminho_solucao} ignorada: {validacao.erros[0]}")
+        return None
+    return reconstruir_rotas(grafo, solucao), validacao.custo
+
+
+def resolver_instancia(grafo, nome_instancia, pasta_saida=PASTA_SOLUCOES_OTIMIZADAS, limite_tempo=None, solucao_inicial=None,
+                       workers_construcao=1):
+    """Executa o pipeline completo de otimização e grava a melhor solução.
+
+    Etapas: Path-Scanning multi-start (comparado ao Split de tours gigantes, e
+    trocado por ele quando este for melhor), otimização conservadora (2-opt), busca
+    local avançada (2-opt, relocate, swap) e algoritmo genético avançado. A melhor
+    das quatro é gravada em pasta_saida/sol-<instância>.dat.
+
+    Com solucao_inicial (caminho de um sol-*.dat de uma execução anterior), o
+    Path-Scanning é substituído pela solução salva, que passa a ser o ponto de
+    partida da busca local e a semente da população do algoritmo genético. Se o
+    arquivo não for uma solução válida da instância, o Path-Scanning é usado.
+
+    Args:
+        grafo (Grafo): Instância já carregada (as matrizes são calculadas se preciso).
+        nome_instancia (str): Nome do arquivo da instância (ex.: "BHW1.dat").
+        pasta_saida (str): Pasta do arquivo de solução.
+        limite_tempo (float): Tempo máximo em segundos para a instância. As etapas
+            construtivas e de busca local sempre rodam (o multi-start para de abrir
+            partidas após FRACAO_TEMPO_PATH_SCANNING do limite); o algoritmo
+            genético usa o tempo restante. None = sem limite.
+        solucao_inicial (str): Arquivo de solução para o início a quente (opcional).
+        workers_construcao (int): Processos usados pelas partidas do Path-Scanning.
+
+    Returns:
+        dict: Custos e tempos de cada etapa, o melhor método, o custo final e o
+              caminho do arquivo gravado (chaves "custo_<etapa>", "tempo_<etapa>",
+              "metodo", "custo_final", "arquivo", "rotas_iniciais", "inicio"). Em um
+              início a quente, "custo_path_scanning" é o custo da solução carregada.
+    """
+    from busca_local import two_opt, relocate, swap
+    from heuristica_path_scanning import construir_solucao_path_scanning_multi
+    from heuristica_split import construir_solucao_split, tour_gigante_de_rotas
+    from melhoria import melhorar_solucao_2opt
+    from algoritmo_genetico_avancado import otimizar_com_algoritmo_genetico_avancado
+    from gerar_arquivo_solucao import escrever_arquivo_solucao
+
+    inicio = time.time()
+    resultado = {}
+
+    if grafo.dist_matrix is None:
+        grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
+    resultado["tempo_caminhos"] = time.time() - inicio
+
+    # 1. Path-Scanning Multi-Start (ou a solução salva, no início a quente)
+    inicio_construcao = time.time()
+    carregada = carregar_solucao_inicial(grafo, solucao_inicial) if solucao_inicial else None
+    if carregada:
+        rotas_iniciais, custo_inicial = carregada
+        tempo_inicial = time.time() - inicio_construcao
+        metodo_inicial = "Solução Inicial Carregada"
+        resultado["inicio"] = solucao_inicial
+        print(f'[Início a Quente] Custo da solução carregada de {solucao_inicial}: {custo_inicial}')
+    else:
+        limite_construcao = None if limite_tempo is None else limite_tempo * FRACAO_TEMPO_PATH_SCANNING
+        rotas_iniciais, custo_inicial, tempo_inicial = construir_solucao_path_scanning_multi(
+            grafo, tentativas=TENTATIVAS_PATH_SCANNING, num_workers=workers_construcao, limite_tempo=limite_construcao)
+        metodo_inicial = "Path-Scanning Multi-Start"
+        resultado["inicio"] = "path_scanning"
+        print(f'[Multi-Start] Melhor custo inicial encontrado: {custo_inicial}')
+    resultado["custo_path_scanning"], resultado["tempo_path_scanning"] = custo_inicial, tempo_inicial
+
+    if not carregada:
+        # Split: o tour gigante do vizinho mais próximo e o da melhor partida recortados de
+        # forma ótima (o segundo nunca é pior que o próprio Path-Scanning)
+        inicio_split = time.time()
+        rotas_split, custo_split, _ = min((construir_solucao_split(grafo),
+                                           construir_solucao_split(grafo, tour_gigante_de_rotas(rotas_iniciais))),
+                                          key=lambda construcao: construcao[1])
+        resultado["custo_split"], resultado["tempo_split"] = custo_split, time.time() - inicio_split
+        print(f'[Split] Custo do tour gigante recortado: {custo_split}')
+        if custo_split < custo_inicial:
+            rotas_iniciais, custo_inicial = rotas_split, custo_split
+            metodo_inicial = "Split (Tour Gigante)"
+    resultado["rotas_iniciais"] = len(rotas_iniciais)
+
+    capacidade_maxima = grafo.capacidade
+
+    # 2. Otimização Conservadora
+    rotas_conserv, custo_conserv, tempo_conserv = melhorar_solucao_2opt(grafo, rotas_iniciais)
+    print(f'[Conservadora] Custo após otimização conservadora: {custo_conserv}')
+    resultado["custo_conservadora"], resultado["tempo_conservadora"] = custo_conserv, tempo_conserv
+
+    # 3. Busca Local Avançada (2-opt, relocate, swap)
+    inicio_busca = time.time()
+    # Cópias: os movimentos alteram as rotas no lugar e rotas_iniciais ainda concorre no final
+    melhor_rotas = [rota.copiar() for rota in rotas_iniciais]
+    for rota in melhor_rotas:
+        two_opt(rota, grafo)
+
+    for ciclo in range(3):
+        melhor_rotas = relocate(melhor_rotas, grafo, capacidade_maxima)
+        for rota in melhor_rotas:
+            two_opt(rota, grafo)
+    for ciclo in range(3):
+        melhor_rotas = swap(melhor_rotas, grafo, capacidade_maxima)
+        for rota in melhor_rotas:
+            two_opt(rota, grafo)
+    custo_melhorado = sum(rota.custo_acumulado for rota in melhor_rotas)
+    print(f'[Busca Local] Custo após melhorias locais: {custo_melhorado}')
+    resultado["custo_busca_local"], resultado["tempo_busca_local"] = custo_melhorado, time.time() - inicio_busca
+
+    # 4. Algoritmo Genético Avançado sobre a melhor solução encontrada até aqui
+    limite_ag = None if limite_tempo is None else max(0.0, limite_tempo - (time.time() - inicio))
+    rotas_rr, custo_rr, tempo_ag = otimizar_com_algoritmo_genetico_avancado(grafo, melhor_rotas, limite_tempo=limite_ag)
+    print(f'[Algoritmo Genético Avançado] Custo após AG: {custo_rr}')
+    resultado["custo_ag"], resultado["tempo_ag"] = custo_rr, tempo_ag
+
+    # Seleciona a melhor entre as quatro estratégias
+    melhor_solucao = rotas_iniciais
+    melhor_custo_final = custo_inicial
+    metodo = metodo_inicial
+    if custo_conserv < melhor_custo_final:
+        melhor_solucao = rotas_conserv
+        melhor_custo_final = custo_conserv
+        metodo = "Otimização Conservadora"
+    if custo_melhorado < melhor_custo_final:
+        melhor_solucao = melhor_rotas
+        melhor_custo_final = custo_melhorado
+        metodo = "Busca Local Avançada"
+    if custo_rr < melhor_custo_final:
+        melhor_solucao = rotas_rr
+        melhor_custo_final = custo_rr
+        metodo = "Ruin & Recreate"
+    print(f'[FINAL] Melhor método: {metodo}, Custo final: {melhor_custo_final}')
+
+    os.makedirs(pasta_saida, exist_ok=True)
+    nome_base_instancia = os.path.splitext(nome_instancia)[0]
+    caminho_arquivo_saida = os.path.join(pasta_saida, f"sol-{nome_base_instancia}.dat")
+    escrever_arquivo_solucao(melhor_solucao, melhor_custo_final, grafo, caminho_arquivo_saida)
+
+    resultado["metodo"] = metodo
+    resultado["custo_final"] = melhor_custo_final
+    resultado["arquivo"] = caminho_arquivo_saida
+    resultado["tempo_total"] = time.time() - inicio
+    return resultado
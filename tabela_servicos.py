@@ -0,0 +1,91 @@
+from array import array
+from collections.abc import Mapping
+
+TIPOS_SERVICO = "NEA" # Nó, aresta e arco requeridos
+SEM_SERVICO = 0       # Código de tipo das posições sem serviço
+
+
+class TabelaServicos(Mapping):
+    """Tabela de serviços em arrays paralelos indexados por service_id.
+
+    demanda[sid], custo_servico[sid], origem[sid] e destino[sid] (as extremidades
+    endpoints) e tipo[sid] (código do caractere 'N', 'E' ou 'A') ficam em `array`s
+    contíguos; a posição 0 não é usada, como em MatrizServicos. Nos laços críticos
+    use esses arrays diretamente:
+
+        demanda = grafo.servicos.demanda
+        total = sum(demanda[sid] for sid in rota)
+
+    Para compatibilidade, a tabela também é um Mapping somente leitura no formato
+    antigo do service_map ({service_id: {'tipo', 'id', 'demanda', 'custo_servico',
+    'endpoints'}}); cada acesso monta um dicionário novo, então alterá-lo não
+    altera a tabela. Use adicionar() para incluir serviços.
+    """
+
+    def __init__(self):
+        self.demanda = array("q", [0])
+        self.custo_servico = array("q", [0])
+        self.origem = array("q", [0])
+        self.destino = array("q", [0])
+        self.tipo = bytearray(1)
+        self.ids = [None] # IDs originais (número do nó ou rótulo da aresta/arco)
+        self._total = 0
+
+    def adicionar(self, service_id, tipo, id_original, demanda, custo_servico, endpoints):
+        """Inclui (ou substitui) o serviço service_id."""
+        if service_id < 1:
+            raise ValueError(f"service_id inválido: {service_id}")
+        if tipo not in TIPOS_SERVICO:
+            raise ValueError(f"Tipo de serviço inválido: {tipo}")
+        if service_id >= len(self.tipo):
+            faltam = service_id + 1 - len(self.tipo)
+            for coluna in (self.demanda, self.custo_servico, self.origem, self.destino):
+                coluna.extend([0] * faltam)
+            self.tipo.extend(bytes(faltam))
+            self.ids.extend([None] * faltam)
+        if not self.tipo[service_id]:
+            self._total += 1
+
+        u, v = endpoints
+        self.demanda = _com_valor(self.demanda, demanda)
+        self.custo_servico = _com_valor(self.custo_servico, custo_servico)
+        self.demanda[service_id] = demanda
+        self.custo_servico[service_id] = custo_servico
+        self.origem[service_id] = u
+        self.destino[service_id] = v
+        self.tipo[service_id] = ord(tipo)
+        self.ids[service_id] = id_original
+
+    def contem(self, service_id):
+        """True se service_id é um serviço da tabela (mais rápido que `in`)."""
+        return 0 < service_id < len(self.tipo) and self.tipo[service_id] != SEM_SERVICO
+
+    def __getitem__(self, service_id):
+        if not self.__contains__(service_id):
+            raise KeyError(service_id)
+        return {'tipo': chr(self.tipo[service_id]), 'id': self.ids[service_id], 'demanda': self.demanda[service_id],
+                'custo_servico': self.custo_servico[service_id],
+                'endpoints': (self.origem[service_id], self.destino[service_id])}
+
+    def __contains__(self, service_id):
+        try:
+            return self.contem(service_id)
+        except (TypeError, IndexError):
+            return False
+
+    def __iter__(self):
+        tipo = self.tipo
+        return (sid for sid in range(1, len(tipo)) if tipo[sid])
+
+    def __len__(self):
+        return self._total
+
+    def __repr__(self):
+        return f"TabelaServicos({dict(self.items())})"
+
+
+def _com_valor(coluna, valor):
+    """Retorna a coluna capaz de guardar valor: custos/demandas não inteiros passam a 'd'."""
+    if coluna.typecode == "q" and not isinstance(valor, int):
+        return array("d", coluna)
+    return coluna
@@ -0,0 +1,90 @@
+import os
+import random
+
+import pytest
+
+from heuristica_path_scanning import construir_solucao_path_scanning
+from heuristica_split import prefixos_tour
+from parser import ler_instancia
+from prefixos_rota import PrefixosRota
+
+PASTA_INSTANCIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selected_instances")
+
+
+def sem_mensagem(mensagem):
+    pass
+
+
+def ler(nome):
+    grafo = ler_instancia(os.path.join(PASTA_INSTANCIAS, nome), info=sem_mensagem, aviso=sem_mensagem)
+    grafo.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    return grafo
+
+
+@pytest.fixture(scope="module")
+def bhw1():
+    grafo = ler("BHW1.dat")
+    rotas, _, _ = construir_solucao_path_scanning(grafo)
+    return grafo, rotas
+
+
+def sem_acesso_direto(grafo, funcao):
+    """Executa funcao() com o grafo tratado como não normalizado (caminho por MatrizDensa.valor)."""
+    grafo.normalizado = False
+    try:
+        return funcao()
+    finally:
+        grafo.normalizado = True
+
+
+def test_vetor_plano_igual_a_valor(bhw1):
+    grafo, _ = bhw1
+    dados, n, indice = grafo.distancias_por_indice()
+    assert all(dados[indice[u] * n + indice[v]] == grafo.dist_matrix.valor(u, v)
+               for u in grafo.vertices for v in grafo.vertices
+               if grafo.dist_matrix.valor(u, v) != float("inf"))
+
+
+def test_deltas_iguais_com_e_sem_acesso_direto(bhw1):
+    grafo, rotas = bhw1
+    rng = random.Random(5)
+    tabela = grafo.servicos
+    for rota in rotas:
+        args = (grafo, rota.servicos, rota.origens, rota.destinos)
+        direto = PrefixosRota(*args, inverter_arestas=True)
+        por_valor = sem_acesso_direto(grafo, lambda: PrefixosRota(*args, inverter_arestas=True))
+        assert direto.dados is not None and por_valor.dados is None
+        assert (direto.ida, direto.volta) == (por_valor.ida, por_valor.volta)
+        k = len(rota.servicos)
+        for _ in range(30):
+            i = rng.randrange(k)
+            j = rng.randrange(i, k)
+            sid = rng.choice(list(tabela))
+            u, v, cs = tabela.origem[sid], tabela.destino[sid], tabela.custo_servico[sid]
+            assert direto.delta_remocao(i) == por_valor.delta_remocao(i)
+            assert direto.delta_insercao(j, u, v, cs) == por_valor.delta_insercao(j, u, v, cs)
+            assert direto.delta_substituicao(i, u, v, cs) == por_valor.delta_substituicao(i, u, v, cs)
+            assert direto.delta_inversao(i, j) == por_valor.delta_inversao(i, j)
+
+
+def test_prefixos_do_split_iguais_com_e_sem_acesso_direto(bhw1):
+    grafo, _ = bhw1
+    tour = list(grafo.servicos)
+    random.Random(2).shuffle(tour)
+    assert prefixos_tour(grafo, tour) == sem_acesso_direto(grafo, lambda: prefixos_tour(grafo, tour))
+
+
+def test_acesso_direto_some_quando_as_garantias_deixam_de_valer():
+    grafo = ler("mgval_0.50_1A.dat")
+    assert grafo.normalizado and grafo.distancias_por_indice() is not None
+
+    # Matriz calculada em outra ordem de vértices
+    grafo.definir_ordem_vertices(grafo.ids_vertices[::-1])
+    grafo.normalizado = True
+    assert grafo.distancias_por_indice() is None
+
+    # Remoção de conexão: algum serviço pode perder o caminho até o depósito
+    grafo = ler("mgval_0.50_1A.dat")
+    u, vizinhos = next((u, vizinhos) for u, vizinhos in grafo.adj.items() if vizinhos)
+    grafo.remover_conexao(u, vizinhos[0][0])
+    assert not grafo.normalizado and grafo.distancias_por_indice() is None
@@ -0,0 +1,68 @@
+import os
+import random
+from itertools import product
+
+import pytest
+
+from algoritmo_genetico_avancado import orientar_servicos, otimizar_com_algoritmo_genetico_avancado
+from busca_local import relocate, two_opt
+from heuristica_path_scanning import construir_solucao_path_scanning
+from parser import ler_instancia
+
+PASTA_INSTANCIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selected_instances")
+
+
+def sem_mensagem(mensagem):
+    pass
+
+
+@pytest.fixture(scope="module")
+def bhw1():
+    grafo = ler_instancia(os.path.join(PASTA_INSTANCIAS, "BHW1.dat"), info=sem_mensagem, aviso=sem_mensagem)
+    grafo.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    return grafo
+
+
+def custo_deslocamentos(grafo, origens, destinos):
+    custo, atual = 0, grafo.deposito
+    for u, v in zip(origens, destinos):
+        custo += grafo.get_custo_caminho(atual, u)
+        atual = v
+    return custo + grafo.get_custo_caminho(atual, grafo.deposito)
+
+
+def test_orientacao_otima_para_a_sequencia(bhw1):
+    tabela = bhw1.servicos
+    rng = random.Random(4)
+    for _ in range(20):
+        rota = rng.sample(list(tabela), 8)
+        origens, destinos = orientar_servicos(bhw1, rota)
+        for sid, u, v in zip(rota, origens, destinos):
+            assert (u, v) == (tabela.origem[sid], tabela.destino[sid]) or \
+                (tabela.tipo[sid] == ord("E") and (v, u) == (tabela.origem[sid], tabela.destino[sid]))
+
+        melhor = float("inf")
+        sentidos = [[(tabela.origem[s], tabela.destino[s])] + ([(tabela.destino[s], tabela.origem[s])]
+                    if tabela.tipo[s] == ord("E") else []) for s in rota]
+        for escolha in product(*sentidos):
+            melhor = min(melhor, custo_deslocamentos(bhw1, [u for u, _ in escolha], [v for _, v in escolha]))
+        assert custo_deslocamentos(bhw1, origens, destinos) == melhor
+
+
+def test_ag_nao_piora_rotas_com_arestas_invertidas(bhw1, capsys):
+    random.seed(1)
+    rotas, _, _ = construir_solucao_path_scanning(bhw1)
+    for rota in rotas:
+        two_opt(rota, bhw1)
+    rotas = relocate(rotas, bhw1, bhw1.capacidade)
+    custo_entrada = sum(rota.custo_acumulado for rota in rotas)
+
+    resultado, custo, _ = otimizar_com_algoritmo_genetico_avancado(bhw1, rotas, limite_tempo=0.5)
+    assert custo <= custo_entrada
+    assert custo == sum(rota.custo_acumulado for rota in resultado)
+    for rota in resultado:
+        copia = rota.copiar()
+        copia.atualizar_demanda_custo(bhw1)
+        assert copia.custo_acumulado == rota.custo_acumulado
+        assert rota.demanda_acumulada <= bhw1.capacidade
+    assert sorted(sid for rota in resultado for sid in rota.servicos) == sorted(bhw1.servicos)
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from arquivo_solucoes import SUFIXO_INDICE, EscritorArquivoSolucoes, LeitorArquivoSolucoes
+from gerar_arquivo_solucao import (TAMANHO_BUFFER, compactar_rotas, escrever_arquivo_solucao,
+                                   escrever_solucao_compacta, formatar_solucao)
+from heuristica_path_scanning import construir_solucao_path_scanning
+from parser import ler_instancia
+
+PASTA_INSTANCIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selected_instances")
+
+
+def sem_mensagem(mensagem):
+    pass
+
+
+@pytest.fixture(scope="module")
+def solucao_bhw1():
+    grafo = ler_instancia(os.path.join(PASTA_INSTANCIAS, "BHW1.dat"), info=sem_mensagem, aviso=sem_mensagem)
+    grafo.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    rotas, custo, _ = construir_solucao_path_scanning(grafo)
+    return grafo, rotas, custo
+
+
+def texto_registro(i):
+    return f"{100 + i}\n1\n1\n1\n0 1 1 1 {100 + i} 3 (D 0,1,1) (S {i},1,2) (D 0,1,1)\n"
+
+
+def test_escrita_compacta_igual_a_escrita_por_rotas(solucao_bhw1, tmp_path):
+    grafo, rotas, custo = solucao_bhw1
+    por_rotas, compacta = tmp_path / "rotas.dat", tmp_path / "compacta.dat"
+    escrever_arquivo_solucao(rotas, custo, grafo, str(por_rotas))
+    escrever_solucao_compacta(compactar_rotas(rotas), custo, len(grafo.servicos), str(compacta))
+    assert compacta.read_text(encoding="utf-8") == por_rotas.read_text(encoding="utf-8")
+
+
+def test_registros_relidos_pelo_indice(solucao_bhw1, tmp_path):
+    grafo, rotas, custo = solucao_bhw1
+    texto = formatar_solucao(compactar_rotas(rotas), custo, len(grafo.servicos))
+    caminho = str(tmp_path / "candidatas.sols")
+    with EscritorArquivoSolucoes(caminho) as arquivo:
+        assert arquivo.adicionar(compactar_rotas(rotas), custo, len(grafo.servicos)) == 0
+        for i in range(1, 50):
+            assert arquivo.adicionar_texto(texto_registro(i), 100 + i) == i
+
+    with LeitorArquivoSolucoes(caminho) as leitor:
+        assert len(leitor) == 50
+        assert leitor.custos() == [float(custo)] + [100.0 + i for i in range(1, 50)]
+        assert leitor[0] == texto
+        assert leitor[37] == texto_registro(37)
+
+
+def test_reabrir_acrescenta_e_continua_a_numeracao(tmp_path):
+    caminho = str(tmp_path / "candidatas.sols")
+    with EscritorArquivoSolucoes(caminho) as arquivo:
+        for i in range(3):
+            arquivo.adicionar_texto(texto_registro(i), 100 + i)
+    with EscritorArquivoSolucoes(caminho) as arquivo:
+        assert arquivo.adicionar_texto(texto_registro(3), 103) == 3
+    with LeitorArquivoSolucoes(caminho) as leitor:
+        assert list(leitor) == [texto_registro(i) for i in range(4)]
+
+
+def test_escritor_nao_fechado_so_expoe_registros_gravados(tmp_path):
+    caminho = str(tmp_path / "candidatas.sols")
+    arquivo = EscritorArquivoSolucoes(caminho)
+    total = TAMANHO_BUFFER // 20 + 100 # Índice pendente passa do buffer pelo menos uma vez
+    for i in range(total):
+        arquivo.adicionar_texto(texto_registro(i), 100 + i)
+
+    # Sem fechar: o índice só tem entradas cujos dados já estão no arquivo
+    with LeitorArquivoSolucoes(caminho) as leitor:
+        assert 0 < len(leitor) < total
+        for i in (0, len(leitor) - 1):
+            assert leitor[i] == texto_registro(i)
+    arquivo.fechar()
+    with LeitorArquivoSolucoes(caminho) as leitor:
+        assert len(leitor) == total
+
+
+def test_entradas_alem_do_fim_dos_dados_sao_descartadas(tmp_path):
+    caminho = str(tmp_path / "candidatas.sols")
+    with EscritorArquivoSolucoes(caminho) as arquivo:
+        for i in range(5):
+            arquivo.adicionar_texto(texto_registro(i), 100 + i)
+    # Dados truncados no meio do último registro e uma entrada incompleta no índice
+    os.truncate(caminho, os.path.getsize(caminho) - 1)
+    with open(caminho + SUFIXO_INDICE, "ab") as f:
+        f.write(b"\x00" * 5)
+
+    with LeitorArquivoSolucoes(caminho) as leitor:
+        assert list(leitor) == [texto_registro(i) for i in range(4)]
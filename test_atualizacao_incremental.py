@@ -0,0 +1,96 @@
+import random
+
+from grafo import Grafo
+
+INF = float("inf")
+
+
+def montar_grafo(semente=3, n=35, conexoes=140):
+    """Grafo aleatório só com arcos, para que cada alteração afete uma única conexão."""
+    rng = random.Random(semente)
+    g = Grafo()
+    g.vertices.update(range(1, n + 1))
+    for _ in range(conexoes):
+        u, v = rng.randint(1, n), rng.randint(1, n)
+        g.adicionar_arco_nao_requerido(u, v, rng.randint(1, 30))
+    g.deposito = 1
+    return g
+
+
+def copiar_conexoes(origem):
+    """Novo grafo com as mesmas conexões, para o cálculo completo de referência."""
+    g = Grafo()
+    g.vertices.update(origem.vertices)
+    for u, vizinhos in origem.adj.items():
+        for v, custo in vizinhos:
+            g.adicionar_arco_nao_requerido(u, v, custo)
+    g.deposito = origem.deposito
+    return g
+
+
+def distancias_erradas(g):
+    """Número de pares cuja distância difere de um cálculo completo sobre o grafo atual."""
+    referencia = copiar_conexoes(g)
+    referencia.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    return sum(1 for u in g.vertices for v in g.vertices
+               if g.dist_matrix.valor(u, v) != referencia.dist_matrix.valor(u, v))
+
+
+def caminhos_consistentes(g):
+    """Os predecessores reconstroem, para todo par alcançável, um caminho com o custo da matriz."""
+    for u in g.vertices:
+        for v in g.vertices:
+            custo, caminho = g.get_shortest_path(u, v)
+            if custo == INF:
+                continue
+            total = sum(min(c for w, c in g.adj[a] if w == b) for a, b in zip(caminho, caminho[1:]))
+            if total != custo:
+                return False
+    return True
+
+
+def conexao_usada(g):
+    """Uma conexão u -> v que está em algum caminho mínimo (aumentar seu custo muda as matrizes)."""
+    for u, vizinhos in sorted(g.adj.items()):
+        for v, custo in vizinhos:
+            if u != v and g.pred_matrix.valor(u, v) == u:
+                return u, v, custo
+    raise AssertionError("nenhuma conexão em caminho mínimo")
+
+
+def test_sequencia_de_alteracoes_igual_ao_calculo_completo():
+    rng = random.Random(11)
+    g = montar_grafo()
+    g.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    for _ in range(40):
+        if rng.random() < 0.5:
+            u, v, custo = conexao_usada(g)
+            novo = INF if rng.random() < 0.3 else custo + rng.randint(1, 40)
+        else:
+            u, v = rng.randint(1, 35), rng.randint(1, 35)
+            novo = rng.randint(1, 10)
+        g.atualizar_custo_conexao(u, v, novo)
+        assert distancias_erradas(g) == 0
+    assert caminhos_consistentes(g)
+
+
+def test_aumento_de_custo_apos_carregar_do_cache(tmp_path, capsys):
+    for _ in range(2):
+        g = montar_grafo()
+        g.definir_ordem_vertices(sorted(g.vertices, reverse=True))
+        g.pasta_cache_matrizes = str(tmp_path)
+        g.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    assert "carregadas do cache" in capsys.readouterr().out
+
+    u, v, custo = conexao_usada(g)
+    g.atualizar_custo_conexao(u, v, custo + 50)
+    assert distancias_erradas(g) == 0
+
+
+def test_aumento_de_custo_apos_mudar_a_ordem_dos_vertices():
+    g = montar_grafo()
+    g.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    g.definir_ordem_vertices(sorted(g.vertices, reverse=True))
+    u, v, custo = conexao_usada(g)
+    g.atualizar_custo_conexao(u, v, custo + 50)
+    assert distancias_erradas(g) == 0
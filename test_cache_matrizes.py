@@ -0,0 +1,68 @@
+import os
+import random
+
+from cache_matrizes import caminho_no_cache, carregar_matrizes, hash_grafo
+from grafo import Grafo
+
+
+def montar_grafo(semente=7, n=40, conexoes=160, ordem=None):
+    """Grafo aleatório com arestas e arcos; `ordem` recebe os IDs ordenados e devolve a ordem dos vértices."""
+    rng = random.Random(semente)
+    g = Grafo()
+    g.vertices.update(range(1, n + 1))
+    for _ in range(conexoes):
+        u, v = rng.randint(1, n), rng.randint(1, n)
+        if rng.random() < 0.5:
+            g.adicionar_aresta_nao_requerida(u, v, rng.randint(1, 20))
+        else:
+            g.adicionar_arco_nao_requerido(u, v, rng.randint(1, 20))
+    g.deposito = 1
+    if ordem:
+        g.definir_ordem_vertices(ordem(sorted(g.vertices)))
+    return g
+
+
+def matrizes_iguais(a, b, vertices, predecessores=True):
+    """Compara as matrizes; em ordens diferentes os empates podem escolher outro predecessor."""
+    return all(a.dist_matrix.valor(u, v) == b.dist_matrix.valor(u, v) and
+               (not predecessores or a.pred_matrix.valor(u, v) == b.pred_matrix.valor(u, v))
+               for u in vertices for v in vertices)
+
+
+def test_matrizes_do_cache_iguais_as_calculadas(tmp_path):
+    calculado = montar_grafo()
+    calculado.pasta_cache_matrizes = str(tmp_path)
+    calculado.calcular_distancias_predecessores_floyd_warshall(backend="python")
+
+    caminho = caminho_no_cache(str(tmp_path), hash_grafo(calculado))
+    assert carregar_matrizes(caminho) is not None
+
+    carregado = montar_grafo()
+    carregado.pasta_cache_matrizes = str(tmp_path)
+    carregado.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    assert matrizes_iguais(calculado, carregado, calculado.vertices)
+
+
+def test_chave_muda_com_conexoes_e_ordem_dos_vertices():
+    base = hash_grafo(montar_grafo())
+    assert hash_grafo(montar_grafo()) == base
+    assert hash_grafo(montar_grafo(ordem=lambda nos: nos[::-1])) != base
+
+    alterado = montar_grafo()
+    alterado.adicionar_arco_nao_requerido(1, 2, 0)
+    assert hash_grafo(alterado) != base
+
+
+def test_cache_em_outra_ordem_nao_e_reaproveitado(tmp_path):
+    normal = montar_grafo()
+    normal.pasta_cache_matrizes = str(tmp_path)
+    normal.calcular_distancias_predecessores_floyd_warshall(backend="python")
+
+    invertido = montar_grafo(ordem=lambda nos: nos[::-1])
+    invertido.pasta_cache_matrizes = str(tmp_path)
+    # Mesmo que a chave coincidisse, matrizes gravadas em outra ordem não podem ser usadas
+    os.replace(caminho_no_cache(str(tmp_path), hash_grafo(normal)),
+               caminho_no_cache(str(tmp_path), hash_grafo(invertido)))
+    invertido.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    assert invertido.dist_matrix.nos == list(invertido.congelar_adjacencia().nos)
+    assert matrizes_iguais(normal, invertido, normal.vertices, predecessores=False)
@@ -0,0 +1,87 @@
+import os
+import random
+from itertools import combinations
+
+import pytest
+
+from heuristica_split import split, split_bellman, split_linear, tour_gigante_vizinho_mais_proximo
+from parser import ler_instancia
+
+PASTA_INSTANCIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selected_instances")
+INSTANCIAS = ["BHW1.dat", "CBMix1.dat", "mgval_0.50_1A.dat", "DI-NEARP-n240-Q2k.dat"]
+
+
+def sem_mensagem(mensagem):
+    pass
+
+
+@pytest.fixture(scope="module", params=INSTANCIAS)
+def grafo(request):
+    grafo = ler_instancia(os.path.join(PASTA_INSTANCIAS, request.param), info=sem_mensagem, aviso=sem_mensagem)
+    grafo.calcular_distancias_predecessores_floyd_warshall(algoritmo="auto")
+    return grafo
+
+
+def custo_rota(grafo, rota):
+    """Custo recalculado visita a visita: depósito -> serviços na ordem -> depósito."""
+    tabela = grafo.servicos
+    custo, atual = 0, grafo.deposito
+    for sid in rota:
+        custo += grafo.dist_matrix.valor(atual, tabela.origem[sid]) + tabela.custo_servico[sid]
+        atual = tabela.destino[sid]
+    return custo + grafo.dist_matrix.valor(atual, grafo.deposito)
+
+
+def conferir_rotas(grafo, tour, rotas, custo):
+    assert [sid for rota in rotas for sid in rota] == tour
+    assert all(sum(grafo.servicos.demanda[sid] for sid in rota) <= grafo.capacidade for rota in rotas)
+    assert custo == sum(custo_rota(grafo, rota) for rota in rotas)
+
+
+def tours(grafo, quantidade=5):
+    rng = random.Random(len(grafo.servicos))
+    yield tour_gigante_vizinho_mais_proximo(grafo)
+    for _ in range(quantidade):
+        tour = list(grafo.servicos)
+        rng.shuffle(tour)
+        yield tour
+
+
+def test_linear_igual_a_bellman(grafo):
+    for tour in tours(grafo):
+        rotas_b, custo_b = split_bellman(grafo, tour)
+        rotas_l, custo_l = split_linear(grafo, tour)
+        conferir_rotas(grafo, tour, rotas_b, custo_b)
+        conferir_rotas(grafo, tour, rotas_l, custo_l)
+        assert custo_l == custo_b
+        assert split(grafo, tour)[1] == custo_b
+
+
+def test_split_e_otimo_para_o_tour(grafo):
+    """Em trechos curtos do tour, compara com todas as formas de cortá-lo."""
+    rng = random.Random(1)
+    capacidade = grafo.capacidade
+    for _ in range(5):
+        tour = rng.sample(list(grafo.servicos), min(10, len(grafo.servicos)))
+        melhor = float("inf")
+        for k in range(len(tour)):
+            for cortes in combinations(range(1, len(tour)), k):
+                limites = (0, *cortes, len(tour))
+                rotas = [tour[a:b] for a, b in zip(limites, limites[1:])]
+                if all(sum(grafo.servicos.demanda[sid] for sid in rota) <= capacidade for rota in rotas):
+                    melhor = min(melhor, sum(custo_rota(grafo, rota) for rota in rotas))
+        assert split_linear(grafo, tour)[1] == melhor
+        assert split_bellman(grafo, tour)[1] == melhor
+
+
+def test_servico_maior_que_a_capacidade(grafo):
+    tour = list(grafo.servicos)
+    capacidade = grafo.capacidade
+    grafo.capacidade = max(grafo.servicos.demanda[sid] for sid in tour) - 1
+    try:
+        with pytest.raises(ValueError):
+            split_bellman(grafo, tour)
+        with pytest.raises(ValueError):
+            split_linear(grafo, tour)
+    finally:
+        grafo.capacidade = capacidade
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from instancia_compilada import carregar_instancia_compilada, compilar_instancia, eh_instancia_compilada
+from parser import ler_instancia
+
+PASTA_INSTANCIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selected_instances")
+INSTANCIAS = ["BHW1.dat", "CBMix1.dat", "mgval_0.50_1A.dat", "DI-NEARP-n240-Q2k.dat"]
+
+
+def sem_mensagem(mensagem):
+    pass
+
+
+def ler_texto(nome):
+    return ler_instancia(os.path.join(PASTA_INSTANCIAS, nome), info=sem_mensagem, aviso=sem_mensagem, normalizar=False)
+
+
+def conexoes(grafo):
+    return {u: sorted(vizinhos) for u, vizinhos in grafo.adj.items() if vizinhos}
+
+
+def servicos(grafo):
+    tabela = grafo.servicos
+    return [(tabela.tipo[sid], tabela.ids[sid], tabela.origem[sid], tabela.destino[sid],
+             tabela.demanda[sid], tabela.custo_servico[sid]) for sid in tabela]
+
+
+@pytest.mark.parametrize("nome", INSTANCIAS)
+def test_ida_e_volta_preserva_a_instancia(nome, tmp_path):
+    original = ler_texto(nome)
+    caminho = str(tmp_path / nome)
+    compilar_instancia(original, caminho)
+    assert eh_instancia_compilada(caminho)
+
+    carregado = carregar_instancia_compilada(caminho)
+    assert (carregado.deposito, carregado.capacidade) == (original.deposito, original.capacidade)
+    assert carregado.vertices == original.vertices
+    assert conexoes(carregado) == conexoes(original)
+    assert servicos(carregado) == servicos(original)
+    assert carregado.requeridos_v == original.requeridos_v
+    assert carregado.requeridos_e == original.requeridos_e
+    assert carregado.requeridos_a == original.requeridos_a
+    assert carregado.arestas_nao_req == original.arestas_nao_req
+    assert carregado.arcos_nao_req == original.arcos_nao_req
+
+
+def test_ler_instancia_reconhece_o_formato_compilado(tmp_path):
+    caminho = str(tmp_path / "BHW1.dat")
+    compilar_instancia(ler_texto("BHW1.dat"), caminho)
+    texto = ler_instancia(os.path.join(PASTA_INSTANCIAS, "BHW1.dat"), info=sem_mensagem, aviso=sem_mensagem)
+    compilado = ler_instancia(caminho, info=sem_mensagem, aviso=sem_mensagem)
+    assert compilado.ids_vertices == texto.ids_vertices
+    assert servicos(compilado) == servicos(texto)
+
+
+def test_arquivo_truncado_gera_value_error(tmp_path):
+    caminho = str(tmp_path / "BHW1.dat")
+    compilar_instancia(ler_texto("BHW1.dat"), caminho)
+    with open(caminho, "rb") as f:
+        conteudo = f.read()
+    with open(caminho, "wb") as f:
+        f.write(conteudo[:-9])
+    with pytest.raises(ValueError):
+        carregar_instancia_compilada(caminho)
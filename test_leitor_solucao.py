@@ -0,0 +1,123 @@
+import os
+from array import array
+
+import pytest
+
+from gerar_arquivo_solucao import RotaCompacta, compactar_rotas, formatar_solucao
+from heuristica_path_scanning import construir_solucao_path_scanning
+from leitor_solucao import _recalcular_numpy, _recalcular_python, ler_texto_solucao, validar_solucao
+from parser import ler_instancia
+
+PASTA_INSTANCIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selected_instances")
+
+
+def sem_mensagem(mensagem):
+    pass
+
+
+@pytest.fixture(scope="module")
+def instancia():
+    grafo = ler_instancia(os.path.join(PASTA_INSTANCIAS, "mgval_0.50_1A.dat"), info=sem_mensagem, aviso=sem_mensagem)
+    grafo.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    rotas, _, _ = construir_solucao_path_scanning(grafo)
+    visitas = [list(zip(r.servicos, r.origens, r.destinos)) for r in rotas]
+    return grafo, visitas
+
+
+def custo_caminho(grafo, u, v):
+    return 0 if u == v else grafo.get_shortest_path(u, v)[0]
+
+
+def montar_texto(grafo, visitas_por_rota):
+    """Texto de solução com demanda e custo declarados recalculados visita a visita."""
+    tabela = grafo.servicos
+    rotas, total = [], 0
+    for indice, visitas in enumerate(visitas_por_rota):
+        custo, demanda, atual = 0, 0, grafo.deposito
+        for sid, u, v in visitas:
+            custo += custo_caminho(grafo, atual, u) + tabela.custo_servico[sid]
+            demanda += tabela.demanda[sid]
+            atual = v
+        custo += custo_caminho(grafo, atual, grafo.deposito)
+        total += custo
+        rotas.append(RotaCompacta(indice + 1, array("i", [s for s, _, _ in visitas]), array("i", [u for _, u, _ in visitas]),
+                                  array("i", [v for _, _, v in visitas]), demanda, custo))
+    return formatar_solucao(rotas, total, len(tabela))
+
+
+def validar(grafo, visitas_por_rota):
+    return validar_solucao(grafo, ler_texto_solucao(montar_texto(grafo, visitas_por_rota)))
+
+
+def test_solucao_do_path_scanning_e_valida(instancia):
+    grafo, visitas = instancia
+    resultado = validar(grafo, visitas)
+    assert resultado.valida, resultado.erros
+    assert resultado.custo == ler_texto_solucao(montar_texto(grafo, visitas)).custo_total
+
+
+def test_arquivo_gravado_do_path_scanning_e_valido(instancia):
+    grafo, _ = instancia
+    rotas, custo, _ = construir_solucao_path_scanning(grafo)
+    texto = formatar_solucao(compactar_rotas(rotas), custo, len(grafo.servicos))
+    resultado = validar_solucao(grafo, ler_texto_solucao(texto))
+    assert resultado.valida, resultado.erros
+
+
+def test_recalculo_numpy_igual_ao_python(instancia):
+    pytest.importorskip("numpy")
+    grafo, visitas = instancia
+    solucao = ler_texto_solucao(montar_texto(grafo, visitas))
+    assert _recalcular_numpy(grafo, solucao) == _recalcular_python(grafo, solucao)
+
+
+def test_aresta_pode_ser_atendida_nos_dois_sentidos(instancia):
+    grafo, visitas = instancia
+    aresta = ord("E")
+    invertidas = [[(sid, v, u) if grafo.servicos.tipo[sid] == aresta else (sid, u, v) for sid, u, v in rota]
+                  for rota in visitas]
+    assert invertidas != visitas
+    resultado = validar(grafo, invertidas)
+    assert resultado.valida, resultado.erros
+
+
+def test_servico_faltando_ou_repetido(instancia):
+    grafo, visitas = instancia
+    faltando = [visitas[0][1:]] + visitas[1:]
+    assert any("não atendidos" in erro for erro in validar(grafo, faltando).erros)
+
+    repetido = [visitas[0] + visitas[1][:1]] + visitas[1:]
+    assert any("mais de uma vez" in erro for erro in validar(grafo, repetido).erros)
+
+
+def test_arco_em_sentido_errado(instancia):
+    grafo, visitas = instancia
+    arco = ord("A")
+    rota, posicao = next((r, p) for r, rota in enumerate(visitas) for p, (sid, u, v) in enumerate(rota)
+                         if grafo.servicos.tipo[sid] == arco and u != v)
+    alterado = [list(r) for r in visitas]
+    sid, u, v = alterado[rota][posicao]
+    alterado[rota][posicao] = (sid, v, u)
+    assert any("visitado como" in erro for erro in validar(grafo, alterado).erros)
+
+
+def test_custo_declarado_diferente(instancia):
+    grafo, visitas = instancia
+    texto = montar_texto(grafo, visitas)
+    linhas = texto.splitlines(keepends=True)
+    partes = linhas[4].split(" ", 5)
+    partes[4] = str(int(partes[4]) + 1)
+    linhas[4] = " ".join(partes)
+    erros = validar_solucao(grafo, ler_texto_solucao("".join(linhas))).erros
+    assert any("custo declarado" in erro for erro in erros)
+
+
+def test_capacidade_excedida(instancia):
+    grafo, visitas = instancia
+    juntas = [[visita for rota in visitas for visita in rota]]
+    assert any("excede a capacidade" in erro for erro in validar(grafo, juntas).erros)
+
+
+def test_texto_mal_formatado():
+    with pytest.raises(ValueError):
+        ler_texto_solucao("10\n2\n1\n1\n0 1 1 5 10 3 (D 0,1,1) (S 1,1,2) (D 0,1,1)\n")
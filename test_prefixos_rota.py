@@ -0,0 +1,83 @@
+import os
+import random
+
+import pytest
+
+from heuristica_path_scanning import construir_solucao_path_scanning
+from parser import ler_instancia
+from prefixos_rota import PrefixosRota
+
+PASTA_INSTANCIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selected_instances")
+
+
+def sem_mensagem(mensagem):
+    pass
+
+
+@pytest.fixture(scope="module", params=["BHW1.dat", "mgval_0.50_1A.dat", "CBMix1.dat"])
+def instancia(request):
+    grafo = ler_instancia(os.path.join(PASTA_INSTANCIAS, request.param), info=sem_mensagem, aviso=sem_mensagem)
+    grafo.calcular_distancias_predecessores_floyd_warshall(backend="python")
+    rotas, _, _ = construir_solucao_path_scanning(grafo)
+    return grafo, rotas
+
+
+def recalculado(rota, grafo):
+    """(custo, demanda) da rota recalculados do zero, visita a visita."""
+    copia = rota.copiar()
+    copia.atualizar_demanda_custo(grafo)
+    return copia.custo_acumulado, copia.demanda_acumulada
+
+
+@pytest.mark.parametrize("normalizado", [True, False])
+def test_movimentos_da_rota_iguais_ao_recalculo(instancia, normalizado):
+    """Custo mantido pelos deltas (com arestas invertidas pelo 2-opt) contra o recálculo completo."""
+    grafo, rotas_ps = instancia
+    grafo.normalizado = normalizado # False: deltas por MatrizDensa.valor em vez do vetor plano
+    try:
+        rng = random.Random(3)
+        rotas = [rota.copiar() for rota in rotas_ps]
+        for _ in range(300):
+            a, b = rng.sample(range(len(rotas)), 2) if len(rotas) > 1 else (0, 0)
+            rota_a, rota_b = rotas[a], rotas[b]
+            movimento = rng.choice(["inverter", "mover", "trocar"])
+            if movimento == "inverter" or a == b:
+                i = rng.randrange(len(rota_a.servicos))
+                rota_a.inverter_trecho(i, rng.randrange(i, len(rota_a.servicos)), grafo)
+            elif movimento == "mover" and len(rota_a.servicos) > 1:
+                service_id = rota_a.remover_servico(rng.randrange(len(rota_a.servicos)), grafo)
+                rota_b.inserir_servico(rng.randrange(len(rota_b.servicos) + 1), service_id, grafo)
+            else:
+                i, j = rng.randrange(len(rota_a.servicos)), rng.randrange(len(rota_b.servicos))
+                service_id = rota_a.trocar_servico(i, rota_b.servicos[j], grafo)
+                rota_b.trocar_servico(j, service_id, grafo)
+            for rota in (rota_a, rota_b):
+                assert (rota.custo_acumulado, rota.demanda_acumulada) == recalculado(rota, grafo)
+    finally:
+        grafo.normalizado = True
+    assert sorted(sid for rota in rotas for sid in rota.servicos) == sorted(grafo.servicos)
+
+
+def test_deltas_sem_inverter_arestas(instancia):
+    """Na orientação fixa das listas do AG, os deltas batem com MatrizServicos.custo_rota."""
+    grafo, rotas = instancia
+    matriz = grafo.get_matriz_servicos()
+    tabela = grafo.servicos
+    rng = random.Random(8)
+    for rota in rotas:
+        servicos = list(rota.servicos)
+        prefixos = PrefixosRota(grafo, servicos)
+        custo = matriz.custo_rota(servicos)[0]
+        assert prefixos.custo_total == custo
+        k = len(servicos)
+        for _ in range(30):
+            i = rng.randrange(k)
+            j = rng.randrange(i, k)
+            outro = rng.choice(list(tabela))
+            u, v, cs = tabela.origem[outro], tabela.destino[outro], tabela.custo_servico[outro]
+            invertida = servicos[:i] + servicos[i:j + 1][::-1] + servicos[j + 1:]
+            assert prefixos.delta_inversao(i, j) == matriz.custo_rota(invertida)[0] - custo
+            assert prefixos.delta_remocao(i) == matriz.custo_rota(servicos[:i] + servicos[i + 1:])[0] - custo
+            assert prefixos.delta_insercao(j, u, v, cs) == matriz.custo_rota(servicos[:j] + [outro] + servicos[j:])[0] - custo
+            assert (prefixos.delta_substituicao(i, u, v, cs)
+                    == matriz.custo_rota(servicos[:i] + [outro] + servicos[i + 1:])[0] - custo)